@@ -1,16 +1,272 @@
 #!/usr/bin/env python3
 
-import argparse, json, logging, os, subprocess, sys
-import time, venv, hashlib, threading, shutil 
+import json, os, socket, sys
+
+
+if __name__ == "__main__" and not os.environ.get('PYRUNNER_NO_DAEMON'):
+    # Thin client: runs before the heavy imports below so a warm daemon answers in milliseconds.
+    # It only needs the imports above; the socket path matches _daemon_socket_path().
+    def _forward_to_daemon(argv):
+        socket_path = os.environ.get('PYRUNNER_SOCKET') or os.path.join(os.path.expanduser('~'),
+                                                                        '.pyrunner_cache', 'daemon.sock')
+        if (not argv or argv[0] == 'daemon' or {'shell', '--watch', '--watch-deps'} & set(argv)
+                or not hasattr(socket, 'send_fds') or not os.path.exists(socket_path)):
+            return None
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            client.connect(socket_path)
+            request = json.dumps({'argv': argv, 'cwd': os.getcwd(), 'env': dict(os.environ)}).encode() + b'\n'
+            socket.send_fds(client, [request], [0, 1, 2])
+        except OSError:
+            client.close()
+            return None
+        
+        buffer = b''
+        with client:
+            while b'\n' not in buffer:
+                try:
+                    chunk = client.recv(4096)
+                except KeyboardInterrupt:
+                    client.sendall(b'{"signal": 2}\n')
+                    continue
+                if not chunk:
+                    sys.stderr.write("❌ PyRunner daemon closed the connection\n")
+                    return 1
+                buffer += chunk
+        return json.loads(buffer.split(b'\n', 1)[0]).get('exit', 1)
+    
+    _daemon_exit = _forward_to_daemon(sys.argv[1:])
+    if _daemon_exit is not None:
+        sys.exit(_daemon_exit)
+
+import argparse, ast, asyncio, atexit, contextlib, errno, fnmatch, logging, re, signal, subprocess, traceback
+import base64, csv, gzip, http.server, io, mmap, queue, socketserver, stat, tarfile, urllib.parse
+import time, venv, hashlib, threading, shutil, platform, sysconfig, zlib
 import concurrent.futures
+import copy
+import functools
+import itertools
+import statistics
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Set
 import yaml
 import shlex
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from datetime import datetime, timedelta
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
+try:
+    import resource
+except ImportError:
+    resource = None
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+METRIC_DEFINITIONS = {
+    'pyrunner_runs_total': ('counter', 'Script runs by mode and result'),
+    'pyrunner_cache_requests_total': ('counter', 'Dependency, artifact and shared environment cache lookups'),
+    'pyrunner_install_failures_total': ('counter', 'Dependency installations that failed'),
+    'pyrunner_env_creation_seconds': ('histogram', 'Time to create a virtual environment'),
+    'pyrunner_install_seconds': ('histogram', 'Time to install or update dependencies'),
+    'pyrunner_validation_seconds': ('histogram', 'Time to validate an environment'),
+    'pyrunner_background_processes': ('gauge', 'Background processes and replicas still alive'),
+    'pyrunner_environments': ('gauge', 'Environments in the environment index'),
+}
+METRIC_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+RUN_LOG_BLOCK_BYTES = 64 * 1024
+RUN_LOG_SEGMENT_BYTES = 8 * 1024 * 1024
+RUN_LOG_MAX_SEGMENTS = 16
+STREAM_CHUNK_SIZE = 64 * 1024
+REQUIREMENT_NAME_RE = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)')
+PIP_VALUE_OPTIONS = {
+    '-i': '--index-url',
+    '--index-url': '--index-url',
+    '--extra-index-url': '--extra-index-url',
+    '-f': '--find-links',
+    '--find-links': '--find-links',
+    '--trusted-host': '--trusted-host',
+    '--only-binary': '--only-binary',
+    '--no-binary': '--no-binary'
+}
+PIP_FLAG_OPTIONS = {'--no-index', '--pre', '--prefer-binary'}
+PIP_INSTALL_ONLY_OPTIONS = {'--compile', '--no-compile', '--user', '--force-reinstall', '--ignore-installed',
+                            '--no-warn-script-location', '--no-warn-conflicts', '--upgrade-strategy', '--root', '--prefix'}
+MODULE_DISTRIBUTIONS = {
+    'attr': 'attrs',
+    'Bio': 'biopython',
+    'bs4': 'beautifulsoup4',
+    'Crypto': 'pycryptodome',
+    'cv2': 'opencv-python',
+    'dateutil': 'python-dateutil',
+    'discord': 'discord.py',
+    'docx': 'python-docx',
+    'dotenv': 'python-dotenv',
+    'fitz': 'PyMuPDF',
+    'gi': 'PyGObject',
+    'git': 'GitPython',
+    'jose': 'python-jose',
+    'jwt': 'PyJWT',
+    'kafka': 'kafka-python',
+    'ldap': 'python-ldap',
+    'Levenshtein': 'python-Levenshtein',
+    'magic': 'python-magic',
+    'MySQLdb': 'mysqlclient',
+    'nmap': 'python-nmap',
+    'OpenSSL': 'pyOpenSSL',
+    'PIL': 'Pillow',
+    'pkg_resources': 'setuptools',
+    'pptx': 'python-pptx',
+    'psycopg2': 'psycopg2-binary',
+    'serial': 'pyserial',
+    'skimage': 'scikit-image',
+    'sklearn': 'scikit-learn',
+    'slugify': 'python-slugify',
+    'telegram': 'python-telegram-bot',
+    'usb': 'pyusb',
+    'websocket': 'websocket-client',
+    'win32api': 'pywin32',
+    'yaml': 'PyYAML',
+    'zmq': 'pyzmq'
+}
+# Widely used distributions whose import name is the distribution name; anything else must be mapped or learned
+KNOWN_DISTRIBUTIONS = {
+    'aiohttp', 'alembic', 'anyio', 'arrow', 'attrs', 'boto3', 'botocore', 'celery', 'certifi', 'click',
+    'cryptography', 'django', 'fastapi', 'flask', 'gunicorn', 'h5py', 'httpx', 'jinja2', 'jsonschema', 'lxml',
+    'markdown', 'matplotlib', 'numpy', 'openpyxl', 'packaging', 'pandas', 'paramiko', 'plotly', 'psutil',
+    'pyarrow', 'pydantic', 'pygments', 'pymongo', 'pytest', 'pytz', 'redis', 'requests', 'rich', 'scipy',
+    'seaborn', 'setuptools', 'six', 'sqlalchemy', 'starlette', 'sympy', 'tabulate', 'toml', 'torch', 'tornado',
+    'tqdm', 'typer', 'urllib3', 'uvicorn', 'xlrd', 'yarl'
+}
+INTERPRETER_NAME_RE = re.compile(r'^python(3(\.\d+)?)?(\.exe)?$')
+INTERPRETER_PROBE = (
+    "import json, platform, sys, sysconfig; print(json.dumps({"
+    "'version': platform.python_version(), 'implementation': sys.implementation.name, "
+    "'cache_tag': sys.implementation.cache_tag, 'abi_tag': sysconfig.get_config_var('SOABI'), "
+    "'platform': sysconfig.get_platform(), 'machine': platform.machine()}))"
+)
+STDLIB_PROBE = (
+    "import json, os, sys, sysconfig\n"
+    "names = getattr(sys, 'stdlib_module_names', None)\n"
+    "if names is None:\n"
+    "    stdlib_dir = sysconfig.get_paths()['stdlib']\n"
+    "    names = set(sys.builtin_module_names) | {name[:-3] if name.endswith('.py') else name.split('.')[0]\n"
+    "        for name in os.listdir(stdlib_dir) if name != 'site-packages'}\n"
+    "print(json.dumps(sorted(names)))"
+)
+STARTUP_PROBE = r'''
+import importlib.machinery, json, os, site, sys
+pth_imports = []
+for site_dir in site.getsitepackages():
+    try:
+        names = sorted(os.listdir(site_dir))
+    except OSError:
+        continue
+    for name in names:
+        if not name.endswith('.pth') or name.startswith('.'):
+            continue
+        pth_file = os.path.join(site_dir, name)
+        try:
+            with open(pth_file, encoding='utf-8', errors='replace') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            continue
+        pth_imports += [[pth_file, line.rstrip()] for line in lines if line.startswith(('import ', 'import\t'))]
+init_suffixes = importlib.machinery.SOURCE_SUFFIXES + importlib.machinery.BYTECODE_SUFFIXES
+suffixes = sorted(set(init_suffixes + importlib.machinery.EXTENSION_SUFFIXES), key=len, reverse=True)
+index = {}
+for entry in sys.path:
+    # Zip archives (e.g. the stdlib zip) are left to the regular finders
+    if not os.path.isdir(entry):
+        continue
+    for name in sorted(os.listdir(entry)):
+        full_path = os.path.join(entry, name)
+        if os.path.isdir(full_path):
+            is_package = any(os.path.exists(os.path.join(full_path, '__init__' + suffix)) for suffix in init_suffixes)
+            module = name if is_package else None
+        else:
+            module = next((name[:-len(suffix)] for suffix in suffixes if name.endswith(suffix)), None)
+        if module and module.isidentifier():
+            index.setdefault(module, entry)
+print(json.dumps({'sys_path': sys.path, 'prefix': sys.prefix, 'exec_prefix': sys.exec_prefix,
+                  'pth_imports': pth_imports, 'module_index': index}))
+'''
+STARTUP_BOOTSTRAP = '''# Generated by PyRunner for `python -I -S` launches; rebuilt when site-packages changes.
+import os
+import sys
+
+SYS_PATH = __SYS_PATH__
+PREFIX = __PREFIX__
+EXEC_PREFIX = __EXEC_PREFIX__
+PTH_IMPORTS = __PTH_IMPORTS__
+MODULE_INDEX = __MODULE_INDEX__
+
+
+class IndexedPathFinder:
+    """Resolve top-level imports straight to the sys.path entry recorded at install time."""
+
+    def __init__(self, index, shadowed):
+        self.index = index
+        self.shadowed = shadowed
+
+    def find_spec(self, name, path=None, target=None):
+        if path is not None or name in self.shadowed or name not in self.index:
+            return None
+        from importlib.machinery import PathFinder
+        return PathFinder.find_spec(name, [self.index[name]], target)
+
+
+def boot():
+    del sys.path[0]
+    sys.argv = sys.argv[1:]
+    script = sys.argv[0]
+    sys.prefix, sys.exec_prefix = PREFIX, EXEC_PREFIX
+    # -I ignores PYTHON* variables; honour the ones that can still be applied at this point
+    if os.environ.get('PYTHONUNBUFFERED'):
+        sys.stdout.reconfigure(write_through=True)
+        sys.stderr.reconfigure(write_through=True)
+    if os.environ.get('PYTHONDONTWRITEBYTECODE'):
+        sys.dont_write_bytecode = True
+    encoding, _, errors = os.environ.get('PYTHONIOENCODING', '').partition(':')
+    if encoding or errors:
+        sys.stdin.reconfigure(encoding=encoding or None, errors=errors or None)
+        sys.stdout.reconfigure(encoding=encoding or None, errors=errors or None)
+        sys.stderr.reconfigure(encoding=encoding or None)
+    extra = [os.path.dirname(os.path.abspath(script))]
+    extra += [entry for entry in os.environ.get('PYTHONPATH', '').split(os.pathsep) if entry]
+    sys.path[:] = extra + SYS_PATH
+    for pth_file, line in PTH_IMPORTS:
+        try:
+            exec(line)
+        except Exception as e:
+            print(f"Error processing line of {pth_file}: {e}", file=sys.stderr)
+    try:
+        import sitecustomize
+    except ImportError:
+        pass
+    # The builtins site.main() would add under -S, without the rest of its path processing
+    import site
+    site.setquit()
+    site.sethelper()
+    site.setcopyright()
+    seen = set()
+    sys.path[:] = [entry for entry in sys.path if not (entry in seen or seen.add(entry))]
+    if MODULE_INDEX:
+        shadowed = set()
+        for directory in extra:
+            try:
+                shadowed.update(name.partition('.')[0] for name in os.listdir(directory))
+            except OSError:
+                pass
+        from importlib.machinery import PathFinder
+        position = sys.meta_path.index(PathFinder) if PathFinder in sys.meta_path else len(sys.meta_path)
+        sys.meta_path.insert(position, IndexedPathFinder(MODULE_INDEX, shadowed))
+    import runpy
+    runpy.run_path(script, run_name='__main__')
+'''
+RESOURCE_LIMIT_KEYS = {'memory', 'data', 'cpu_seconds', 'open_files', 'nice', 'ionice', 'timeout', 'kill_after'}
 
 
 class PyRunnerError(Exception):
@@ -37,14 +293,706 @@ class LockEntry:
     dependencies: List[str]
 
 
+@dataclass
+class MatrixResult:
+    label: str
+    env_path: str
+    profile: str
+    python_version: Optional[str]
+    exit_code: Optional[int]
+    provision_seconds: float
+    run_seconds: float
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchJobResult:
+    name: str
+    script: str
+    env: str
+    status: str
+    exit_code: Optional[int]
+    started_at: Optional[float]
+    finished_at: Optional[float]
+    duration_seconds: float
+    log_file: Optional[str]
+    error: Optional[str] = None
+
+
+@dataclass
+class GarbageCollectionReport:
+    envs_scanned: int = 0
+    files_linked: int = 0
+    bytes_deduplicated: int = 0
+    store_entries_pruned: int = 0
+    bytes_pruned: int = 0
+    evicted_envs: List[str] = None
+    bytes_evicted: int = 0
+    usage_bytes: int = 0
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        return self.bytes_deduplicated + self.bytes_pruned + self.bytes_evicted
+
+
+@dataclass
+class SlimReport:
+    env_path: str
+    dry_run: bool = False
+    files_removed: int = 0
+    bytes_removed: int = 0
+    sources_replaced: int = 0
+    bytes_replaced: int = 0
+    libraries_stripped: int = 0
+    bytes_stripped: int = 0
+    records_updated: int = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_removed + self.bytes_replaced + self.bytes_stripped
+
+
+@dataclass
+class DependencyAnalysis:
+    env_path: str
+    scripts: List[str]
+    imported_modules: List[str]
+    unresolved_imports: List[str]
+    needed: List[str]
+    unused: List[Dict]
+
+
+@dataclass
+class VerificationReport:
+    env_path: str
+    files_checked: int
+    files_skipped: int
+    bytes_hashed: int
+    duration_seconds: float
+    problems: List[Dict]
+    repairable: Dict[str, str]
+    unrepairable: Dict[str, str]
+    unverifiable: List[str]
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems
+
+
+@dataclass
+class ResourceLimitReport:
+    exit_code: int
+    limit_hit: Optional[str]
+    signal: Optional[str]
+    limits: Dict
+    usage: Dict
+    detail: str = ""
+
+
+@dataclass
+class ConfigDiff:
+    env_added: Dict[str, str] = field(default_factory=dict)
+    env_removed: List[str] = field(default_factory=list)
+    env_changed: Dict[str, str] = field(default_factory=dict)
+    deps_added: List[str] = field(default_factory=list)
+    deps_removed: List[str] = field(default_factory=list)
+    editables_added: List[str] = field(default_factory=list)
+    editables_removed: List[str] = field(default_factory=list)
+    other: List[str] = field(default_factory=list)
+
+    @property
+    def env_vars_changed(self) -> bool:
+        return bool(self.env_added or self.env_removed or self.env_changed)
+
+    @property
+    def dependencies_changed(self) -> bool:
+        return bool(self.deps_added or self.deps_removed or self.editables_added or self.editables_removed)
+
+
+@dataclass
+class InterpreterInfo:
+    path: str
+    version: str
+    implementation: str
+    cache_tag: str
+    abi_tag: Optional[str]
+    platform: str
+    machine: str
+    signature: List[int]
+
+
+@dataclass
+class PyRunnerEvent:
+    kind: str
+    message: str
+    env_path: Optional[str] = None
+    level: str = 'info'
+    data: Dict = field(default_factory=dict)
+    timestamp: float = field(default_factory=time.time)
+
+
+@dataclass
+class EnvHandle:
+    path: str
+    python: str
+    config_hash: str
+    python_version: str
+    status: str
+    env_vars: Dict[str, str]
+    provision_seconds: float
+
+
+@dataclass
+class RunResult:
+    script: str
+    args: List[str]
+    env_path: str
+    returncode: Optional[int]
+    stdout: str
+    stderr: str
+    started_at: float
+    duration_seconds: float
+    timed_out: bool = False
+    
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0
+
+
+@dataclass
+class CommandResult:
+    args: List[str]
+    returncode: Optional[int]
+    stdout: str
+    stderr: str
+    duration_seconds: float
+    timed_out: bool = False
+
+
+class AsyncOrchestrator:
+    def __init__(self, max_concurrency: int = 8, show_progress: bool = True):
+        self.max_concurrency = max_concurrency
+        self.show_progress = show_progress
+        self._loop = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, daemon=True,
+                                 name='pyrunner-orchestrator').start()
+        return self._loop
+
+    def submit(self, coro):
+        future = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        try:
+            return future.result()
+        except KeyboardInterrupt:
+            future.cancel()
+            try:
+                future.result(timeout=10)
+            except BaseException:
+                pass
+            raise
+
+    def run(self, args: List[str], **kwargs) -> CommandResult:
+        return self.submit(self.run_async(args, **kwargs))
+
+    def run_many(self, commands: List[Tuple[str, List[str], Dict]], description: str = "",
+                 max_parallel: Optional[int] = None) -> List[CommandResult]:
+        return self.submit(self.run_many_async(commands, description, max_parallel))
+
+    async def run_async(self, args: List[str], timeout: Optional[float] = None, env: Optional[Dict] = None,
+                        cwd: Optional[str] = None, limited: bool = True) -> CommandResult:
+        if not limited:
+            return await self._execute(args, timeout, env, cwd)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            return await self._execute(args, timeout, env, cwd)
+
+    async def run_many_async(self, commands: List[Tuple[str, List[str], Dict]], description: str = "",
+                             max_parallel: Optional[int] = None) -> List[CommandResult]:
+        local_limit = asyncio.Semaphore(max_parallel) if max_parallel else None
+        progress = {'done': 0, 'running': set()}
+        
+        async def run_one(label, args, kwargs):
+            if local_limit:
+                await local_limit.acquire()
+            try:
+                progress['running'].add(label)
+                self._report_progress(description, progress, len(commands))
+                return await self.run_async(args, **kwargs)
+            finally:
+                progress['running'].discard(label)
+                progress['done'] += 1
+                self._report_progress(description, progress, len(commands))
+                if local_limit:
+                    local_limit.release()
+        
+        tasks = [asyncio.ensure_future(run_one(label, args, kwargs)) for label, args, kwargs in commands]
+        try:
+            return await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            if self.show_progress and sys.stderr.isatty() and commands:
+                sys.stderr.write("\n")
+
+    async def stream_async(self, args: List[str], on_line, env: Optional[Dict] = None,
+                           cwd: Optional[str] = None, timeout: Optional[float] = None,
+                           preexec_fn=None) -> CommandResult:
+        started = time.time()
+        try:
+            process = await asyncio.create_subprocess_exec(*args, stdout=asyncio.subprocess.PIPE,
+                                                           stderr=asyncio.subprocess.STDOUT, env=env, cwd=cwd,
+                                                           preexec_fn=preexec_fn)
+        except OSError as e:
+            return CommandResult(list(args), None, '', str(e), 0.0)
+        
+        async def pump():
+            # Split lines here rather than with readline(), which fails on lines over the reader's 64 KiB limit
+            pending = b''
+            while True:
+                chunk = await process.stdout.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                *lines, pending = (pending + chunk).split(b'\n')
+                for line in lines:
+                    on_line((line + b'\n').decode(errors='replace'))
+            if pending:
+                on_line(pending.decode(errors='replace'))
+            return await process.wait()
+        
+        try:
+            returncode = await asyncio.wait_for(pump(), timeout)
+            return CommandResult(list(args), returncode, '', '', time.time() - started)
+        except asyncio.TimeoutError:
+            await self._terminate(process)
+            return CommandResult(list(args), None, '', f"Timed out after {timeout}s", time.time() - started, True)
+        except BaseException:
+            await self._terminate(process)
+            raise
+
+    async def _execute(self, args: List[str], timeout: Optional[float], env: Optional[Dict],
+                       cwd: Optional[str]) -> CommandResult:
+        started = time.time()
+        try:
+            process = await asyncio.create_subprocess_exec(*args, stdout=asyncio.subprocess.PIPE,
+                                                           stderr=asyncio.subprocess.PIPE, env=env, cwd=cwd)
+        except OSError as e:
+            return CommandResult(list(args), None, '', str(e), 0.0)
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            await self._terminate(process)
+            return CommandResult(list(args), None, '', f"Timed out after {timeout}s", time.time() - started, True)
+        except asyncio.CancelledError:
+            await self._terminate(process)
+            raise
+        return CommandResult(list(args), process.returncode, stdout.decode(errors='replace'),
+                             stderr.decode(errors='replace'), time.time() - started)
+
+    async def _terminate(self, process) -> None:
+        if process.returncode is not None:
+            return
+        try:
+            process.terminate()
+            await asyncio.wait_for(process.wait(), 5)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+        except ProcessLookupError:
+            pass
+
+    def _report_progress(self, description: str, progress: Dict, total: int) -> None:
+        if not self.show_progress or not sys.stderr.isatty():
+            return
+        running = ', '.join(sorted(progress['running'])[:3])
+        if len(progress['running']) > 3:
+            running += ', ...'
+        sys.stderr.write(f"\r⏳ {description} {progress['done']}/{total}"
+                         f"{' - ' + running if running else ''}\x1b[K")
+        sys.stderr.flush()
+
+
+class MetricsRegistry:
+    """Counters and histograms recorded in-process and merged into a shared state file on flush."""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, float]] = {}
+        self._histograms: Dict[str, Dict[str, Dict]] = {}
+
+    def _labels(self, labels: Dict) -> str:
+        return ','.join(f'{key}="{str(value)}"' for key, value in sorted(labels.items()))
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        key = self._labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = self._labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.setdefault(key, {'buckets': [0] * len(METRIC_BUCKETS), 'sum': 0.0, 'count': 0})
+            for index, bound in enumerate(METRIC_BUCKETS):
+                if value <= bound:
+                    histogram['buckets'][index] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    @contextlib.contextmanager
+    def time(self, name: str, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    @contextlib.contextmanager
+    def _state_lock(self):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.cache_dir / 'metrics.lock', 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def load_state(self) -> Dict:
+        try:
+            with open(self.cache_dir / 'metrics.json', 'r') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = None
+        if not isinstance(state, dict):
+            state = {}
+        state.setdefault('counters', {})
+        state.setdefault('histograms', {})
+        return state
+
+    def flush(self, textfile: Optional[str] = None) -> None:
+        """Merge pending samples into metrics.json and rewrite the Prometheus textfile(s).
+        
+        With nothing pending the files are left as they are, unless a textfile is requested explicitly.
+        """
+        with self._lock:
+            counters, self._counters = self._counters, {}
+            histograms, self._histograms = self._histograms, {}
+        if not counters and not histograms and not textfile:
+            return
+        textfiles = [self.cache_dir / 'metrics.prom']
+        textfile = textfile or os.environ.get('PYRUNNER_METRICS_TEXTFILE')
+        if textfile:
+            textfiles.append(Path(textfile))
+        try:
+            with self._state_lock():
+                state = self.load_state()
+                for name, series in counters.items():
+                    merged = state['counters'].setdefault(name, {})
+                    for key, value in series.items():
+                        merged[key] = merged.get(key, 0) + value
+                for name, series in histograms.items():
+                    merged = state['histograms'].setdefault(name, {})
+                    for key, histogram in series.items():
+                        target = merged.setdefault(key, {'buckets': [0] * len(METRIC_BUCKETS), 'sum': 0.0, 'count': 0})
+                        target['buckets'] = [a + b for a, b in zip(target['buckets'], histogram['buckets'])]
+                        target['sum'] += histogram['sum']
+                        target['count'] += histogram['count']
+                state_file = self.cache_dir / 'metrics.json'
+                tmp_file = state_file.with_name(f".metrics.{os.getpid()}.tmp")
+                with open(tmp_file, 'w') as f:
+                    json.dump(state, f)
+                os.replace(tmp_file, state_file)
+                text = self.render(state)
+                for path in textfiles:
+                    # node_exporter's textfile collector needs the file replaced atomically
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+                    tmp_path.write_text(text)
+                    os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def gauges(self) -> Dict[str, float]:
+        index_file = self.cache_dir / 'env_index.json'
+        try:
+            with open(index_file, 'r') as f:
+                env_paths = list(json.load(f).get('envs', {}))
+        except (OSError, ValueError):
+            env_paths = []
+        alive = sum(len(PyRunner.live_pids(Path(env_path))) for env_path in env_paths)
+        return {'pyrunner_background_processes': alive, 'pyrunner_environments': len(env_paths)}
+
+    def render(self, state: Optional[Dict] = None) -> str:
+        state = state or self.load_state()
+        lines = []
+        for name, (metric_type, help_text) in METRIC_DEFINITIONS.items():
+            if metric_type == 'counter' and name in state['counters']:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                for key, value in sorted(state['counters'][name].items()):
+                    lines.append(f"{name}{{{key}}} {value:g}" if key else f"{name} {value:g}")
+            elif metric_type == 'histogram' and name in state['histograms']:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for key, histogram in sorted(state['histograms'][name].items()):
+                    prefix = f"{key}," if key else ""
+                    for bound, count in zip(METRIC_BUCKETS, histogram['buckets']):
+                        lines.append(f'{name}_bucket{{{prefix}le="{bound:g}"}} {count}')
+                    lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {histogram["count"]}')
+                    suffix = f"{{{key}}}" if key else ""
+                    lines.append(f"{name}_sum{suffix} {histogram['sum']:.6f}")
+                    lines.append(f"{name}_count{suffix} {histogram['count']}")
+        for name, value in self.gauges().items():
+            lines += [f"# HELP {name} {METRIC_DEFINITIONS[name][1]}", f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def serve(self, socket_path: Path) -> None:
+        """Serve GET /metrics over HTTP on a Unix socket (curl --unix-socket PATH http://localhost/metrics)."""
+        registry = self
+        
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                with registry._state_lock():
+                    body = registry.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def address_string(self):
+                return 'unix'
+
+            def log_message(self, format, *args):
+                pass
+        
+        if socket_path.exists():
+            socket_path.unlink()
+        socket_path.parent.mkdir(parents=True, exist_ok=True)
+        server = socketserver.ThreadingUnixStreamServer(str(socket_path), Handler)
+        os.chmod(socket_path, 0o600)
+        print(f"📈 Serving metrics on {socket_path} (PID: {os.getpid()})", flush=True)
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            socket_path.unlink(missing_ok=True)
+
+
+class RunLogStore:
+    """Run logs kept as segments of independently gzipped blocks plus a JSON-lines index.
+
+    Every block is a complete gzip member, so segments stay readable with zcat, while
+    queries use the index to decompress only the blocks whose time range and runs match.
+    """
+
+    def __init__(self, path: Path, segment_bytes: int = RUN_LOG_SEGMENT_BYTES,
+                 max_segments: int = RUN_LOG_MAX_SEGMENTS):
+        self.path = path
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+
+    @contextlib.contextmanager
+    def _locked(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.path / 'store.lock', 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _read_index(self) -> List[Dict]:
+        entries = []
+        try:
+            with open(self.path / 'index.jsonl', 'r') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue  # torn line from a writer that died mid-append
+        except OSError:
+            pass
+        return entries
+
+    def _append_index(self, entry: Dict) -> None:
+        with open(self.path / 'index.jsonl', 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+
+    def load_index(self) -> Tuple[List[Dict], Dict[str, Dict]]:
+        blocks, runs = [], {}
+        for entry in self._read_index():
+            if entry.get('type') == 'block':
+                blocks.append(entry)
+            elif entry.get('type') == 'run':
+                run = runs.setdefault(entry['run'], {'run': entry['run'], 'pids': [], 'started': None,
+                                                     'finished': None, 'exit_code': None, 'result': None})
+                for key, value in entry.items():
+                    if key == 'pids':
+                        run['pids'] += [pid for pid in value if pid not in run['pids']]
+                    elif key != 'type':
+                        run[key] = value
+        return blocks, runs
+
+    def record_run(self, run_id: str, **fields) -> None:
+        with self._locked():
+            self._append_index(dict(fields, type='run', run=run_id))
+
+    def write_block(self, lines: List[Dict]) -> None:
+        data = gzip.compress(''.join(json.dumps(line) + '\n' for line in lines).encode(), mtime=0)
+        with self._locked():
+            segments = sorted(self.path.glob('seg-*.log.gz'))
+            segment = segments[-1] if segments else None
+            if segment is None or segment.stat().st_size >= self.segment_bytes:
+                number = int(segment.name[4:10]) + 1 if segment else 1
+                segment = self.path / f"seg-{number:06d}.log.gz"
+                segments.append(segment)
+            with open(segment, 'ab') as f:
+                offset = os.fstat(f.fileno()).st_size
+                f.write(data)
+            self._append_index({'type': 'block', 'segment': segment.name, 'offset': offset, 'length': len(data),
+                                'first': min(line['time'] for line in lines),
+                                'last': max(line['time'] for line in lines), 'lines': len(lines),
+                                'runs': sorted({line['run'] for line in lines})})
+            if len(segments) > self.max_segments:
+                self._drop_segments(segments[:len(segments) - self.max_segments])
+
+    def _drop_segments(self, segments: List[Path]) -> None:
+        dropped = {segment.name for segment in segments}
+        entries = self._read_index()
+        kept_blocks = [entry for entry in entries if entry.get('type') == 'block' and entry['segment'] not in dropped]
+        live_runs = {run for block in kept_blocks for run in block['runs']}
+        oldest = min((block['first'] for block in kept_blocks), default=0)
+        kept_runs = {entry['run'] for entry in entries if entry.get('type') == 'run'
+                     and (entry['run'] in live_runs
+                          or max(entry.get('started') or 0, entry.get('finished') or 0) >= oldest)}
+        kept = {id(entry) for entry in kept_blocks}
+        tmp_file = self.path / f".index.{os.getpid()}.tmp"
+        with open(tmp_file, 'w') as f:
+            for entry in entries:
+                if id(entry) in kept or (entry.get('type') == 'run' and entry['run'] in kept_runs):
+                    f.write(json.dumps(entry) + '\n')
+        os.replace(tmp_file, self.path / 'index.jsonl')
+        for segment in segments:
+            segment.unlink(missing_ok=True)
+
+    def find_runs(self, pids: Optional[List[int]] = None, exit_code: Optional[int] = None, failed: bool = False,
+                  since: Optional[float] = None, until: Optional[float] = None) -> List[Dict]:
+        _, runs = self.load_index()
+        matches = []
+        for run in runs.values():
+            if pids and not set(pids) & set(run['pids'] + [run.get('pyrunner_pid')]):
+                continue
+            if exit_code is not None and run['exit_code'] != exit_code:
+                continue
+            if failed and not (run['exit_code'] or run['result'] in ('error', 'interrupted')):
+                continue
+            if until is not None and (run['started'] or 0) > until:
+                continue
+            if since is not None and (run['finished'] or time.time()) < since:
+                continue
+            matches.append(run)
+        return sorted(matches, key=lambda run: run['started'] or 0)
+
+    def read_lines(self, runs: Optional[Set[str]] = None, since: Optional[float] = None,
+                   until: Optional[float] = None, reverse: bool = False):
+        """Yield log lines in write order (or reversed), decompressing only matching blocks."""
+        blocks, _ = self.load_index()
+        selected = [block for block in blocks
+                    if (since is None or block['last'] >= since) and (until is None or block['first'] <= until)
+                    and (runs is None or runs & set(block['runs']))]
+        for block in reversed(selected) if reverse else selected:
+            try:
+                with open(self.path / block['segment'], 'rb') as f:
+                    f.seek(block['offset'])
+                    data = gzip.decompress(f.read(block['length']))
+            except (OSError, EOFError, zlib.error):
+                continue  # segment dropped by retention since the index was read
+            lines = [json.loads(line) for line in data.decode().splitlines()]
+            for line in reversed(lines) if reverse else lines:
+                if ((runs is None or line['run'] in runs) and (since is None or line['time'] >= since)
+                        and (until is None or line['time'] <= until)):
+                    yield line
+
+
+class RunLogHandler(logging.Handler):
+    """Buffer the records of one run and write them to a RunLogStore one block at a time."""
+
+    def __init__(self, store: RunLogStore, run_id: str, flush_interval: float = 2.0):
+        super().__init__()
+        self.store = store
+        self.run_id = run_id
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._buffered_bytes = 0
+        self._stopped = threading.Event()
+        self._flusher = None
+
+    def emit(self, record):
+        try:
+            message = record.getMessage()
+            formatter = self.formatter or logging.Formatter()
+            if record.exc_info and not record.exc_text:
+                record.exc_text = formatter.formatException(record.exc_info)
+            if record.exc_text:
+                message += '\n' + record.exc_text
+            if record.stack_info:
+                message += '\n' + formatter.formatStack(record.stack_info)
+            line = {'time': record.created, 'run': self.run_id, 'level': record.levelname, 'message': message}
+        except Exception:
+            self.handleError(record)
+            return
+        with self.lock:
+            self._buffer.append(line)
+            self._buffered_bytes += len(line['message']) + 64
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+                self._flusher.start()
+            if self._buffered_bytes >= RUN_LOG_BLOCK_BYTES:
+                self.flush()
+
+    def _flush_periodically(self):
+        while not self._stopped.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            lines, self._buffer, self._buffered_bytes = self._buffer, [], 0
+            if not lines:
+                return
+            try:
+                self.store.write_block(lines)
+            except OSError as e:
+                sys.stderr.write(f"⚠️  Failed to write run log block to {self.store.path}: {e}\n")
+
+    def close(self):
+        self._stopped.set()
+        self.flush()
+        super().close()
+
+
 class FileWatcher(FileSystemEventHandler):
-    def __init__(self, runner, script_path, env_path, extra_args, env_vars, config_path):
+    def __init__(self, runner, script_path, env_path, extra_args, env_vars, config_path, replica_set=None,
+                 profile=None, resource_limits=None, shared_env=False):
         self.runner = runner
         self.script_path = script_path
         self.env_path = env_path
         self.extra_args = extra_args
         self.env_vars = env_vars
         self.config_path = config_path
+        self.replica_set = replica_set
+        self.profile = profile
+        self.resource_limits = resource_limits or {}
+        self.shared_env = shared_env
+        self.config = runner.parse_config(config_path, profile) if config_path else None
         self.process = None
         self.restart_needed = False
         self.deps_changed = False
@@ -60,11 +1008,23 @@ class FileWatcher(FileSystemEventHandler):
             self.restart_needed = True
             self._restart_script()
         elif file_path.name in ['requirements.txt', 'config.yaml', 'config.yml'] and file_path.samefile(Path(self.config_path)):
-            print(f"\n📦 Dependencies changed: {file_path.name}")
-            self.deps_changed = True
+            print(f"\n📦 Configuration changed: {file_path.name}")
             self._update_and_restart()
     
     def _restart_script(self):
+        if self.replica_set:
+            if self.replica_set.running():
+                if self.replica_set.rolling_restart():
+                    print(f"✅ Rolled {self.replica_set.replicas} replicas")
+            else:
+                print(f"🚀 Starting {self.replica_set.replicas} replicas...")
+                try:
+                    pids = self.replica_set.start_all()
+                    print(f"✅ Replicas started (PIDs: {', '.join(map(str, pids))})")
+                except Exception as e:
+                    print(f"❌ Failed to start replicas: {e}")
+            return
+        
         if self.process and self.process.poll() is None:
             print("⏹️  Stopping current process...")
             self.process.terminate()
@@ -81,61 +1041,655 @@ class FileWatcher(FileSystemEventHandler):
             if self.env_vars:
                 env.update(self.env_vars)
             
-            self.process = subprocess.Popen(cmd, env=env)
+            self.process = subprocess.Popen(self.runner._limit_command(cmd, self.resource_limits), env=env,
+                                            preexec_fn=self.runner._limit_preexec(self.resource_limits))
+            self.runner.record_run_pid(self.process.pid)
             print(f"✅ Script restarted (PID: {self.process.pid})")
         except Exception as e:
             print(f"❌ Failed to restart: {e}")
     
     def _update_and_restart(self):
-        if self.process and self.process.poll() is None:
-            print("⏹️  Stopping current process...")
-            self.process.terminate()
-            self.process.wait()
-        
-        print("📦 Updating dependencies...")
         try:
-            config = self.runner.parse_config(self.config_path)
-            self.runner.install_dependencies(self.env_path, config, force_update=True)
-            print("✅ Dependencies updated")
-            self._restart_script()
-        except Exception as e:
-            print(f"❌ Failed to update dependencies: {e}")
+            config = self.runner.parse_config(self.config_path, self.profile)
+        except PyRunnerError as e:
+            print(f"❌ Failed to reload configuration: {e}")
+            return
+        diff = self.runner.diff_config(self.config or {}, config)
+        if diff.other:
+            print(f"ℹ️  Not applied while watching: {', '.join(diff.other)} (restart PyRunner to apply)")
+        if not diff.env_vars_changed and not diff.dependencies_changed:
+            if not diff.other:
+                print("ℹ️  No effective changes")
+            self.config = config
+            return
+        
+        if diff.dependencies_changed:
+            self.deps_changed = True
+            # Replicas keep serving on the old dependencies until the rolling restart reaches them
+            if not self.replica_set and self.process and self.process.poll() is None:
+                print("⏹️  Stopping current process...")
+                self.process.terminate()
+                self.process.wait()
+            if diff.deps_removed or diff.editables_removed:
+                print(f"➖ Removed from config (left installed, see 'pyrunner analyze --prune'): "
+                      f"{', '.join(diff.deps_removed + diff.editables_removed)}")
+            if diff.deps_added or diff.editables_added:
+                print(f"📦 Installing {', '.join(diff.deps_added + [f'-e {e}' for e in diff.editables_added])}...")
+                try:
+                    failed = self.runner.install_config_changes(self.env_path, config, diff, self.shared_env)
+                except Exception as e:
+                    failed = [str(e)]
+                if failed:
+                    print(f"❌ Failed to update dependencies: {', '.join(failed)}")
+                    return
+                print("✅ Dependencies updated")
+        
+        if diff.env_vars_changed:
+            changes = [f"+{key}" for key in diff.env_added] + [f"-{key}" for key in diff.env_removed]
+            changes += [f"~{key}" for key in diff.env_changed]
+            print(f"🔧 Environment variables changed: {', '.join(changes)}")
+            self.env_vars = config['environment_variables']
+            if self.replica_set:
+                env = os.environ.copy()
+                env.update(self.env_vars)
+                self.replica_set.set_env(env)
+        self.config = config
+        self._restart_script()
 
 
-class PyRunner:
-    def __init__(self):
-        self.logger = None
-        self.log_file = None
-        self.cache_dir = Path.home() / '.pyrunner_cache'
-        self.cache_dir.mkdir(exist_ok=True)
+class ReplicaSet:
+    """N copies of one script, each pinned to its own CPUs and tracked by its own PID file."""
+
+    def __init__(self, runner, cmd: List[str], env: Dict, env_path: Path, replicas: int,
+                 env_templates: Optional[Dict[str, str]] = None, pin_cpus: bool = True,
+                 background: bool = False, preexec_fn=None):
+        if replicas < 1:
+            raise PyRunnerError(f"--replicas must be at least 1, got {replicas}")
+        self.runner = runner
+        self.cmd = cmd
+        self.env = env
+        self.env_path = env_path
+        self.replicas = replicas
+        self.env_templates = env_templates or {}
+        self.background = background
+        self.preexec_fn = preexec_fn
+        self.processes: List[Optional[subprocess.Popen]] = [None] * replicas
+        self.pid_dir = env_path / '.pyrunner' / 'replicas'
+        self.cpu_sets = self._assign_cpus() if pin_cpus else [None] * replicas
+        self._output_lock = threading.Lock()
+        self._pumps: Dict[int, threading.Thread] = {}
+        # Render every template up front so a bad expression fails before anything starts
+        self.replica_envs = [self._replica_env(index) for index in range(replicas)]
+
+    def _assign_cpus(self) -> List[Optional[Set[int]]]:
+        if not hasattr(os, 'sched_setaffinity'):
+            if self.runner.logger:
+                self.runner.logger.warning("CPU affinity is not supported on this platform, replicas are not pinned")
+            return [None] * self.replicas
+        cpus = sorted(os.sched_getaffinity(0))
+        if self.replicas >= len(cpus):
+            return [{cpus[index % len(cpus)]} for index in range(self.replicas)]
+        # Contiguous slices keep each replica's CPUs together, spreading the remainder over the first replicas
+        per_replica, remainder = divmod(len(cpus), self.replicas)
+        cpu_sets, start = [], 0
+        for index in range(self.replicas):
+            end = start + per_replica + (1 if index < remainder else 0)
+            cpu_sets.append(set(cpus[start:end]))
+            start = end
+        return cpu_sets
+
+    def _render_template(self, template: str, index: int) -> str:
+        variables = {'i': index, 'n': self.replicas}
+        operators = {ast.Add: lambda a, b: a + b, ast.Sub: lambda a, b: a - b,
+                     ast.Mult: lambda a, b: a * b, ast.FloorDiv: lambda a, b: a // b,
+                     ast.Mod: lambda a, b: a % b}
+
+        def evaluate(node):
+            if isinstance(node, ast.Constant) and isinstance(node.value, int):
+                return node.value
+            if isinstance(node, ast.Name) and node.id in variables:
+                return variables[node.id]
+            if isinstance(node, ast.BinOp) and type(node.op) in operators:
+                return operators[type(node.op)](evaluate(node.left), evaluate(node.right))
+            if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+                return -evaluate(node.operand)
+            raise ValueError(ast.dump(node))
+
+        def substitute(match):
+            try:
+                return str(evaluate(ast.parse(match.group(1).strip(), mode='eval').body))
+            except (SyntaxError, ValueError, ZeroDivisionError):
+                raise PyRunnerError(f"Invalid replica template expression {{{match.group(1)}}} in {template!r} "
+                                    f"(use integers, i, n and + - * // %)")
+        return re.sub(r'\{([^{}]+)\}', substitute, template)
+
+    def _replica_env(self, index: int) -> Dict:
+        env = dict(self.env)
+        env['PYRUNNER_REPLICA'] = str(index)
+        env['PYRUNNER_REPLICAS'] = str(self.replicas)
+        for key, template in self.env_templates.items():
+            env[key] = self._render_template(template, index)
+        return env
+
+    def set_env(self, env: Dict) -> None:
+        """Use a new base environment for replicas started from now on."""
+        self.env = env
+        self.replica_envs = [self._replica_env(index) for index in range(self.replicas)]
+
+    def _pid_file(self, index: int) -> Path:
+        return self.pid_dir / f"replica-{index}.pid"
+
+    def _preexec(self, cpus: Optional[Set[int]]):
+        """Pin the child before exec, so the script never runs (or spawns threads) on other CPUs."""
+        if not cpus:
+            return self.preexec_fn
+        limit_preexec = self.preexec_fn
         
-    def setup_logging(self, log_location: Optional[str] = None, log_name: Optional[str] = None, script_name: str = "script") -> None:
-        if not log_location:
+        def preexec():
+            try:
+                os.sched_setaffinity(0, cpus)
+            except OSError:
+                pass
+            if limit_preexec:
+                limit_preexec()
+        return preexec
+    
+    def start(self, index: int) -> subprocess.Popen:
+        if self.background and not self.runner.logger:
+            stdout = subprocess.DEVNULL
+        else:
+            stdout = subprocess.PIPE
+        cpus = self.cpu_sets[index]
+        process = subprocess.Popen(self.cmd, env=self.replica_envs[index], stdout=stdout,
+                                   stderr=subprocess.STDOUT, text=True, bufsize=1,
+                                   start_new_session=self.background, preexec_fn=self._preexec(cpus))
+        self.runner.record_run_pid(process.pid)
+        if cpus:
+            # The child cannot log, so a failed pin is reported from here
+            try:
+                pinned = os.sched_getaffinity(process.pid) == cpus
+            except OSError:
+                pinned = True
+            if not pinned and self.runner.logger:
+                self.runner.logger.warning(f"Failed to pin replica {index} to CPUs {sorted(cpus)}")
+        self.pid_dir.mkdir(parents=True, exist_ok=True)
+        with open(self._pid_file(index), 'w') as f:
+            f.write(str(process.pid))
+        self.processes[index] = process
+        if self.runner.logger:
+            cpu_text = f" on CPUs {sorted(cpus)}" if cpus else ""
+            self.runner.logger.info(f"Replica {index} started with PID: {process.pid}{cpu_text}")
+        if process.stdout:
+            self._pumps[index] = threading.Thread(target=self._pump, args=(index, process), daemon=True)
+            self._pumps[index].start()
+        return process
+
+    def _pump(self, index: int, process: subprocess.Popen) -> None:
+        width = len(str(self.replicas - 1))
+        for line in process.stdout:
+            if not self.background:
+                with self._output_lock:
+                    print(f"[{index:>{width}}] {line}", end='', flush=True)
+            if self.runner.logger:
+                self.runner.logger.info(f"SCRIPT OUTPUT [{index}]: {line.strip()}")
+
+    def start_all(self) -> List[int]:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.replicas, 32)) as pool:
+            processes = list(pool.map(self.start, range(self.replicas)))
+        return [process.pid for process in processes]
+
+    def stop(self, index: int, timeout: float = 10) -> None:
+        process = self.processes[index]
+        if process and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        self._pid_file(index).unlink(missing_ok=True)
+
+    def stop_all(self, timeout: float = 10) -> None:
+        for process in self.processes:
+            if process and process.poll() is None:
+                process.terminate()
+        for index in range(self.replicas):
+            self.stop(index, timeout)
+
+    def running(self) -> int:
+        return sum(1 for process in self.processes if process and process.poll() is None)
+
+    def rolling_restart(self, settle: float = 1.0) -> bool:
+        """Restart one replica at a time, stopping the roll if a new replica dies while settling."""
+        for index in range(self.replicas):
+            print(f"🔁 Restarting replica {index + 1}/{self.replicas}...")
+            self.stop(index)
+            process = self.start(index)
+            deadline = time.time() + settle
+            while time.time() < deadline and process.poll() is None:
+                time.sleep(0.05)
+            if process.poll() is not None and process.returncode != 0:
+                print(f"❌ Replica {index} exited with code {process.returncode}, "
+                      f"keeping the remaining replicas on the previous version")
+                return False
+        return True
+
+    def wait(self) -> List[int]:
+        exit_codes = []
+        for index, process in enumerate(self.processes):
+            exit_codes.append(process.wait())
+            if index in self._pumps:
+                self._pumps[index].join()
+            self._pid_file(index).unlink(missing_ok=True)
+        return exit_codes
+
+
+class CacheInvalidator(FileSystemEventHandler):
+    WATCHED_EVENTS = {'created', 'deleted', 'modified', 'moved'}
+    
+    def __init__(self, daemon):
+        self.daemon = daemon
+    
+    def on_any_event(self, event):
+        if event.event_type not in self.WATCHED_EVENTS:
             return
-        log_dir = Path(log_location)
-        log_dir.mkdir(parents=True, exist_ok=True)
-        if not log_name:
-            log_name = f"Run_Logs_For_{script_name}.log"
-        self.log_file = log_dir / log_name
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(self.log_file),
-                logging.StreamHandler(sys.stdout)
-            ]
-        )
-        self.logger = logging.getLogger(__name__)
-        self.logger.info(f"PyRunner started - Log file: {self.log_file}")
+        for path in filter(None, [event.src_path, getattr(event, 'dest_path', '')]):
+            path = os.fsdecode(path)
+            self.daemon.changes.put(os.path.dirname(path))
+            if event.is_directory:
+                self.daemon.changes.put(path)
 
-    def enhanced_error_message(self, error: Exception, context: str = "") -> str:
-        error_msg = str(error)
-        suggestions = []
+
+class PyRunnerDaemon:
+    """Keeps parsed configs, interpreter discovery and validated envs warm and forks a worker per request."""
+    
+    def __init__(self, runner, socket_path: Path):
+        self.runner = runner
+        self.socket_path = socket_path
+        self.started_at = time.time()
+        self.requests_served = 0
+        self.observer = Observer()
+        self.invalidator = CacheInvalidator(self)
+        self.changes = queue.Queue()
+        self._watches = {}
+        self._invalidated_at = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._running = False
+    
+    @staticmethod
+    def control(socket_path: Path, action: str, timeout: float = 5) -> Optional[Dict]:
+        if not socket_path.exists():
+            return None
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.settimeout(timeout)
+                client.connect(str(socket_path))
+                client.sendall(json.dumps({'control': action}).encode() + b'\n')
+                buffer = b''
+                while b'\n' not in buffer:
+                    chunk = client.recv(4096)
+                    if not chunk:
+                        return None
+                    buffer += chunk
+                return json.loads(buffer.split(b'\n', 1)[0])
+        except (OSError, ValueError):
+            return None
+    
+    def serve(self) -> None:
+        if self.socket_path.exists():
+            if self.control(self.socket_path, 'status'):
+                raise PyRunnerError(f"PyRunner daemon already running on {self.socket_path}")
+            self.socket_path.unlink()
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
         
-        if "pip" in error_msg.lower() and "install" in error_msg.lower():
-            if "permission denied" in error_msg.lower():
-                suggestions.append("Try running without sudo (virtual environments don't need it)")
-                suggestions.append("Check if the environment directory has correct permissions")
+        self.runner.trust_caches = True
+        self.runner.discover_interpreters()
+        self._watch(self.runner.interpreter_dirs())
+        
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(str(self.socket_path))
+        os.chmod(self.socket_path, 0o600)
+        self._server.listen(64)
+        self.observer.start()
+        threading.Thread(target=self._process_changes, daemon=True).start()
+        self._running = True
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+        print(f"🛰️  PyRunner daemon listening on {self.socket_path} (PID: {os.getpid()})", flush=True)
+        
+        try:
+            while self._running:
+                try:
+                    conn, _ = self._server.accept()
+                except OSError:
+                    break
+                # A slow or silent client must not hold up the accept loop while its request is read
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+            self.changes.put(None)
+            self.observer.stop()
+            self.observer.join()
+            print("⏹️  PyRunner daemon stopped", flush=True)
+    
+    def stop(self) -> None:
+        self._running = False
+        if self._server:
+            try:
+                self._server.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._server.close()
+    
+    def _process_changes(self) -> None:
+        # Invalidation runs here rather than in the observer thread to keep lock order daemon -> observer
+        while True:
+            directory = self.changes.get()
+            if directory is None:
+                return
+            self.invalidate(directory)
+    
+    def invalidate(self, directory: str) -> None:
+        with self._lock:
+            if directory not in self._watches:
+                return
+            self._invalidated_at[directory] = time.time()
+            dropped = self.runner.invalidate_caches(directory)
+            try:
+                self.observer.unschedule(self._watches.pop(directory))
+            except (KeyError, ValueError, OSError):
+                pass
+        if dropped:
+            print(f"♻️  {directory} changed, dropped {dropped} cached entries", flush=True)
+    
+    def _watch(self, directories: List[str]) -> None:
+        for directory in set(directories) - set(self._watches):
+            try:
+                self._watches[directory] = self.observer.schedule(self.invalidator, directory, recursive=False)
+            except OSError:
+                continue
+    
+    def _handle(self, conn: socket.socket) -> None:
+        fds = []
+        try:
+            buffer = b''
+            conn.settimeout(10)
+            while b'\n' not in buffer:
+                data, received_fds, _, _ = socket.recv_fds(conn, 65536, 3)
+                fds += received_fds
+                if not data:
+                    raise ValueError("connection closed before a request was received")
+                buffer += data
+            conn.settimeout(None)
+            request = json.loads(buffer.split(b'\n', 1)[0])
+        except (OSError, ValueError):
+            for fd in fds:
+                os.close(fd)
+            conn.close()
+            return
+        
+        if 'control' in request or len(fds) != 3:
+            for fd in fds:
+                os.close(fd)
+            reply = self._control_reply(request.get('control'))
+            try:
+                conn.sendall(json.dumps(reply).encode() + b'\n')
+            except OSError:
+                pass
+            conn.close()
+            if reply.get('stopped'):
+                self.stop()
+            return
+        self._spawn(conn, request, fds)
+    
+    def _control_reply(self, action: Optional[str]) -> Dict:
+        if action == 'stop':
+            self._running = False
+            return {'stopped': True, 'pid': os.getpid()}
+        if action == 'status':
+            return {
+                'pid': os.getpid(),
+                'socket': str(self.socket_path),
+                'uptime_seconds': time.time() - self.started_at,
+                'requests_served': self.requests_served,
+                'cached_configs': len(self.runner._config_cache),
+                'validated_envs': len(self.runner._validated_envs),
+                'cached_env_info': len(self.runner._env_info_cache),
+                'interpreters': len(self.runner._interpreters or []),
+                'watched_dirs': len(self._watches)
+            }
+        return {'exit': 1, 'error': f"Unknown daemon request: {action}"}
+    
+    @contextlib.contextmanager
+    def _fork_locks(self):
+        """Hold the locks other threads take, so fork() never copies one of them in a locked state.
+        
+        Logging and the import lock are already handled by CPython's own fork hooks.
+        """
+        locks = [self._lock, self.runner._cache_lock]
+        for lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+    
+    def _spawn(self, conn: socket.socket, request: Dict, fds: List[int]) -> None:
+        read_fd, write_fd = os.pipe()
+        started = time.time()
+        with self._fork_locks():
+            pid = os.fork()
+            if pid != 0:
+                self.requests_served += 1
+        if pid == 0:
+            os.close(read_fd)
+            conn.close()
+            self._run_child(request, fds, write_fd)
+        os.close(write_fd)
+        for fd in fds:
+            os.close(fd)
+        threading.Thread(target=self._supervise, args=(conn, pid, read_fd, started), daemon=True).start()
+    
+    def _run_child(self, request: Dict, fds: List[int], state_fd: int) -> None:
+        code = 1
+        try:
+            os.setpgid(0, 0)
+            self._server.close()
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            for target, fd in enumerate(fds):
+                os.dup2(fd, target)
+                os.close(fd)
+            # Fresh stream objects: another thread may have been mid-print, holding the old buffers' locks
+            sys.stdin = open(0, 'r', encoding=sys.stdin.encoding, closefd=False)
+            sys.stdout = open(1, 'w', buffering=1, encoding=sys.stdout.encoding, errors=sys.stdout.errors, closefd=False)
+            sys.stderr = open(2, 'w', buffering=1, encoding=sys.stderr.encoding, errors=sys.stderr.errors, closefd=False)
+            os.chdir(request['cwd'])
+            os.environ.clear()
+            os.environ.update(request['env'])
+            # The parent's event-loop thread does not survive fork()
+            self.runner.orchestrator = AsyncOrchestrator(int(os.environ.get('PYRUNNER_MAX_CONCURRENCY', 8)))
+            self.runner.metrics = MetricsRegistry(self.runner.cache_dir)
+            code = main(request['argv'], runner=self.runner)
+        except SystemExit as e:
+            if isinstance(e.code, str):
+                print(e.code, file=sys.stderr)
+            code = e.code if isinstance(e.code, int) else int(e.code is not None)
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            try:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                with os.fdopen(state_fd, 'w') as f:
+                    json.dump(self.runner.export_cache_state(), f)
+            except BaseException:
+                pass
+            os._exit(code if isinstance(code, int) else 0)
+    
+    def _supervise(self, conn: socket.socket, pid: int, state_fd: int, started: float) -> None:
+        finished = threading.Event()
+        threading.Thread(target=self._relay_signals, args=(conn, pid, finished), daemon=True).start()
+        with os.fdopen(state_fd, 'rb') as f:
+            payload = f.read()
+        _, status = os.waitpid(pid, 0)
+        exit_code = os.waitstatus_to_exitcode(status)
+        if exit_code < 0:
+            exit_code = 128 - exit_code
+        finished.set()
+        
+        try:
+            state = json.loads(payload) if payload else {}
+        except ValueError:
+            state = {}
+        with self._lock:
+            stale_dirs = {directory for directory, changed_at in self._invalidated_at.items() if changed_at >= started}
+            self._watch(self.runner.import_cache_state(state, stale_dirs))
+        
+        try:
+            conn.sendall(json.dumps({'exit': exit_code}).encode() + b'\n')
+            conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        conn.close()
+    
+    def _relay_signals(self, conn: socket.socket, pid: int, finished: threading.Event) -> None:
+        buffer = b''
+        try:
+            while True:
+                chunk = conn.recv(1024)
+                if not chunk:
+                    break
+                buffer += chunk
+                while b'\n' in buffer:
+                    line, buffer = buffer.split(b'\n', 1)
+                    os.killpg(pid, int(json.loads(line).get('signal', signal.SIGTERM)))
+        except (OSError, ValueError):
+            pass
+        if not finished.is_set():
+            # Client went away mid-run: hang up on the worker like a closed terminal would
+            try:
+                os.killpg(pid, signal.SIGHUP)
+            except OSError:
+                pass
+
+
+class PyRunner:
+    def __init__(self):
+        self.logger = None
+        self.log_file = None
+        self.run_log = None
+        self.run_id = None
+        self._run_finished = False
+        self.cache_dir = Path.home() / '.pyrunner_cache'
+        self.cache_dir.mkdir(exist_ok=True)
+        self._digest_cache = None
+        self._interpreters = None
+        self._stdlib_cache = {}
+        self._config_cache = {}
+        # Matrix, batch and API workers share one runner, so its caches are only touched under this lock
+        self._cache_lock = threading.RLock()
+        self._validated_envs = {}
+        self._env_info_cache = {}
+        self.trust_caches = False
+        self.orchestrator = AsyncOrchestrator(int(os.environ.get('PYRUNNER_MAX_CONCURRENCY', 8)))
+        self.metrics = MetricsRegistry(self.cache_dir)
+        
+    def setup_logging(self, log_location: Optional[str] = None, log_name: Optional[str] = None, script_name: str = "script") -> None:
+        if not log_location:
+            return
+        log_dir = Path(log_location)
+        log_dir.mkdir(parents=True, exist_ok=True)
+        if not log_name:
+            log_name = f"Run_Logs_For_{script_name}.log"
+        self.run_log = RunLogStore(log_dir / Path(log_name).stem)
+        self.run_id = f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+        self._run_finished = False
+        self.log_file = self.run_log.path
+        self.run_log.record_run(self.run_id, script=script_name, started=time.time(), pyrunner_pid=os.getpid())
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(levelname)s - %(message)s',
+            handlers=[
+                RunLogHandler(self.run_log, self.run_id),
+                logging.StreamHandler(sys.stdout)
+            ]
+        )
+        self.logger = logging.getLogger(__name__)
+        self.logger.info(f"PyRunner started - Run log: {self.log_file} (run {self.run_id})")
+
+    @staticmethod
+    def live_pids(env_path: Path) -> List[int]:
+        """PIDs from the environment's background and replica PID files whose process is still running."""
+        pyrunner_dir = env_path / '.pyrunner'
+        pids = []
+        for pid_file in [pyrunner_dir / 'process.pid'] + sorted((pyrunner_dir / 'replicas').glob('*.pid')):
+            try:
+                pid = int(pid_file.read_text().strip())
+                os.kill(pid, 0)
+            except PermissionError:
+                pids.append(pid)  # alive, just owned by another user
+            except (OSError, ValueError):
+                continue
+            else:
+                pids.append(pid)
+        return pids
+
+    def record_run_pid(self, pid: int) -> None:
+        if self.run_log:
+            self.run_log.record_run(self.run_id, pids=[pid])
+
+    def finish_run(self, result: str, exit_code: Optional[int] = None) -> None:
+        """Record how the logged run ended and write out its buffered lines; only the first call per run counts."""
+        if not self.run_log or self._run_finished:
+            return
+        self._run_finished = True
+        # Daemon workers leave through os._exit(), which skips logging.shutdown()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if isinstance(handler, RunLogHandler) and handler.store is self.run_log:
+                root.removeHandler(handler)
+                handler.close()
+        fields = {'result': result}
+        if result != 'started':
+            fields.update(exit_code=exit_code, finished=time.time())
+        try:
+            self.run_log.record_run(self.run_id, **fields)
+        except OSError as e:
+            sys.stderr.write(f"⚠️  Failed to record run result in {self.run_log.path}: {e}\n")
+
+    def _parse_time_spec(self, text: str) -> float:
+        match = re.match(r'^\s*(\d+(?:\.\d+)?)\s*([smhdw])\s*$', text)
+        if match:
+            seconds = float(match.group(1)) * {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}[match.group(2)]
+            return time.time() - seconds
+        try:
+            return datetime.fromisoformat(text.strip()).timestamp()
+        except ValueError:
+            raise PyRunnerError(f"Invalid time: {text} (use e.g. 30m, 2h, 7d or 2025-08-19T14:30)")
+
+    def resolve_run_log(self, target: str, log_dir: str = './logs/') -> RunLogStore:
+        for candidate in (Path(target), Path(log_dir) / target,
+                          Path(log_dir) / f"Run_Logs_For_{Path(target).stem}"):
+            if (candidate / 'index.jsonl').exists():
+                return RunLogStore(candidate)
+        raise PyRunnerError(f"No run logs found for {target} in {log_dir} (runs are logged with --log)")
+
+    def enhanced_error_message(self, error: Exception, context: str = "") -> str:
+        error_msg = str(error)
+        suggestions = []
+        
+        if "pip" in error_msg.lower() and "install" in error_msg.lower():
+            if "permission denied" in error_msg.lower():
+                suggestions.append("Try running without sudo (virtual environments don't need it)")
+                suggestions.append("Check if the environment directory has correct permissions")
             elif "could not find" in error_msg.lower():
                 suggestions.append("Check if the package name is spelled correctly")
                 suggestions.append("Try: pip search <package_name> to find the correct name")
@@ -181,6 +1735,67 @@ class PyRunner:
         
         return None
 
+    def _load_module_index(self) -> Dict:
+        index_file = self.cache_dir / 'module_index.json'
+        if index_file.exists():
+            try:
+                with open(index_file, 'r') as f:
+                    return json.load(f)
+            except:
+                pass
+        return {'modules': {}, 'envs': {}}
+
+    def learn_module_index(self, env_paths: Optional[List[Path]] = None) -> Dict[str, str]:
+        if env_paths is None:
+            env_paths = self.environment_paths()
+        index = self._load_module_index()
+        changed = False
+        for env_path in env_paths:
+            site_dirs = self._site_packages_dirs(env_path)
+            signature = [site_dir.stat().st_mtime_ns for site_dir in site_dirs]
+            env_key = str(env_path.resolve())
+            if index['envs'].get(env_key) == signature:
+                continue
+            owners = {}
+            for dist in self._installed_distributions(env_path):
+                for module in dist['top_level']:
+                    owners.setdefault(module, set()).add(dist['name'])
+            for module, dists in owners.items():
+                if len(dists) == 1:
+                    index['modules'].setdefault(module, next(iter(dists)))
+            index['envs'][env_key] = signature
+            changed = True
+        if changed:
+            index_file = self.cache_dir / 'module_index.json'
+            tmp_file = index_file.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump(index, f, indent=2)
+            os.replace(tmp_file, index_file)
+        return index['modules']
+
+    def infer_dependencies(self, script_path: str,
+                           python_path: Optional[Path] = None) -> Tuple[List[str], List[str]]:
+        """Map a script's imports to distributions; returns (packages, import names with no known mapping).
+        
+        Unmapped names are never installed as same-named packages: on a public index that name may belong
+        to anyone, so the caller has to confirm them or list packages explicitly.
+        """
+        imports = self._collect_imports(Path(script_path)) - self._stdlib_modules(python_path)
+        learned = self.learn_module_index()
+        packages = []
+        unresolved = []
+        for module in sorted(imports):
+            package = MODULE_DISTRIBUTIONS.get(module) or learned.get(module) \
+                or (module if module.lower() in KNOWN_DISTRIBUTIONS else None)
+            if package is None:
+                unresolved.append(module)
+            elif package not in packages:
+                packages.append(package)
+        if self.logger:
+            self.logger.info(f"Inferred dependencies for {script_path}: {', '.join(packages) or 'none'}"
+                             f"{'; unresolved imports: ' + ', '.join(unresolved) if unresolved else ''}")
+        return packages, unresolved
+
     def create_quick_config(self, script_path: str, packages: List[str]) -> str:
         script_dir = Path(script_path).parent
         config_path = script_dir / "requirements.txt"
@@ -254,6 +1869,12 @@ class PyRunner:
         else:
             envs_to_check = [env.path for env in self.list_environments()]
         
+        checkable = [str(env) for env in envs_to_check if self.get_pip_path(Path(env)).exists()]
+        pip_checks = self.orchestrator.run_many(
+            [(Path(env).name, [str(self.get_pip_path(Path(env))), "check"], {'timeout': 30}) for env in checkable],
+            "Checking environments")
+        check_results = dict(zip(checkable, pip_checks))
+        
         for env_path_str in envs_to_check:
             env_path = Path(env_path_str)
             env_name = env_path.name
@@ -270,18 +1891,20 @@ class PyRunner:
             if not pip_path.exists():
                 issues["critical"].append(f"{env_name}: Pip executable missing")
             
-            try:
-                result = subprocess.run([str(pip_path), "check"], 
-                                      capture_output=True, text=True, timeout=30)
-                if result.returncode != 0 and result.stdout:
-                    issues["warnings"].append(f"{env_name}: Dependency conflicts detected")
-            except:
+            result = check_results.get(str(env_path_str))
+            if result is None or result.returncode is None:
                 issues["warnings"].append(f"{env_name}: Could not check dependencies")
+            elif result.returncode != 0 and result.stdout:
+                issues["warnings"].append(f"{env_name}: Dependency conflicts detected")
             
             env_info = self.get_environment_info(env_path)
             if env_info:
                 if env_info.size_mb > 500:
-                    issues["suggestions"].append(f"{env_name}: Large environment ({env_info.size_mb:.1f}MB) - consider cleanup")
+                    if (env_path / '.pyrunner' / 'slim.json').exists():
+                        issues["suggestions"].append(f"{env_name}: Large environment ({env_info.size_mb:.1f}MB) - consider cleanup")
+                    else:
+                        issues["suggestions"].append(f"{env_name}: Large environment ({env_info.size_mb:.1f}MB) - "
+                                                     f"consider 'pyrunner slim {env_path}'")
                 
                 days_unused = (time.time() - env_info.last_used) / (24 * 60 * 60)
                 if days_unused > 30:
@@ -368,24 +1991,308 @@ class PyRunner:
         except Exception as e:
             raise PyRunnerError(f"Failed to clone environment: {e}")
 
-    def parse_config(self, config_path: str) -> Dict:
+    def _probe_interpreter(self, python_path: Path) -> Dict:
+        result = subprocess.run([str(python_path), "-c", INTERPRETER_PROBE],
+                              capture_output=True, text=True, timeout=10)
+        if result.returncode != 0:
+            raise PyRunnerError(f"Could not inspect interpreter {python_path}: {result.stderr.strip()}")
+        return json.loads(result.stdout)
+
+    def pack_environment(self, env_path: Path, output_path: Optional[Path] = None) -> Path:
+        is_valid, issues = self.validate_environment(env_path)
+        if not is_valid:
+            raise PyRunnerError(f"Cannot pack invalid environment {env_path}: {', '.join(issues)}")
+        
+        env_path = env_path.resolve()
+        output_path = Path(output_path or f"{env_path.name}.pyrunner.tar.gz")
+        compression = {'.gz': 'gz', '.tgz': 'gz', '.xz': 'xz', '.bz2': 'bz2'}.get(output_path.suffix, 'gz')
+        bin_dir = self.get_python_path(env_path).parent
+        prefix = str(env_path).encode()
+        
+        relocate = []
+        scan_files = [env_path / 'pyvenv.cfg'] + sorted(bin_dir.iterdir())
+        for site_packages in self._site_packages_dirs(env_path):
+            scan_files += sorted(site_packages.glob('*.pth'))
+        for file_path in scan_files:
+            if file_path.is_symlink() or not file_path.is_file():
+                continue
+            with open(file_path, 'rb') as f:
+                if prefix in f.read():
+                    relocate.append(str(file_path.relative_to(env_path)))
+        
+        metadata = {}
+        metadata_file = env_path / '.pyrunner' / 'config.json'
+        if metadata_file.exists():
+            with open(metadata_file, 'r') as f:
+                metadata = json.load(f)
+        
+        manifest = {
+            'format': 1,
+            'packed_at': time.time(),
+            'env_name': env_path.name,
+            'source_path': str(env_path),
+            'config_hash': metadata.get('config_hash'),
+            'interpreter': self._probe_interpreter(self.get_python_path(env_path)),
+            'relocate': relocate
+        }
+        excluded = {Path('.pyrunner') / 'process.pid', Path('.pyrunner') / 'pack.json'}
+        replica_pids = Path('.pyrunner') / 'replicas'
+        
+        if self.logger:
+            self.logger.info(f"Packing {env_path} into {output_path} ({len(relocate)} files to relocate)")
+        tmp_output = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+        try:
+            with tarfile.open(tmp_output, f"w:{compression}") as archive:
+                manifest_bytes = json.dumps(manifest, indent=2).encode()
+                member = tarfile.TarInfo('.pyrunner/pack.json')
+                member.size = len(manifest_bytes)
+                member.mtime = int(time.time())
+                archive.addfile(member, io.BytesIO(manifest_bytes))
+                for dirpath, dirnames, filenames in os.walk(env_path):
+                    dirnames.sort()
+                    for name in sorted(dirnames + filenames):
+                        file_path = Path(dirpath) / name
+                        relative_path = file_path.relative_to(env_path)
+                        if (relative_path in excluded or replica_pids in relative_path.parents
+                                or (file_path.is_dir() and not file_path.is_symlink())):
+                            continue
+                        archive.add(str(file_path), arcname=str(relative_path), recursive=False)
+            os.replace(tmp_output, output_path)
+        except Exception as e:
+            if tmp_output.exists():
+                tmp_output.unlink()
+            raise PyRunnerError(f"Failed to pack environment: {e}")
+        return output_path
+
+    def unpack_environment(self, archive_path: Path, target_env: Optional[Path] = None) -> Path:
+        if not archive_path.exists():
+            raise PyRunnerError(f"Archive not found: {archive_path}")
+        
+        staging = None
+        try:
+            with tarfile.open(archive_path, 'r|*') as archive:
+                manifest = None
+                extracted_files = set()
+                for member in archive:
+                    member_path = Path(member.name)
+                    if member_path.is_absolute() or '..' in member_path.parts:
+                        raise PyRunnerError(f"Unsafe path in archive: {member.name}")
+                    if manifest is None:
+                        if member.name != '.pyrunner/pack.json':
+                            raise PyRunnerError("Archive is not a PyRunner pack (missing .pyrunner/pack.json)")
+                        manifest = json.load(archive.extractfile(member))
+                        target_env = (target_env or Path(manifest['env_name'])).resolve()
+                        if target_env.exists():
+                            raise PyRunnerError(f"Target environment already exists: {target_env}")
+                        staging = target_env.parent / f".{target_env.name}.unpacking-{os.getpid()}"
+                        staging.mkdir(parents=True)
+                        continue
+                    if member.issym() and (os.path.isabs(member.linkname) or '..' in Path(member.linkname).parts):
+                        continue
+                    # Hardlinks (from gc deduplication) may only point at files this archive already produced
+                    if member.islnk() and os.path.normpath(member.linkname) not in extracted_files:
+                        raise PyRunnerError(f"Hardlink outside the archive: {member.name} -> {member.linkname}")
+                    if member.isdev():
+                        raise PyRunnerError(f"Unsupported member in archive: {member.name}")
+                    archive.extract(member, staging, set_attrs=True)
+                    if member.isfile() or member.islnk():
+                        extracted_files.add(os.path.normpath(member.name))
+            if manifest is None:
+                raise PyRunnerError("Archive is empty")
+            
+            interpreter_tags = manifest['interpreter']
+            interpreter = self.find_interpreter(f"=={interpreter_tags['version']}")
+            if not interpreter or interpreter.abi_tag != interpreter_tags['abi_tag']:
+                interpreter = next((info for info in self.discover_interpreters()
+                                    if info.abi_tag == interpreter_tags['abi_tag']
+                                    and info.platform == interpreter_tags['platform']), None)
+            if not interpreter:
+                raise PyRunnerError(f"No compatible interpreter for packed environment "
+                                    f"(needs {interpreter_tags['abi_tag']} on {interpreter_tags['platform']})")
+            
+            self._relocate_environment(staging, target_env, manifest, interpreter)
+            os.replace(staging, target_env)
+            staging = None
+        except PyRunnerError:
+            raise
+        except Exception as e:
+            raise PyRunnerError(f"Failed to unpack environment: {e}")
+        finally:
+            if staging and staging.exists():
+                shutil.rmtree(staging)
+        
+        if self.logger:
+            self.logger.info(f"Unpacked {archive_path} into {target_env} using {interpreter.path}")
+        return target_env
+
+    def _relocate_environment(self, staging: Path, target_env: Path, manifest: Dict,
+                              interpreter: InterpreterInfo) -> None:
+        old_prefix = manifest['source_path'].encode()
+        new_prefix = str(target_env).encode()
+        for relative_path in manifest['relocate']:
+            file_path = staging / relative_path
+            if relative_path == 'pyvenv.cfg' or not file_path.is_file():
+                continue
+            with open(file_path, 'rb') as f:
+                content = f.read()
+            with open(file_path, 'wb') as f:
+                f.write(content.replace(old_prefix, new_prefix))
+        self._refresh_records(staging, {os.path.normpath(staging / relative_path)
+                                        for relative_path in manifest['relocate']})
+        
+        interpreter_path = Path(interpreter.path)
+        cfg_lines = []
+        with open(staging / 'pyvenv.cfg', 'r') as f:
+            for line in f:
+                key = line.split('=', 1)[0].strip()
+                if key == 'home':
+                    line = f"home = {interpreter_path.parent}\n"
+                elif key == 'executable':
+                    line = f"executable = {interpreter_path}\n"
+                elif key == 'command':
+                    line = f"command = {interpreter_path} -m venv {target_env}\n"
+                elif key == 'version':
+                    line = f"version = {interpreter.version}\n"
+                cfg_lines.append(line)
+        with open(staging / 'pyvenv.cfg', 'w') as f:
+            f.writelines(cfg_lines)
+        
+        bin_dir = self.get_python_path(staging).parent
+        major_minor = '.'.join(interpreter.version.split('.')[:2])
+        for name in ['python', 'python3', f'python{major_minor}']:
+            link_path = bin_dir / name
+            if link_path.is_symlink() or link_path.exists():
+                link_path.unlink()
+            link_path.symlink_to(interpreter_path)
+        
+        metadata_file = staging / '.pyrunner' / 'config.json'
+        metadata = {}
+        if metadata_file.exists():
+            with open(metadata_file, 'r') as f:
+                metadata = json.load(f)
+        metadata.update({
+            'interpreter': interpreter.path,
+            'interpreter_version': interpreter.version,
+            'unpacked_from': manifest['source_path'],
+            'unpacked_at': time.time(),
+            'last_used': time.time()
+        })
+        metadata.setdefault('created_at', time.time())
+        metadata.setdefault('scripts', [])
+        metadata['config_hash'] = manifest.get('config_hash')
+        with open(metadata_file, 'w') as f:
+            json.dump(metadata, f, indent=2)
+
+    def parse_config(self, config_path: str, profile: Optional[str] = None) -> Dict:
         config_file = Path(config_path)
         if not config_file.exists():
             raise PyRunnerError(f"Configuration file not found: {config_path}")
+        cache_key = f"{config_file.resolve()}|{profile or ''}"
+        with self._cache_lock:
+            cached = self._config_cache.get(cache_key)
+            if cached and self._cache_entry_valid(cached):
+                return copy.deepcopy(cached['config'])
+        
         if config_file.suffix.lower() in ['.yaml', '.yml']:
-            return self._parse_yaml_config(config_file)
+            config = self._parse_yaml_config(config_file, profile)
         elif config_file.suffix.lower() == '.txt' or config_file.name == 'requirements.txt':
-            return self._parse_requirements_txt(config_file)
+            config = self._parse_requirements_txt(config_file)
         else:
             raise PyRunnerError(f"Unsupported configuration file format: {config_file.suffix}")
+        
+        paths = [str(config_file.resolve())]
+        paths += [req_file for req_file in config.get('requirement_files', []) if req_file not in paths]
+        referenced = set()
+        for path in paths:
+            try:
+                referenced.update(re.findall(r'\$\{([A-Za-z0-9_]+)\}', Path(path).read_text()))
+            except OSError:
+                pass
+        entry = {
+            'config': copy.deepcopy(config),
+            'signature': self._path_signature(paths),
+            'env': {name: os.environ.get(name) for name in sorted(referenced)},
+            'dirs': sorted({os.path.dirname(path) for path in paths})
+        }
+        with self._cache_lock:
+            self._config_cache[cache_key] = entry
+        return config
+
+    def _path_signature(self, paths: List[str]) -> List:
+        signature = []
+        for path in paths:
+            try:
+                stat_result = os.stat(path)
+                signature.append([path, stat_result.st_mtime_ns, stat_result.st_size])
+            except OSError:
+                signature.append([path, None, None])
+        return signature
+
+    def _cache_entry_valid(self, entry: Dict, trust: Optional[bool] = None) -> bool:
+        if any(os.environ.get(name) != value for name, value in entry.get('env', {}).items()):
+            return False
+        if self.trust_caches if trust is None else trust:
+            return True
+        return entry['signature'] == self._path_signature([path for path, _, _ in entry['signature']])
+
+    def _env_cache_entry(self, env_path: Path, include_metadata: bool = False, **fields) -> Dict:
+        python_path = self.get_python_path(env_path)
+        paths = [str(env_path / 'pyvenv.cfg'), str(python_path)]
+        dirs = [str(env_path), str(python_path.parent)]
+        if include_metadata:
+            pyrunner_dir = env_path / '.pyrunner'
+            paths += [str(pyrunner_dir / 'config.json'), str(pyrunner_dir / 'requirements.lock')]
+            dirs += [str(pyrunner_dir)] + [str(site_packages) for site_packages in self._site_packages_dirs(env_path)]
+        return {'signature': self._path_signature(paths), 'dirs': dirs, **fields}
+
+    def export_cache_state(self) -> Dict:
+        return {
+            'configs': self._config_cache,
+            'validated_envs': self._validated_envs,
+            'env_info': self._env_info_cache,
+            'interpreters': [asdict(info) for info in self._interpreters] if self._interpreters is not None else None
+        }
+
+    def import_cache_state(self, state: Dict, stale_dirs: Set[str]) -> List[str]:
+        """Merge caches filled by another process; returns the directories they depend on."""
+        watch_dirs = []
+        for kind, cache in [('configs', self._config_cache), ('validated_envs', self._validated_envs),
+                            ('env_info', self._env_info_cache)]:
+            for key, entry in state.get(kind, {}).items():
+                if key in cache or stale_dirs.intersection(entry['dirs']) or not self._cache_entry_valid(entry, trust=False):
+                    continue
+                cache[key] = entry
+                watch_dirs.extend(entry['dirs'])
+        interpreters = state.get('interpreters')
+        if self._interpreters is None and interpreters is not None:
+            self._interpreters = [InterpreterInfo(**info) for info in interpreters]
+            if stale_dirs.intersection(self.interpreter_dirs()):
+                self._interpreters = None
+        return watch_dirs
+
+    def invalidate_caches(self, directory: str) -> int:
+        dropped = 0
+        for cache in (self._config_cache, self._validated_envs, self._env_info_cache):
+            for key in [key for key, entry in cache.items() if directory in entry['dirs']]:
+                del cache[key]
+                dropped += 1
+        if self._interpreters is not None and directory in self.interpreter_dirs():
+            self._interpreters = None
+            dropped += 1
+        return dropped
+
+    def interpreter_dirs(self) -> List[str]:
+        dirs = {entry for entry in os.environ.get('PATH', '').split(os.pathsep) if os.path.isdir(entry)}
+        dirs.update(os.path.dirname(info.path) for info in self._interpreters or [])
+        return sorted(dirs)
 
-    def _parse_yaml_config(self, config_file: Path) -> Dict:
+    def _parse_yaml_config(self, config_file: Path, profile: Optional[str] = None) -> Dict:
         try:
             with open(config_file, 'r') as f:
                 config = yaml.safe_load(f)
             
             profiles = config.get('profiles', {})
-            current_profile = config.get('active_profile', 'default')
+            current_profile = profile or config.get('active_profile', 'default')
             
             if current_profile in profiles:
                 profile_config = profiles[current_profile]
@@ -396,20 +2303,49 @@ class PyRunner:
                 profile_env_vars = profile_config.get('env_vars', {})
                 base_env_vars = config.get('environment_variables', {})
                 all_env_vars = {**base_env_vars, **profile_env_vars}
+                all_limits = {**(config.get('resource_limits') or {}), **(profile_config.get('resource_limits') or {})}
             else:
                 all_deps = config.get('dependencies', [])
                 all_env_vars = config.get('environment_variables', {})
+                all_limits = config.get('resource_limits') or {}
+            
+            requirements = self._new_requirement_set()
+            if config.get('requirements_file'):
+                req_file = Path(config['requirements_file'])
+                if req_file.exists():
+                    self._load_requirements_file(req_file, requirements, [])
+            for dep in requirements['dependencies']:
+                if dep not in all_deps:
+                    all_deps = all_deps + [dep]
+            
+            python_version = config.get('python_version')
+            if python_version is not None and not isinstance(python_version, str):
+                # YAML reads an unquoted 3.10 as the float 3.1, so the intended version is already lost
+                raise PyRunnerError(f"python_version must be a quoted string in {config_file}, "
+                                    f"e.g. python_version: \"{python_version}\" (got {type(python_version).__name__})")
             
             result = {
-                'python_version': config.get('python_version'),
+                'python_version': python_version,
                 'requirements_file': config.get('requirements_file'),
                 'dependencies': all_deps,
                 'dev_dependencies': config.get('dev_dependencies', []),
+                'editables': requirements['editables'],
+                'constraints': requirements['constraints'],
+                'constraint_files': requirements['constraint_files'],
+                'pip_options': requirements['pip_options'],
+                'requirement_files': requirements['requirement_files'],
                 'environment_variables': all_env_vars,
                 'config_type': 'yaml',
                 'profiles': profiles,
                 'active_profile': current_profile,
                 'hot_reload': config.get('hot_reload', False),
+                'pipeline': config.get('pipeline', False),
+                'wheelhouse': config.get('wheelhouse'),
+                'artifact_cache': config.get('artifact_cache'),
+                'fast_startup': config.get('fast_startup', False),
+                'share_env': config.get('share_env', False),
+                'slim': config.get('slim', False),
+                'resource_limits': self._parse_resource_limits(all_limits),
                 'template': config.get('template')
             }
             if self.logger:
@@ -420,26 +2356,167 @@ class PyRunner:
 
     def _parse_requirements_txt(self, config_file: Path) -> Dict:
         try:
-            with open(config_file, 'r') as f:
-                dependencies = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+            requirements = self._new_requirement_set()
+            self._load_requirements_file(config_file, requirements, [])
+            dependencies = requirements['dependencies']
             result = {
                 'python_version': None,
                 'requirements_file': str(config_file),
                 'dependencies': dependencies,
                 'dev_dependencies': [],
+                'editables': requirements['editables'],
+                'constraints': requirements['constraints'],
+                'constraint_files': requirements['constraint_files'],
+                'pip_options': requirements['pip_options'],
+                'requirement_files': requirements['requirement_files'],
                 'environment_variables': {},
                 'config_type': 'requirements',
                 'profiles': {},
                 'active_profile': 'default',
                 'hot_reload': False,
+                'pipeline': False,
+                'wheelhouse': None,
+                'artifact_cache': None,
+                'fast_startup': False,
+                'share_env': False,
+                'slim': False,
+                'resource_limits': {},
                 'template': None
             }
             if self.logger:
-                self.logger.info(f"Parsed requirements.txt: {config_file} ({len(dependencies)} packages)")
+                self.logger.info(f"Parsed requirements.txt: {config_file} ({len(dependencies)} packages, "
+                                 f"{len(requirements['requirement_files'])} files)")
             return result
+        except PyRunnerError:
+            raise
         except Exception as e:
             raise PyRunnerError(f"Error parsing requirements.txt: {e}")
 
+    def _new_requirement_set(self) -> Dict:
+        return {
+            'dependencies': [],
+            'editables': [],
+            'constraints': [],
+            'constraint_files': [],
+            'pip_options': [],
+            'requirement_files': []
+        }
+
+    def _read_requirement_lines(self, req_file: Path) -> List[Tuple[int, str]]:
+        lines = []
+        pending = ''
+        start_line = 0
+        
+        def add_line(line_no, line):
+            line = re.sub(r'(^|\s+)#.*$', '', line).strip()
+            line = re.sub(r'\$\{([A-Za-z0-9_]+)\}', lambda m: os.environ.get(m.group(1), m.group(0)), line)
+            if line:
+                lines.append((line_no, line))
+        
+        with open(req_file, 'r') as f:
+            for line_no, raw_line in enumerate(f, 1):
+                line = raw_line.rstrip('\r\n')
+                if not pending:
+                    start_line = line_no
+                if line.endswith('\\'):
+                    pending += line[:-1]
+                    continue
+                add_line(start_line, pending + line)
+                pending = ''
+        if pending:
+            add_line(start_line, pending)
+        return lines
+
+    def _split_requirement_option(self, line: str) -> Tuple[str, Optional[str]]:
+        tokens = shlex.split(line)
+        option = tokens[0]
+        value = ' '.join(tokens[1:]) if len(tokens) > 1 else None
+        if option.startswith('--') and '=' in option:
+            option, value = option.split('=', 1)
+        elif not option.startswith('--') and len(option) > 2:
+            option, value = option[:2], option[2:].lstrip('=')
+        return option, value
+
+    def _load_requirements_file(self, req_file: Path, requirements: Dict, include_stack: List[Path],
+                                constraint: bool = False) -> None:
+        req_file = req_file.resolve()
+        if req_file in include_stack:
+            chain = ' -> '.join(str(path) for path in include_stack + [req_file])
+            raise PyRunnerError(f"Circular requirements include: {chain}")
+        if str(req_file) in requirements['requirement_files']:
+            return
+        if not req_file.exists():
+            included_from = f" (included from {include_stack[-1]})" if include_stack else ""
+            raise PyRunnerError(f"Requirements file not found: {req_file}{included_from}")
+        
+        requirements['requirement_files'].append(str(req_file))
+        include_stack = include_stack + [req_file]
+        
+        for line_no, line in self._read_requirement_lines(req_file):
+            if not line.startswith('-'):
+                # Per-requirement options (--hash, --config-settings) stay attached to their requirement
+                entry = ' '.join(line.split())
+                target = requirements['constraints'] if constraint else requirements['dependencies']
+                if entry not in target:
+                    target.append(entry)
+                continue
+            
+            option, value = self._split_requirement_option(line)
+            takes_value = option in ('-r', '--requirement', '-c', '--constraint', '-e', '--editable')
+            if (takes_value or option in PIP_VALUE_OPTIONS) and not value:
+                raise PyRunnerError(f"Missing value for '{option}' in {req_file}:{line_no}")
+            
+            if option in ('-r', '--requirement'):
+                self._load_requirements_file(req_file.parent / value, requirements, include_stack, constraint)
+            elif option in ('-c', '--constraint'):
+                constraint_file = (req_file.parent / value).resolve()
+                if str(constraint_file) not in requirements['constraint_files']:
+                    requirements['constraint_files'].append(str(constraint_file))
+                self._load_requirements_file(constraint_file, requirements, include_stack, constraint=True)
+            elif option in ('-e', '--editable'):
+                if not constraint and value not in requirements['editables']:
+                    requirements['editables'].append(value)
+            elif option in PIP_VALUE_OPTIONS:
+                pip_option = [PIP_VALUE_OPTIONS[option], value]
+                options = requirements['pip_options']
+                if not any(options[i:i + 2] == pip_option for i in range(len(options) - 1)):
+                    options.extend(pip_option)
+            elif option in PIP_FLAG_OPTIONS or not value:
+                if option not in requirements['pip_options']:
+                    requirements['pip_options'].append(option)
+            else:
+                # Any other global option (--use-feature, --config-settings, ...) is pip's to interpret
+                pip_option = [f"{option}={value}"] if option.startswith('--') else [option, value]
+                options = requirements['pip_options']
+                if not any(options[i:i + len(pip_option)] == pip_option for i in range(len(options))):
+                    options.extend(pip_option)
+
+    def _requirement_name(self, requirement: str) -> str:
+        match = REQUIREMENT_NAME_RE.match(requirement)
+        name = match.group(1) if match else requirement.strip()
+        return re.sub(r'[-_.]+', '-', name).lower()
+
+    def _pip_install_args(self, config: Dict) -> List[str]:
+        pip_args = list(config.get('pip_options', []))
+        for constraint_file in config.get('constraint_files', []):
+            pip_args.extend(['-c', constraint_file])
+        return pip_args
+
+    def _hash_checked(self, config: Dict) -> bool:
+        return '--require-hashes' in config.get('pip_options', []) or any(
+            ' --hash' in dep for dep in config.get('dependencies', []) + config.get('dev_dependencies', []))
+
+    def _requirement_args(self, env_path: Path, dependencies: List[str]) -> List[str]:
+        """Turn requirements into pip arguments; ones carrying --hash and friends only work from a file."""
+        annotated = [dep for dep in dependencies if re.search(r'\s-', dep)]
+        if not annotated:
+            return list(dependencies)
+        content = '\n'.join(annotated) + '\n'
+        req_file = env_path / '.pyrunner' / f"requirements-{hashlib.sha256(content.encode()).hexdigest()[:12]}.txt"
+        req_file.parent.mkdir(parents=True, exist_ok=True)
+        req_file.write_text(content)
+        return [dep for dep in dependencies if dep not in annotated] + ['-r', str(req_file)]
+
     def generate_lock_file(self, env_path: Path, config: Dict) -> None:
         pip_path = self.get_pip_path(env_path)
         if not pip_path.exists():
@@ -477,7 +2554,7 @@ class PyRunner:
             if self.logger:
                 self.logger.warning(f"Failed to generate lock file: {e}")
 
-    def install_from_lock_file(self, env_path: Path) -> bool:
+    def install_from_lock_file(self, env_path: Path, pip_args: Optional[List[str]] = None) -> bool:
         lock_file = env_path / '.pyrunner' / 'requirements.lock'
         if not lock_file.exists():
             return False
@@ -498,7 +2575,7 @@ class PyRunner:
                 packages.append(f"{entry['name']}=={entry['version']}")
             
             if packages:
-                result = subprocess.run([str(pip_path), "install"] + packages,
+                result = subprocess.run([str(pip_path), "install"] + (pip_args or []) + packages,
                                       capture_output=True, text=True)
                 if result.returncode == 0:
                     if self.logger:
@@ -515,20 +2592,108 @@ class PyRunner:
                 self.logger.warning(f"Failed to install from lock file: {e}")
             return False
 
-    def _get_config_hash(self, config: Dict) -> str:
+    def _get_config_hash(self, config: Dict, env_path: Optional[Path] = None) -> str:
         config_for_hash = {
             'dependencies': sorted(config['dependencies']),
             'dev_dependencies': sorted(config['dev_dependencies']),
+            'editables': sorted(config.get('editables', [])),
+            'constraints': sorted(config.get('constraints', [])),
+            'pip_options': config.get('pip_options', []),
             'python_version': config['python_version'],
-            'active_profile': config.get('active_profile', 'default')
+            'active_profile': config.get('active_profile', 'default'),
+            'interpreter': self._interpreter_tags(config['python_version'], env_path)
+        }
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(json.dumps(config_for_hash, sort_keys=True).encode())
+        file_digests = sorted(self._file_digest(Path(req_file))
+                              for req_file in config.get('requirement_files', []) if Path(req_file).exists())
+        for file_digest in file_digests:
+            digest.update(file_digest.encode())
+        self._save_digest_cache()
+        return digest.hexdigest()
+
+    def _interpreter_tags(self, python_version: Optional[str] = None, env_path: Optional[Path] = None) -> Dict:
+        if python_version:
+            interpreter = self.find_interpreter(python_version)
+        else:
+            # Without python_version the environment's own interpreter decides, not the one running PyRunner
+            interpreter = self._env_interpreter(env_path) if env_path else None
+        if interpreter:
+            return {
+                'implementation': interpreter.implementation,
+                'cache_tag': interpreter.cache_tag,
+                'version': interpreter.version,
+                'platform': interpreter.platform,
+                'machine': interpreter.machine
+            }
+        return {
+            'implementation': sys.implementation.name,
+            'cache_tag': sys.implementation.cache_tag,
+            'version': platform.python_version(),
+            'platform': sysconfig.get_platform(),
+            'machine': platform.machine()
         }
-        if config['requirements_file'] and config['config_type'] == 'yaml':
-            req_file = Path(config['requirements_file'])
-            if req_file.exists():
-                with open(req_file, 'r') as f:
-                    config_for_hash['requirements_content'] = f.read()
-        config_str = json.dumps(config_for_hash, sort_keys=True)
-        return hashlib.md5(config_str.encode()).hexdigest()
+
+    def _env_interpreter(self, env_path: Path) -> Optional[InterpreterInfo]:
+        try:
+            real_path = str(self.get_python_path(env_path).resolve(strict=True))
+        except OSError:
+            return None
+        if real_path == str(Path(sys.executable).resolve()):
+            return None
+        for info in self.discover_interpreters():
+            if info.path == real_path:
+                return info
+        try:
+            return InterpreterInfo(path=real_path, signature=[],
+                                   **self._probe_interpreter(self.get_python_path(env_path)))
+        except (PyRunnerError, OSError, ValueError, TypeError, subprocess.TimeoutExpired):
+            return None
+
+    def _file_digest(self, file_path: Path) -> str:
+        with self._cache_lock:
+            return self._file_digest_locked(file_path)
+
+    def _file_digest_locked(self, file_path: Path) -> str:
+        if self._digest_cache is None:
+            self._digest_cache = {}
+            cache_file = self.cache_dir / 'file_digests.json'
+            if cache_file.exists():
+                try:
+                    with open(cache_file, 'r') as f:
+                        self._digest_cache = json.load(f)
+                except (OSError, ValueError):
+                    self._digest_cache = {}
+        
+        stat = file_path.stat()
+        signature = [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+        cache_key = str(file_path.resolve())
+        cached = self._digest_cache.get(cache_key)
+        if cached and cached['signature'] == signature:
+            return cached['digest']
+        
+        digest = hashlib.blake2b(digest_size=20)
+        for line in sorted(line for _, line in self._read_requirement_lines(file_path)):
+            digest.update(line.encode() + b'\n')
+        self._digest_cache[cache_key] = {'signature': signature, 'digest': digest.hexdigest(), 'dirty': True}
+        return digest.hexdigest()
+
+    def _save_digest_cache(self) -> None:
+        with self._cache_lock:
+            if not self._digest_cache or not any(entry.get('dirty') for entry in self._digest_cache.values()):
+                return
+            for entry in self._digest_cache.values():
+                entry.pop('dirty', None)
+            snapshot = json.dumps(self._digest_cache)
+        cache_file = self.cache_dir / 'file_digests.json'
+        tmp_file = cache_file.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        try:
+            with open(tmp_file, 'w') as f:
+                f.write(snapshot)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            if self.logger:
+                self.logger.warning(f"Failed to save file digest cache: {e}")
 
     def _get_stored_config_hash(self, env_path: Path) -> Optional[str]:
         config_file = env_path / '.pyrunner' / 'config.json'
@@ -545,7 +2710,7 @@ class PyRunner:
         if not env_path.exists():
             return True, set(config['dependencies'])
             
-        current_hash = self._get_config_hash(config)
+        current_hash = self._get_config_hash(config, env_path)
         stored_hash = self._get_stored_config_hash(env_path)
         
         if current_hash == stored_hash:
@@ -559,13 +2724,12 @@ class PyRunner:
             with open(lock_file, 'r') as f:
                 lock_data = json.load(f)
             
-            installed_packages = {entry['name'].lower(): entry['version'] 
+            installed_packages = {self._requirement_name(entry['name']): entry['version'] 
                                 for entry in lock_data['entries']}
             
             changed_deps = set()
             for dep in config['dependencies']:
-                dep_name = dep.split('>=')[0].split('==')[0].split('<')[0].strip().lower()
-                if dep_name not in installed_packages:
+                if self._requirement_name(dep) not in installed_packages:
                     changed_deps.add(dep)
             
             return len(changed_deps) > 0, changed_deps
@@ -575,11 +2739,17 @@ class PyRunner:
 
     def validate_environment(self, env_path: Path) -> Tuple[bool, List[str]]:
         issues = []
+        cache_key = str(env_path.resolve())
+        cached = self._validated_envs.get(cache_key)
+        if cached and self._cache_entry_valid(cached):
+            return True, []
         
         if not env_path.exists():
             issues.append("Environment directory does not exist")
             return False, issues
         
+        started = time.perf_counter()
+        
         python_path = self.get_python_path(env_path)
         if not python_path.exists():
             issues.append("Python executable not found")
@@ -599,10 +2769,13 @@ class PyRunner:
                 issues.append("Python executable is corrupted or non-functional")
         except:
             issues.append("Failed to test Python executable")
+        self.metrics.observe('pyrunner_validation_seconds', time.perf_counter() - started,
+                             result='passed' if not issues else 'failed')
         
         if len(issues) == 0:
             if self.logger:
                 self.logger.info("Environment validation passed")
+            self._validated_envs[cache_key] = self._env_cache_entry(env_path)
             return True, []
         else:
             if self.logger:
@@ -610,8 +2783,34 @@ class PyRunner:
             return False, issues
 
     def create_virtual_environment(self, env_path: Path, python_version: Optional[str] = None) -> None:
+        interpreter = None
+        if python_version:
+            interpreter = self.find_interpreter(python_version)
+            if not interpreter:
+                found = ', '.join(sorted({info.version for info in self.discover_interpreters()},
+                                         key=self._version_tuple)) or 'none'
+                message = f"No installed interpreter matches python_version '{python_version}' (found: {found})"
+                if env_path.exists() and self.validate_environment(env_path)[0]:
+                    if self.logger:
+                        self.logger.warning(f"{message}, keeping the existing environment's interpreter")
+                    print(f"⚠️  {message}, keeping the existing environment's interpreter")
+                    return
+                raise PyRunnerError(message)
+        
         if env_path.exists():
             is_valid, issues = self.validate_environment(env_path)
+            if is_valid and interpreter:
+                env_version = None
+                config_file = env_path / '.pyrunner' / 'config.json'
+                if config_file.exists():
+                    try:
+                        with open(config_file, 'r') as f:
+                            env_version = json.load(f).get('interpreter_version')
+                    except:
+                        env_version = None
+                if env_version and not self._version_matches(env_version, python_version):
+                    is_valid = False
+                    issues = [f"Python {env_version} does not match python_version '{python_version}'"]
             if is_valid:
                 if self.logger:
                     self.logger.info(f"Virtual environment already exists and is valid: {env_path}")
@@ -621,15 +2820,25 @@ class PyRunner:
                     self.logger.warning(f"Existing environment is corrupted, recreating: {', '.join(issues)}")
                 shutil.rmtree(env_path)
         
+        started = time.perf_counter()
         try:
             if self.logger:
                 self.logger.info(f"Creating virtual environment: {env_path}")
-            venv.create(env_path, with_pip=True)
+            current_python = Path(sys.executable).resolve()
+            if interpreter and Path(interpreter.path) != current_python:
+                if self.logger:
+                    self.logger.info(f"Using interpreter {interpreter.path} (Python {interpreter.version})")
+                subprocess.run([interpreter.path, "-m", "venv", str(env_path)],
+                             check=True, capture_output=True, text=True)
+            else:
+                venv.create(env_path, with_pip=True)
             pyrunner_dir = env_path / '.pyrunner'
             pyrunner_dir.mkdir(exist_ok=True)
             metadata = {
                 'created_at': time.time(),
                 'python_version': python_version,
+                'interpreter': interpreter.path if interpreter else str(current_python),
+                'interpreter_version': interpreter.version if interpreter else platform.python_version(),
                 'pyrunner_version': '2.0.0',
                 'config_hash': None,
                 'scripts': [],
@@ -637,11 +2846,137 @@ class PyRunner:
             }
             with open(pyrunner_dir / 'config.json', 'w') as f:
                 json.dump(metadata, f, indent=2)
+            self.metrics.observe('pyrunner_env_creation_seconds', time.perf_counter() - started)
             if self.logger:
                 self.logger.info(f"Virtual environment created successfully: {env_path}")
+        except subprocess.CalledProcessError as e:
+            raise PyRunnerError(f"Failed to create virtual environment: {e.stderr.strip() or e}")
         except Exception as e:
             raise PyRunnerError(f"Failed to create virtual environment: {e}")
 
+    def _interpreter_candidates(self) -> List[Path]:
+        search_dirs = [Path(entry) for entry in os.environ.get('PATH', '').split(os.pathsep) if entry]
+        search_dirs += [Path('/usr/bin'), Path('/usr/local/bin')]
+        pyenv_root = Path(os.environ.get('PYENV_ROOT', Path.home() / '.pyenv'))
+        for versions_dir in [pyenv_root / 'versions', Path.home() / '.asdf' / 'installs' / 'python']:
+            if versions_dir.is_dir():
+                search_dirs += sorted(version_dir / 'bin' for version_dir in versions_dir.iterdir())
+        
+        candidates = []
+        seen = set()
+        for search_dir in search_dirs:
+            if search_dir.name == 'shims' or not search_dir.is_dir():
+                continue
+            try:
+                entries = sorted(search_dir.iterdir())
+            except OSError:
+                continue
+            for entry in entries:
+                if not INTERPRETER_NAME_RE.match(entry.name):
+                    continue
+                try:
+                    real_path = entry.resolve()
+                except OSError:
+                    continue
+                if real_path in seen or not real_path.is_file() or not os.access(real_path, os.X_OK):
+                    continue
+                seen.add(real_path)
+                candidates.append(real_path)
+        return candidates
+
+    def discover_interpreters(self, refresh: bool = False) -> List[InterpreterInfo]:
+        with self._cache_lock:
+            return self._discover_interpreters_locked(refresh)
+
+    def _discover_interpreters_locked(self, refresh: bool) -> List[InterpreterInfo]:
+        if self._interpreters is not None and not refresh:
+            return self._interpreters
+        
+        cache_file = self.cache_dir / 'interpreters.json'
+        cached = {}
+        if cache_file.exists() and not refresh:
+            try:
+                with open(cache_file, 'r') as f:
+                    cached = json.load(f)
+            except:
+                cached = {}
+        
+        interpreters = []
+        to_probe = []
+        for candidate in self._interpreter_candidates():
+            stat = candidate.stat()
+            signature = [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+            entry = cached.get(str(candidate))
+            if entry and entry['signature'] == signature:
+                interpreters.append(InterpreterInfo(**entry))
+            else:
+                to_probe.append((candidate, signature))
+        
+        if to_probe:
+            results = self.orchestrator.run_many(
+                [(candidate.name, [str(candidate), "-c", INTERPRETER_PROBE], {'timeout': 10})
+                 for candidate, _ in to_probe],
+                "Probing interpreters")
+            for (candidate, signature), result in zip(to_probe, results):
+                if result.returncode != 0:
+                    continue
+                try:
+                    interpreters.append(InterpreterInfo(path=str(candidate), signature=signature,
+                                                        **json.loads(result.stdout)))
+                except (ValueError, TypeError):
+                    continue
+            try:
+                with open(cache_file, 'w') as f:
+                    json.dump({info.path: asdict(info) for info in interpreters}, f, indent=2)
+            except OSError as e:
+                if self.logger:
+                    self.logger.warning(f"Failed to save interpreter cache: {e}")
+        
+        self._interpreters = sorted(interpreters, key=lambda info: self._version_tuple(info.version), reverse=True)
+        if self.logger:
+            self.logger.info(f"Discovered {len(self._interpreters)} interpreters ({len(to_probe)} probed)")
+        return self._interpreters
+
+    def find_interpreter(self, python_version: str) -> Optional[InterpreterInfo]:
+        current_python = str(Path(sys.executable).resolve())
+        matches = [info for info in self.discover_interpreters()
+                   if self._version_matches(info.version, python_version)]
+        if not matches:
+            return None
+        best_version = self._version_tuple(matches[0].version)
+        for info in matches:
+            if info.path == current_python and self._version_tuple(info.version) == best_version:
+                return info
+        return matches[0]
+
+    def _version_tuple(self, version: str) -> Tuple[int, ...]:
+        return tuple(int(part) for part in re.findall(r'\d+', str(version))[:3])
+
+    def _version_matches(self, version: str, spec: str) -> bool:
+        version_parts = self._version_tuple(version)
+        for clause in str(spec).split(','):
+            match = re.match(r'^\s*(==|!=|>=|<=|~=|>|<)?\s*(\d+(?:\.\d+)*)(?:\.\*)?\s*$', clause)
+            if not match:
+                raise PyRunnerError(f"Invalid python_version specifier: {spec}")
+            operator = match.group(1) or '=='
+            target = self._version_tuple(match.group(2))
+            prefix = version_parts[:len(target)]
+            if operator == '==' and prefix != target:
+                return False
+            if operator == '!=' and prefix == target:
+                return False
+            if operator == '>=' and prefix < target:
+                return False
+            if operator == '<=' and prefix > target:
+                return False
+            if operator == '>' and prefix <= target:
+                return False
+            if operator == '<' and prefix >= target:
+                return False
+            if operator == '~=' and (prefix < target or version_parts[:len(target) - 1] != target[:-1]):
+                return False
+        return True
+
     def get_pip_path(self, env_path: Path) -> Path:
         if sys.platform == "win32":
             return env_path / "Scripts" / "pip.exe"
@@ -666,7 +3001,7 @@ class PyRunner:
                 'pyrunner_version': '2.0.0',
                 'scripts': []
             }
-        metadata['config_hash'] = self._get_config_hash(config)
+        metadata['config_hash'] = self._get_config_hash(config, env_path)
         metadata['last_updated'] = time.time()
         metadata['last_used'] = time.time()
         with open(config_file, 'w') as f:
@@ -687,54 +3022,482 @@ class PyRunner:
             scripts.append(script_name)
             metadata['scripts'] = scripts
         
+        script_paths = metadata.get('script_paths', [])
+        resolved_path = str(Path(script_path).resolve())
+        if resolved_path not in script_paths:
+            script_paths.append(resolved_path)
+            metadata['script_paths'] = script_paths
+        
         metadata['last_used'] = time.time()
         with open(config_file, 'w') as f:
             json.dump(metadata, f, indent=2)
 
-    def install_dependencies_parallel(self, env_path: Path, dependencies: List[str]) -> List[str]:
+    def install_dependencies_parallel(self, env_path: Path, dependencies: List[str],
+                                      pip_args: Optional[List[str]] = None) -> List[str]:
         pip_path = self.get_pip_path(env_path)
-        failed_deps = []
+        pip_args = pip_args or []
+        results = self.orchestrator.run_many(
+            [(dep, [str(pip_path), "install", "--upgrade"] + pip_args + self._requirement_args(env_path, [dep]),
+              {'timeout': 300})
+             for dep in dependencies],
+            "Installing", max_parallel=3)
+        return [dep for dep, result in zip(dependencies, results) if result.returncode != 0]
+
+    def install_requirement_set(self, env_path: Path, dependencies: List[str], config: Dict) -> List[str]:
+        pip_path = self.get_pip_path(env_path)
+        pip_args = self._pip_install_args(config)
+        editables = config.get('editables', [])
+        editable_args = []
+        for editable in editables:
+            editable_args.extend(['-e', editable])
         
-        def install_package(dep):
-            try:
-                result = subprocess.run([str(pip_path), "install", "--upgrade", dep],
-                                      capture_output=True, text=True, timeout=300)
-                if result.returncode != 0:
-                    return dep
-                return None
-            except:
-                return dep
+        if not dependencies and not editable_args:
+            return []
         
-        if len(dependencies) <= 3:
-            for dep in dependencies:
-                failed = install_package(dep)
-                if failed:
-                    failed_deps.append(failed)
-        else:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-                future_to_dep = {executor.submit(install_package, dep): dep for dep in dependencies}
-                for future in concurrent.futures.as_completed(future_to_dep):
-                    failed = future.result()
-                    if failed:
-                        failed_deps.append(failed)
+        result = self.orchestrator.run([str(pip_path), "install", "--upgrade"] + pip_args + editable_args
+                                       + self._requirement_args(env_path, dependencies), timeout=1800)
+        if result.returncode == 0:
+            return []
+        if self.logger:
+            self.logger.warning(f"Batch installation failed, retrying per package: {result.stderr.strip()}")
         
+        failed_deps = self.install_dependencies_parallel(env_path, dependencies, pip_args)
+        if editable_args and not failed_deps:
+            result = subprocess.run([str(pip_path), "install"] + pip_args + editable_args,
+                                  capture_output=True, text=True)
+            if result.returncode != 0:
+                failed_deps.extend(f"-e {editable}" for editable in editables)
         return failed_deps
 
-    def install_dependencies(self, env_path: Path, config: Dict, force_update: bool = False) -> None:
-        needs_update, changed_deps = self._needs_dependency_update(env_path, config)
-        
-        if not force_update and not needs_update:
-            if self.logger:
-                self.logger.info("Dependencies are up to date, skipping installation")
-            return
-        
+    def _resolve_install_plan(self, env_path: Path, dependencies: List[str], config: Dict,
+                              pip_args: List[str], upgrade: bool = True) -> Optional[List[Dict]]:
         pip_path = self.get_pip_path(env_path)
-        if not pip_path.exists():
-            raise PyRunnerError(f"Pip not found in virtual environment: {pip_path}")
-        
-        try:
+        editable_args = []
+        for editable in config.get('editables', []):
+            editable_args.extend(['-e', editable])
+        upgrade_args = ["--upgrade"] if upgrade else []
+        result = subprocess.run([str(pip_path), "install"] + upgrade_args + ["--dry-run", "--quiet", "--report", "-"]
+                              + pip_args + editable_args + self._requirement_args(env_path, dependencies),
+                              capture_output=True, text=True, timeout=1800)
+        if result.returncode != 0:
             if self.logger:
-                if force_update:
+                self.logger.warning(f"Dependency resolution failed: {result.stderr.strip()}")
+            return None
+        try:
+            return json.loads(result.stdout).get('install', [])
+        except ValueError:
+            return None
+
+    def _load_install_journal(self, env_path: Path) -> Optional[Dict]:
+        journal_file = env_path / '.pyrunner' / 'install_journal.json'
+        try:
+            with open(journal_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_install_journal(self, env_path: Path, journal: Dict) -> None:
+        journal_file = env_path / '.pyrunner' / 'install_journal.json'
+        tmp_file = journal_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(journal, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, journal_file)
+
+    def _distribution_complete(self, dist: Dict) -> bool:
+        site_packages = Path(dist['site_packages'])
+        records = self._read_record(Path(dist['dist_info']))
+        if not records:
+            return False
+        for relative_path, _, size in records:
+            try:
+                file_stat = os.stat(site_packages / relative_path)
+            except OSError:
+                return False
+            if size is not None and file_stat.st_size != size:
+                return False
+        return True
+
+    def _pip_stashes(self, env_path: Path) -> List[str]:
+        return sorted(str(stash) for site_packages in self._site_packages_dirs(env_path)
+                      for stash in site_packages.glob('~*'))
+
+    @contextlib.contextmanager
+    def _install_lock(self, env_path: Path):
+        """Serialize journaled installs into one environment across processes."""
+        (env_path / '.pyrunner').mkdir(parents=True, exist_ok=True)
+        with open(env_path / '.pyrunner' / 'install.lock', 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _reconcile_install_journal(self, env_path: Path, journal: Dict) -> None:
+        """Finish bookkeeping for operations that were in flight when a previous install died."""
+        in_flight = [op for op in journal['operations'] if op['state'] == 'installing']
+        if in_flight:
+            installed = {dist['key']: dist for dist in self._installed_distributions(env_path)}
+            pip_path = self.get_pip_path(env_path)
+            for op in in_flight:
+                dist = installed.get(op['key'])
+                if dist and dist['version'] == op['version'] and self._distribution_complete(dist):
+                    op['state'] = 'done'
+                    continue
+                if dist:
+                    # Roll back the partial install; --force-reinstall covers what pip cannot uninstall
+                    result = subprocess.run([str(pip_path), "uninstall", "-y", op['name']],
+                                            capture_output=True, text=True)
+                    if result.returncode != 0:
+                        shutil.rmtree(dist['dist_info'], ignore_errors=True)
+                op['state'] = 'pending'
+                op['force'] = True
+            if self.logger:
+                completed = sum(1 for op in in_flight if op['state'] == 'done')
+                self.logger.info(f"Reconciled {len(in_flight)} interrupted operations: {completed} completed, "
+                                 f"{len(in_flight) - completed} rolled back")
+        
+        # Only stashes that appeared while the interrupted pip run was going are its leftovers
+        if in_flight or journal.get('single_pass'):
+            known = set(journal.get('stashes_before', []))
+            for stash in map(Path, self._pip_stashes(env_path)):
+                if str(stash) in known:
+                    continue
+                if self.logger:
+                    self.logger.info(f"Removing leftover pip stash: {stash}")
+                if stash.is_dir():
+                    shutil.rmtree(stash, ignore_errors=True)
+                else:
+                    stash.unlink()
+        self._save_install_journal(env_path, journal)
+
+    def _plan_operations(self, plan: List[Dict]) -> List[Dict]:
+        operations = []
+        for item in plan:
+            metadata = item.get('metadata', {})
+            download_info = item.get('download_info', {})
+            if download_info.get('dir_info', {}).get('editable'):
+                continue
+            name, version = metadata['name'], metadata['version']
+            if item.get('is_direct'):
+                url = download_info['url']
+                vcs_info = download_info.get('vcs_info')
+                if vcs_info:
+                    url = f"{vcs_info['vcs']}+{url}@{vcs_info['commit_id']}"
+                requirement = f"{name} @ {url}"
+            else:
+                requirement = f"{name}=={version}"
+            operations.append({'name': name, 'key': self._requirement_name(name), 'version': version,
+                               'requirement': requirement, 'state': 'pending'})
+        return operations
+
+    def install_journaled(self, env_path: Path, dependencies: List[str], config: Dict,
+                          batch_size: int = 20) -> List[str]:
+        with self._install_lock(env_path):
+            return self._install_journaled_locked(env_path, dependencies, config, batch_size)
+
+    def _install_journaled_locked(self, env_path: Path, dependencies: List[str], config: Dict,
+                                  batch_size: int) -> List[str]:
+        pip_path = self.get_pip_path(env_path)
+        pip_args = self._pip_install_args(config)
+        config_hash = self._get_config_hash(config, env_path)
+        
+        journal = self._load_install_journal(env_path)
+        if journal is None:
+            # Nothing to resume: one pip run, with only a marker so a crash is picked up next time
+            journal = {'config_hash': config_hash, 'started_at': time.time(), 'single_pass': True,
+                       'operations': [], 'stashes_before': self._pip_stashes(env_path)}
+            self._save_install_journal(env_path, journal)
+            failed = self.install_requirement_set(env_path, dependencies, config)
+            (env_path / '.pyrunner' / 'install_journal.json').unlink()
+            return failed
+        
+        if journal.get('single_pass') and journal.get('config_hash') == config_hash:
+            # The interrupted run was a single pip invocation: check every planned package like an in-flight one
+            plan = self._resolve_install_plan(env_path, dependencies, config, pip_args)
+            if plan is not None:
+                journal['operations'] = [dict(op, state='installing') for op in self._plan_operations(plan)]
+        self._reconcile_install_journal(env_path, journal)
+        if journal.get('config_hash') != config_hash or not journal['operations']:
+            (env_path / '.pyrunner' / 'install_journal.json').unlink()
+            return self._install_journaled_locked(env_path, dependencies, config, batch_size)
+        if self.logger:
+            remaining = sum(1 for op in journal['operations'] if op['state'] != 'done')
+            self.logger.info(f"Resuming interrupted install: {remaining} of "
+                             f"{len(journal['operations'])} operations remaining")
+        journal.pop('single_pass', None)
+
+        def install(ops):
+            journal['stashes_before'] = self._pip_stashes(env_path)
+            for op in ops:
+                op['state'] = 'installing'
+            self._save_install_journal(env_path, journal)
+            force_args = ["--force-reinstall"] if any(op.get('force') for op in ops) else []
+            result = self.orchestrator.run([str(pip_path), "install", "--no-deps"] + force_args + pip_args
+                                           + [op['requirement'] for op in ops], timeout=1800)
+            for op in ops:
+                op['state'] = 'done' if result.returncode == 0 else 'pending'
+            self._save_install_journal(env_path, journal)
+            return result
+        
+        pending = [op for op in journal['operations'] if op['state'] != 'done']
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            result = install(batch)
+            if result.returncode != 0 and len(batch) > 1:
+                for op in batch:
+                    install([op])
+            if self.logger:
+                done = sum(1 for op in journal['operations'] if op['state'] == 'done')
+                self.logger.info(f"Install journal: {done}/{len(journal['operations'])} operations done")
+        
+        failed = [op['requirement'] for op in journal['operations'] if op['state'] != 'done']
+        for op in journal['operations']:
+            if op['state'] != 'done':
+                op['state'] = 'failed'
+        
+        editables = config.get('editables', [])
+        if editables and not failed:
+            editable_args = []
+            for editable in editables:
+                editable_args.extend(['-e', editable])
+            result = self.orchestrator.run([str(pip_path), "install"] + pip_args + editable_args, timeout=1800)
+            if result.returncode != 0:
+                failed.extend(f"-e {editable}" for editable in editables)
+        
+        if failed:
+            self._save_install_journal(env_path, journal)
+        else:
+            (env_path / '.pyrunner' / 'install_journal.json').unlink()
+        return failed
+
+    def _lock_constraints(self, env_path: Path, dependencies: List[str]) -> Optional[Path]:
+        """Write requirements.lock pins as a constraints file, leaving directly requested packages free."""
+        try:
+            with open(env_path / '.pyrunner' / 'requirements.lock', 'r') as f:
+                entries = json.load(f)['entries']
+        except (OSError, ValueError, KeyError):
+            return None
+        requested = {self._requirement_name(dep) for dep in dependencies}
+        pins = [f"{entry['name']}=={entry['version']}" for entry in entries
+                if self._requirement_name(entry['name']) not in requested]
+        if not pins:
+            return None
+        constraints_file = env_path / '.pyrunner' / 'lock-constraints.txt'
+        constraints_file.write_text('\n'.join(pins) + '\n')
+        return constraints_file
+
+    def install_pipelined(self, env_path: Path, dependencies: List[str], config: Dict,
+                          fetch_workers: int = 8, build_workers: Optional[int] = None,
+                          force_update: bool = False) -> List[str]:
+        pip_path = self.get_pip_path(env_path)
+        wheelhouse = Path(config.get('wheelhouse') or self.cache_dir / 'wheelhouse')
+        wheelhouse.mkdir(parents=True, exist_ok=True)
+        pip_args = self._pip_install_args(config) + ['--find-links', str(wheelhouse)]
+        build_workers = build_workers or os.cpu_count() or 2
+        started = time.time()
+        
+        lock_constraints = None if force_update else self._lock_constraints(env_path, dependencies)
+        plan = None
+        if lock_constraints:
+            plan = self._resolve_install_plan(env_path, dependencies, config, pip_args + ['-c', str(lock_constraints)],
+                                              upgrade=False)
+            if plan is None and self.logger:
+                self.logger.warning("Requirements conflict with requirements.lock, resolving without the lock")
+        if plan is None:
+            plan = self._resolve_install_plan(env_path, dependencies, config, pip_args, upgrade=force_update)
+        if plan is None:
+            if self.logger:
+                self.logger.warning("Falling back to a single pip invocation")
+            return self.install_requirement_set(env_path, dependencies, config)
+        
+        archives = [item for item in plan if 'archive_info' in item.get('download_info', {})]
+        direct_items = [item for item in plan if 'archive_info' not in item.get('download_info', {})]
+        build_queue = queue.Queue(maxsize=build_workers * 2)
+        install_queue = queue.Queue(maxsize=build_workers * 4)
+        failed = []
+        stats = {'cached': 0, 'downloaded': 0, 'built': 0, 'installed': 0}
+        stats_lock = threading.Lock()
+        
+        def record(key, item=None):
+            with stats_lock:
+                if item is not None:
+                    failed.append(item['metadata']['name'])
+                else:
+                    stats[key] += 1
+        
+        download_args = [arg for arg in config.get('pip_options', [])
+                         if arg.split('=', 1)[0] not in PIP_INSTALL_ONLY_OPTIONS]
+        
+        def fetch(item):
+            download_info = item['download_info']
+            url = download_info['url']
+            filename = urllib.parse.unquote(urllib.parse.urlparse(url).path.rsplit('/', 1)[-1])
+            target = wheelhouse / filename
+            hashes = download_info['archive_info'].get('hashes', {})
+            legacy_hash = download_info['archive_info'].get('hash', '')
+            expected = hashes.get('sha256') or (legacy_hash.split('=', 1)[1] if legacy_hash.startswith('sha256=') else None)
+            download_dir = wheelhouse / f".download-{os.getpid()}-{threading.get_ident()}"
+            try:
+                if target.exists() and (not expected or self._sha256_file(target) == expected):
+                    record('cached')
+                else:
+                    # pip downloads with the index credentials, netrc, cert and trusted-host settings it would use
+                    download_dir.mkdir(exist_ok=True)
+                    result = subprocess.run([str(pip_path), "download", "--no-deps", "--quiet", "--dest",
+                                             str(download_dir)] + download_args + [url],
+                                            capture_output=True, text=True, timeout=1800)
+                    downloaded = [path for path in download_dir.iterdir() if path.is_file()]
+                    if result.returncode != 0 or not downloaded:
+                        raise PyRunnerError(result.stderr.strip() or "pip download produced no file")
+                    if expected and self._sha256_file(downloaded[0]) != expected:
+                        raise PyRunnerError(f"Hash mismatch for {filename}")
+                    os.replace(downloaded[0], target)
+                    record('downloaded')
+                build_queue.put((item, target))
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"Failed to fetch {filename}: {e}")
+                record('failed', item)
+            finally:
+                shutil.rmtree(download_dir, ignore_errors=True)
+        
+        def build():
+            while True:
+                work = build_queue.get()
+                if work is None:
+                    return
+                item, archive = work
+                if archive.suffix == '.whl':
+                    install_queue.put((item, archive))
+                    continue
+                build_dir = wheelhouse / f".build-{os.getpid()}-{threading.get_ident()}"
+                try:
+                    build_dir.mkdir(exist_ok=True)
+                    result = subprocess.run([str(pip_path), "wheel", "--no-deps", "-w", str(build_dir)]
+                                          + pip_args + [str(archive)],
+                                          capture_output=True, text=True, timeout=3600)
+                    wheels = list(build_dir.glob('*.whl'))
+                    if result.returncode != 0 or not wheels:
+                        raise PyRunnerError(result.stderr.strip() or "no wheel produced")
+                    wheel = wheelhouse / wheels[0].name
+                    os.replace(wheels[0], wheel)
+                    record('built')
+                    install_queue.put((item, wheel))
+                except Exception as e:
+                    if self.logger:
+                        self.logger.error(f"Failed to build {archive.name}: {e}")
+                    record('failed', item)
+                finally:
+                    shutil.rmtree(build_dir, ignore_errors=True)
+        
+        def pinned(item):
+            return f"{item['metadata']['name']}=={item['metadata']['version']}"
+        
+        def install():
+            finished = False
+            while not finished:
+                batch = [install_queue.get()]
+                while True:
+                    try:
+                        batch.append(install_queue.get_nowait())
+                    except queue.Empty:
+                        break
+                finished = None in batch
+                batch = [work for work in batch if work is not None]
+                if not batch:
+                    continue
+                # This thread must keep draining until the sentinel, or builders block on a full queue
+                try:
+                    result = subprocess.run([str(pip_path), "install", "--no-deps", "--no-index", "--find-links",
+                                           str(wheelhouse)] + [pinned(item) for item, _ in batch],
+                                          capture_output=True, text=True, timeout=1800)
+                except (OSError, subprocess.SubprocessError) as e:
+                    result = subprocess.CompletedProcess([], 1, '', str(e))
+                if result.returncode == 0:
+                    with stats_lock:
+                        stats['installed'] += len(batch)
+                    continue
+                for item, wheel in batch:
+                    try:
+                        single = subprocess.run([str(pip_path), "install", "--no-deps", "--no-index", "--find-links",
+                                               str(wheelhouse), pinned(item)],
+                                              capture_output=True, text=True, timeout=1800)
+                    except (OSError, subprocess.SubprocessError) as e:
+                        single = subprocess.CompletedProcess([], 1, '', str(e))
+                    if single.returncode == 0:
+                        record('installed')
+                    else:
+                        if self.logger:
+                            self.logger.error(f"Failed to install {wheel.name}: {single.stderr.strip()}")
+                        record('failed', item)
+        
+        installer = threading.Thread(target=install, daemon=True)
+        installer.start()
+        builders = [threading.Thread(target=build, daemon=True) for _ in range(build_workers)]
+        for builder in builders:
+            builder.start()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=fetch_workers) as executor:
+            list(executor.map(fetch, archives))
+        for _ in builders:
+            build_queue.put(None)
+        for builder in builders:
+            builder.join()
+        install_queue.put(None)
+        installer.join()
+        
+        if direct_items:
+            targets = []
+            for item in direct_items:
+                download_info = item['download_info']
+                if download_info.get('dir_info', {}).get('editable'):
+                    targets.extend(['-e', download_info['url']])
+                elif 'vcs_info' in download_info:
+                    vcs_info = download_info['vcs_info']
+                    targets.append(f"{vcs_info['vcs']}+{download_info['url']}@{vcs_info['commit_id']}")
+                else:
+                    targets.append(download_info['url'])
+            result = subprocess.run([str(pip_path), "install", "--no-deps"] + pip_args + targets,
+                                  capture_output=True, text=True, timeout=1800)
+            if result.returncode == 0:
+                stats['installed'] += len(direct_items)
+            else:
+                if self.logger:
+                    self.logger.error(f"Failed to install direct requirements: {result.stderr.strip()}")
+                failed.extend(item['metadata']['name'] for item in direct_items)
+        
+        if self.logger:
+            self.logger.info(f"Pipelined install finished in {time.time() - started:.1f}s: "
+                             f"{stats['cached']} cached, {stats['downloaded']} downloaded, "
+                             f"{stats['built']} built, {stats['installed']} installed, {len(failed)} failed")
+        return failed
+
+    def _sha256_file(self, file_path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def install_dependencies(self, env_path: Path, config: Dict, force_update: bool = False) -> None:
+        needs_update, changed_deps = self._needs_dependency_update(env_path, config)
+        
+        if not force_update and not needs_update:
+            self.metrics.inc('pyrunner_cache_requests_total', cache='dependencies', result='hit')
+            if self.logger:
+                self.logger.info("Dependencies are up to date, skipping installation")
+            if config.get('slim') and not (env_path / '.pyrunner' / 'slim.json').exists():
+                self.slim_environment(env_path, config['slim'])
+            return
+        
+        pip_path = self.get_pip_path(env_path)
+        if not pip_path.exists():
+            raise PyRunnerError(f"Pip not found in virtual environment: {pip_path}")
+        
+        self.metrics.inc('pyrunner_cache_requests_total', cache='dependencies', result='miss')
+        started = time.perf_counter()
+        try:
+            if self.logger:
+                if force_update:
                     self.logger.info("Force updating all dependencies...")
                 else:
                     self.logger.info(f"Updating {len(changed_deps)} changed dependencies...")
@@ -742,49 +3505,447 @@ class PyRunner:
             subprocess.run([str(pip_path), "install", "--upgrade", "pip"], 
                          check=True, capture_output=True, text=True)
             
-            if not force_update and self.install_from_lock_file(env_path):
+            pip_args = self._pip_install_args(config)
+            # Hashes only survive a direct install of the requirement lines that carry them
+            hash_checked = self._hash_checked(config)
+            pipelined = config.get('pipeline') and not hash_checked
+            if pipelined:
+                deps_to_install = config['dependencies'] + [dep for dep in config['dev_dependencies']
+                                                            if dep not in config['dependencies']]
+            elif not force_update and not hash_checked and self.install_from_lock_file(env_path, pip_args):
                 deps_to_install = list(changed_deps) if changed_deps else []
             else:
                 deps_to_install = config['dependencies'].copy()
             
-            if config['requirements_file'] and config['config_type'] == 'yaml':
-                req_file = Path(config['requirements_file'])
-                if req_file.exists():
-                    if self.logger:
-                        self.logger.info(f"Installing from requirements file: {req_file}")
-                    subprocess.run([str(pip_path), "install", "-r", str(req_file)], 
-                                 check=True, capture_output=True, text=True)
-            
-            if deps_to_install:
+            if deps_to_install or config.get('editables'):
                 if self.logger:
-                    self.logger.info(f"Installing {len(deps_to_install)} dependencies in parallel...")
+                    self.logger.info(f"Installing {len(deps_to_install)} dependencies "
+                                     f"and {len(config.get('editables', []))} editables...")
                 
-                failed_deps = self.install_dependencies_parallel(env_path, deps_to_install)
+                if hash_checked:
+                    failed_deps = self.install_requirement_set(env_path, deps_to_install, config)
+                elif pipelined:
+                    failed_deps = self.install_pipelined(env_path, deps_to_install, config,
+                                                         force_update=force_update)
+                else:
+                    failed_deps = self.install_journaled(env_path, deps_to_install, config)
                 
                 if failed_deps:
+                    self.metrics.inc('pyrunner_install_failures_total', stage='dependencies')
                     error_msg = f"Failed to install dependencies: {', '.join(failed_deps)}"
                     enhanced_error = self.enhanced_error_message(Exception(error_msg), str(env_path))
                     raise PyRunnerError(enhanced_error)
             
-            if config['dev_dependencies']:
+            if config['dev_dependencies'] and not pipelined:
                 if self.logger:
                     self.logger.info(f"Installing {len(config['dev_dependencies'])} dev dependencies...")
                 
-                failed_dev_deps = self.install_dependencies_parallel(env_path, config['dev_dependencies'])
+                failed_dev_deps = self.install_dependencies_parallel(env_path, config['dev_dependencies'], pip_args)
                 
                 if failed_dev_deps and self.logger:
                     self.logger.warning(f"Failed to install dev dependencies: {', '.join(failed_dev_deps)}")
             
-            self.generate_lock_file(env_path, config)
-            self._update_config_hash(env_path, config)
+            self._record_install(env_path, config)
+            self.metrics.observe('pyrunner_install_seconds', time.perf_counter() - started, kind='full')
             
             if self.logger:
                 self.logger.info("Dependencies installation/update completed")
                 
         except subprocess.CalledProcessError as e:
+            self.metrics.inc('pyrunner_install_failures_total', stage='pip')
             enhanced_error = self.enhanced_error_message(e, str(env_path))
             raise PyRunnerError(enhanced_error)
 
+    def _record_install(self, env_path: Path, config: Dict) -> None:
+        self.generate_lock_file(env_path, config)
+        if config.get('slim'):
+            self.slim_environment(env_path, config['slim'])
+        self._update_config_hash(env_path, config)
+        self._index_environment(env_path, config)
+        self.learn_module_index([env_path])
+        if config.get('fast_startup') or (env_path / '.pyrunner' / 'startup.json').exists():
+            self.build_startup_bootstrap(env_path)
+
+    def diff_config(self, old: Dict, new: Dict) -> ConfigDiff:
+        diff = ConfigDiff()
+        old_env, new_env = old.get('environment_variables') or {}, new.get('environment_variables') or {}
+        diff.env_added = {key: value for key, value in new_env.items() if key not in old_env}
+        diff.env_removed = sorted(key for key in old_env if key not in new_env)
+        diff.env_changed = {key: value for key, value in new_env.items() if key in old_env and old_env[key] != value}
+        
+        def requirements(config):
+            return config.get('dependencies', []) + [dep for dep in config.get('dev_dependencies', [])
+                                                      if dep not in config.get('dependencies', [])]
+        old_deps, new_deps = requirements(old), requirements(new)
+        diff.deps_added = [dep for dep in new_deps if dep not in old_deps]
+        diff.deps_removed = [dep for dep in old_deps if dep not in new_deps]
+        old_editables, new_editables = old.get('editables', []), new.get('editables', [])
+        diff.editables_added = [editable for editable in new_editables if editable not in old_editables]
+        diff.editables_removed = [editable for editable in old_editables if editable not in new_editables]
+        
+        # Keys that are recomputed from the ones above or only describe where the config came from
+        derived = {'environment_variables', 'dependencies', 'dev_dependencies', 'editables',
+                   'profiles', 'requirement_files', 'config_type'}
+        diff.other = sorted(key for key in set(old) | set(new) if key not in derived and old.get(key) != new.get(key))
+        return diff
+
+    def install_config_changes(self, env_path: Path, config: Dict, diff: ConfigDiff,
+                               shared_env: bool = False) -> List[str]:
+        """Install only the requirements a config edit added; removed ones stay until pruned."""
+        pip_path = self.get_pip_path(env_path)
+        if not pip_path.exists():
+            raise PyRunnerError(f"Pip not found in virtual environment: {pip_path}")
+        if self.logger:
+            self.logger.info(f"Installing {len(diff.deps_added)} added dependencies and "
+                             f"{len(diff.editables_added)} added editables: {', '.join(diff.deps_added)}")
+        started = time.perf_counter()
+        if shared_env:
+            return self._install_shared_config_changes(env_path, config, diff, started)
+        failed = self.install_requirement_set(env_path, diff.deps_added,
+                                              dict(config, editables=diff.editables_added))
+        if failed:
+            self.metrics.inc('pyrunner_install_failures_total', stage='config_change')
+            return failed
+        self._record_install(env_path, config)
+        self.metrics.observe('pyrunner_install_seconds', time.perf_counter() - started, kind='incremental')
+        return []
+
+    def _install_shared_config_changes(self, env_path: Path, config: Dict, diff: ConfigDiff,
+                                       started: float) -> List[str]:
+        # Other scripts run in a shared environment, so an edit may only add packages, never move locked ones
+        if diff.editables_added:
+            raise PyRunnerError(f"Editable installs are not added to shared environment {env_path}; "
+                                f"restart PyRunner to move this script to a dedicated environment")
+        pip_args = self._pip_install_args(config)
+        plan = self._resolve_install_plan(env_path, diff.deps_added, config, pip_args, upgrade=False)
+        if plan is None:
+            return diff.deps_added
+        moved = self._locked_packages_moved(env_path, plan)
+        if moved:
+            raise PyRunnerError(f"Adding {', '.join(diff.deps_added)} would change {', '.join(moved)} in shared "
+                                f"environment {env_path}; restart PyRunner to move to a compatible environment")
+        if plan and not self._extend_shared_environment(env_path, plan, config, pip_args):
+            self.metrics.inc('pyrunner_install_failures_total', stage='config_change')
+            return diff.deps_added
+        self.metrics.observe('pyrunner_install_seconds', time.perf_counter() - started, kind='incremental')
+        return []
+
+    def provision_environment(self, env_path: Path, config: Dict, force_update: bool = False) -> str:
+        cache_dir = config.get('artifact_cache') or os.environ.get('PYRUNNER_ARTIFACT_CACHE')
+        if not cache_dir or force_update:
+            self.create_virtual_environment(env_path, config['python_version'])
+            self.install_dependencies(env_path, config, force_update)
+            return 'built'
+        
+        # One hash for both: it names the artifact and is what an up-to-date environment has stored
+        config_hash = self._get_config_hash(config, env_path)
+        if env_path.exists() and self._get_stored_config_hash(env_path) == config_hash \
+                and self.validate_environment(env_path)[0]:
+            if self.logger:
+                self.logger.info("Dependencies are up to date, skipping installation")
+            return 'up_to_date'
+        
+        cache_dir = Path(cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tags = self._interpreter_tags(config['python_version'], env_path)
+        cache_key = re.sub(r'[^A-Za-z0-9._-]', '_', f"{config_hash}-{tags['cache_tag']}-{tags['platform']}")
+        artifact = cache_dir / f"{cache_key}.tar.gz"
+        lock_path = cache_dir / f"{cache_key}.lock"
+        deadline = time.time() + 3600
+        
+        while True:
+            if artifact.exists():
+                self.metrics.inc('pyrunner_cache_requests_total', cache='artifact', result='hit')
+                if self.logger:
+                    self.logger.info(f"Artifact cache hit: {artifact}")
+                self._replace_from_artifact(env_path, artifact)
+                # The artifact carries the publisher's hash, which names its interpreter patch version
+                self._update_config_hash(env_path, config)
+                return 'cache_hit'
+            
+            if self._acquire_artifact_lock(lock_path):
+                break
+            if time.time() > deadline:
+                if self.logger:
+                    self.logger.warning(f"Timed out waiting for {lock_path}, building without publishing")
+                self.create_virtual_environment(env_path, config['python_version'])
+                self.install_dependencies(env_path, config)
+                return 'built'
+            if self.logger:
+                self.logger.info(f"Waiting for another host to publish {artifact.name}...")
+            time.sleep(5)
+        
+        stop_heartbeat = threading.Event()
+        
+        def heartbeat():
+            while not stop_heartbeat.wait(60):
+                try:
+                    os.utime(lock_path)
+                except OSError:
+                    return
+        
+        threading.Thread(target=heartbeat, daemon=True).start()
+        try:
+            self.metrics.inc('pyrunner_cache_requests_total', cache='artifact', result='miss')
+            if self.logger:
+                self.logger.info(f"Artifact cache miss: building {artifact.name}")
+            self.create_virtual_environment(env_path, config['python_version'])
+            self.install_dependencies(env_path, config)
+            tmp_artifact = cache_dir / f".{cache_key}.{platform.node()}.{os.getpid()}.tar.gz"
+            try:
+                self.pack_environment(env_path, tmp_artifact)
+                os.replace(tmp_artifact, artifact)
+                if self.logger:
+                    self.logger.info(f"Published environment artifact: {artifact}")
+            except (PyRunnerError, OSError) as e:
+                if tmp_artifact.exists():
+                    tmp_artifact.unlink()
+                if self.logger:
+                    self.logger.warning(f"Failed to publish environment artifact: {e}")
+            return 'built'
+        finally:
+            stop_heartbeat.set()
+            self._release_artifact_lock(lock_path)
+
+    def _replace_from_artifact(self, env_path: Path, artifact: Path) -> None:
+        """Unpack an artifact over env_path, keeping the old environment until the new one is in place."""
+        if not env_path.exists():
+            self.unpack_environment(artifact, env_path)
+            return
+        if not (env_path / '.pyrunner' / 'config.json').exists():
+            raise PyRunnerError(f"Refusing to replace {env_path}: it is not a PyRunner environment")
+        previous = env_path.parent / f".{env_path.name}.replaced-{os.getpid()}"
+        os.replace(env_path, previous)
+        try:
+            self.unpack_environment(artifact, env_path)
+        except BaseException:
+            if env_path.exists():
+                shutil.rmtree(env_path, ignore_errors=True)
+            os.replace(previous, env_path)
+            raise
+        shutil.rmtree(previous, ignore_errors=True)
+
+    def _load_env_index(self) -> Dict:
+        try:
+            with open(self.cache_dir / 'env_index.json', 'r') as f:
+                index = json.load(f)
+            if isinstance(index.get('envs'), dict):
+                return index
+        except (OSError, ValueError):
+            pass
+        return {'envs': {}, 'packages': {}}
+
+    def _save_env_index(self, index: Dict) -> None:
+        index_file = self.cache_dir / 'env_index.json'
+        tmp_file = index_file.with_name(f".env_index.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp_file, 'w') as f:
+                json.dump(index, f)
+            os.replace(tmp_file, index_file)
+        except OSError as e:
+            if self.logger:
+                self.logger.warning(f"Failed to save environment index: {e}")
+
+    def _refresh_env_index(self, index: Dict) -> bool:
+        changed = False
+        for env_key in list(index['envs']):
+            entry = index['envs'][env_key]
+            lock_file = Path(env_key) / '.pyrunner' / 'requirements.lock'
+            signature = self._path_signature([str(lock_file), str(Path(env_key) / 'pyvenv.cfg')])
+            if not lock_file.exists():
+                del index['envs'][env_key]
+                changed = True
+                continue
+            if entry.get('signature') == signature:
+                continue
+            try:
+                with open(lock_file, 'r') as f:
+                    lock_data = json.load(f)
+                python_version = None
+                with open(Path(env_key) / 'pyvenv.cfg', 'r') as f:
+                    for line in f:
+                        key, _, value = line.partition('=')
+                        if key.strip() in ('version', 'version_info'):
+                            python_version = value.strip()
+            except (OSError, ValueError):
+                del index['envs'][env_key]
+                changed = True
+                continue
+            entry['packages'] = {self._requirement_name(lock_entry['name']): lock_entry['version']
+                                 for lock_entry in lock_data.get('entries', [])}
+            entry['python'] = python_version
+            entry['signature'] = signature
+            changed = True
+        if changed:
+            packages = {}
+            for env_key, entry in index['envs'].items():
+                for name in entry.get('packages', {}):
+                    packages.setdefault(name, []).append(env_key)
+            index['packages'] = packages
+        return changed
+
+    def _index_environment(self, env_path: Path, config: Dict) -> None:
+        index = self._load_env_index()
+        env_key = str(env_path.resolve())
+        # Only environments provisioned in share mode may serve other scripts; a private env never opts in later
+        shared = bool(index['envs'].get(env_key, {}).get('shared') or config.get('share_env'))
+        index['envs'][env_key] = {
+            'pip_options': config.get('pip_options', []),
+            'shared': shared,
+            'shareable': shared and not config.get('editables')
+        }
+        self._refresh_env_index(index)
+        self._save_env_index(index)
+
+    def find_shared_environments(self, config: Dict) -> List[Tuple[Path, List[str]]]:
+        """Indexed environments that could serve this config, best first, with the requirement names they lack."""
+        index = self._load_env_index()
+        if self._refresh_env_index(index):
+            self._save_env_index(index)
+        
+        requirements = config['dependencies'] + [dep for dep in config['dev_dependencies']
+                                                 if dep not in config['dependencies']]
+        names = {self._requirement_name(dep) for dep in requirements}
+        pins = {}
+        for dep in requirements:
+            match = re.match(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*==\s*([^\s,;*]+)\s*$', dep)
+            if match:
+                pins[self._requirement_name(match.group(1))] = match.group(2)
+        
+        if names:
+            coverage = {}
+            for name in names:
+                for env_key in index['packages'].get(name, []):
+                    coverage[env_key] = coverage.get(env_key, 0) + 1
+        else:
+            coverage = {env_key: 0 for env_key in index['envs']}
+        
+        candidates = []
+        for env_key, covered in coverage.items():
+            entry = index['envs'][env_key]
+            if not (entry.get('shared') and entry.get('shareable')) \
+                    or entry.get('pip_options', []) != config.get('pip_options', []):
+                continue
+            if config['python_version'] and not (entry.get('python')
+                                                 and self._version_matches(entry['python'], config['python_version'])):
+                continue
+            if any(name in entry['packages'] and entry['packages'][name] != version for name, version in pins.items()):
+                continue
+            missing = sorted(names - set(entry['packages']))
+            candidates.append((len(missing), len(entry['packages']), env_key, missing))
+        candidates.sort()
+        return [(Path(env_key), missing) for _, _, env_key, missing in candidates]
+
+    def _locked_packages_moved(self, env_path: Path, plan: List[Dict], index: Optional[Dict] = None) -> List[str]:
+        """Packages the plan would reinstall although the environment's other scripts were locked against them."""
+        if index is None:
+            index = self._load_env_index()
+        locked = index['envs'].get(str(env_path.resolve()), {}).get('packages', {})
+        return sorted({item['metadata']['name'] for item in plan
+                       if self._requirement_name(item['metadata']['name']) in locked})
+
+    def _extend_shared_environment(self, env_path: Path, plan: List[Dict], config: Dict, pip_args: List[str]) -> bool:
+        lock_path = env_path / '.pyrunner' / 'share.lock'
+        if not self._acquire_artifact_lock(lock_path):
+            return False
+        try:
+            operations = self._plan_operations(plan)
+            if self.logger:
+                self.logger.info(f"Extending shared environment {env_path} with {len(operations)} packages: "
+                                 f"{', '.join(op['requirement'] for op in operations)}")
+            result = self.orchestrator.run([str(self.get_pip_path(env_path)), "install", "--no-deps"] + pip_args
+                                           + [op['requirement'] for op in operations], timeout=1800)
+            if result.returncode != 0:
+                if self.logger:
+                    self.logger.warning(f"Failed to extend {env_path}: {result.stderr.strip()}")
+                return False
+            self.generate_lock_file(env_path, config)
+            index = self._load_env_index()
+            self._refresh_env_index(index)
+            self._save_env_index(index)
+            self.learn_module_index([env_path])
+            return True
+        finally:
+            self._release_artifact_lock(lock_path)
+
+    def provision_shared_environment(self, config: Dict, max_candidates: int = 8) -> Tuple[Path, str]:
+        requirements = config['dependencies'] + [dep for dep in config['dev_dependencies']
+                                                 if dep not in config['dependencies']]
+        pip_args = self._pip_install_args(config)
+        if config.get('editables'):
+            if self.logger:
+                self.logger.info("Configs with editable installs are not shared, building a dedicated environment")
+            candidates = []
+        else:
+            candidates = self.find_shared_environments(config)[:max_candidates]
+        
+        index = self._load_env_index()
+        for env_path, missing in candidates:
+            if not self.validate_environment(env_path)[0]:
+                continue
+            plan = self._resolve_install_plan(env_path, requirements, config, pip_args, upgrade=False)
+            if plan is None:
+                continue
+            if not plan:
+                if self.logger:
+                    self.logger.info(f"Reusing shared environment {env_path}: all {len(requirements)} "
+                                     f"requirements satisfied by its locked versions")
+                self.metrics.inc('pyrunner_cache_requests_total', cache='shared_env', result='hit')
+                return env_path, 'shared'
+            
+            if self._locked_packages_moved(env_path, plan, index):
+                continue
+            if self._extend_shared_environment(env_path, plan, config, pip_args):
+                self.metrics.inc('pyrunner_cache_requests_total', cache='shared_env', result='extended')
+                return env_path, 'extended'
+        
+        env_path = self.cache_dir / 'shared' / f"env-{self._get_config_hash(config)[:12]}"
+        env_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.logger:
+            self.logger.info(f"No compatible shared environment, provisioning {env_path}")
+        self.metrics.inc('pyrunner_cache_requests_total', cache='shared_env', result='miss')
+        return env_path, self.provision_environment(env_path, dict(config, share_env=True))
+
+    def _acquire_artifact_lock(self, lock_path: Path, stale_after: int = 600) -> bool:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            try:
+                if time.time() - lock_path.stat().st_mtime > stale_after:
+                    self._break_stale_lock(lock_path, stale_after)
+            except OSError:
+                pass
+            return False
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'host': platform.node(), 'pid': os.getpid(), 'created_at': time.time()}, f)
+        return True
+
+    def _break_stale_lock(self, lock_path: Path, stale_after: int) -> None:
+        # Renaming is atomic, so of several hosts breaking the same lock only one moves it away
+        broken = lock_path.with_name(f"{lock_path.name}.stale-{platform.node()}-{os.getpid()}")
+        os.rename(lock_path, broken)
+        try:
+            if time.time() - broken.stat().st_mtime <= stale_after:
+                # Another host broke it first and this moved its fresh lock; put it back unless retaken
+                try:
+                    os.link(broken, lock_path)
+                except FileExistsError:
+                    pass
+            elif self.logger:
+                self.logger.warning(f"Removed stale artifact lock: {lock_path}")
+        finally:
+            broken.unlink()
+
+    def _release_artifact_lock(self, lock_path: Path) -> None:
+        try:
+            with open(lock_path, 'r') as f:
+                owner = json.load(f)
+            if owner.get('host') == platform.node() and owner.get('pid') == os.getpid():
+                lock_path.unlink()
+        except (OSError, ValueError):
+            pass
+
     def get_environment_info(self, env_path: Path) -> Optional[EnvironmentInfo]:
         if not env_path.exists():
             return None
@@ -792,6 +3953,10 @@ class PyRunner:
         config_file = env_path / '.pyrunner' / 'config.json'
         if not config_file.exists():
             return None
+        cache_key = str(env_path.resolve())
+        cached = self._env_info_cache.get(cache_key)
+        if cached and self.trust_caches:
+            return EnvironmentInfo(**cached['info'])
         
         try:
             with open(config_file, 'r') as f:
@@ -816,78 +3981,1420 @@ class PyRunner:
                     lock_data = json.load(f)
                     dep_count = len(lock_data.get('entries', []))
             
-            return EnvironmentInfo(
+            info = EnvironmentInfo(
                 name=env_path.name,
                 path=str(env_path),
                 created_at=metadata.get('created_at', time.time()),
                 last_used=metadata.get('last_used', time.time()),
                 scripts=metadata.get('scripts', []),
                 size_mb=get_folder_size(env_path),
-                python_version=metadata.get('python_version', 'unknown'),
+                python_version=metadata.get('interpreter_version') or metadata.get('python_version') or 'unknown',
                 dependency_count=dep_count
             )
+            if self.trust_caches:
+                self._env_info_cache[cache_key] = self._env_cache_entry(env_path, include_metadata=True, info=asdict(info))
+            return info
         except:
             return None
 
-    def list_environments(self) -> List[EnvironmentInfo]:
-        environments = []
-        current_dir = Path.cwd()
+    def environment_paths(self) -> List[Path]:
+        """Environments in the working directory plus every indexed one, such as shared envs under the cache."""
+        paths = [item for item in Path.cwd().iterdir() if item.is_dir() and (item / '.pyrunner').exists()]
+        seen = {item.resolve() for item in paths}
+        index = self._load_env_index()
+        if self._refresh_env_index(index):
+            self._save_env_index(index)
+        for env_key in sorted(index['envs']):
+            env_path = Path(env_key)
+            if env_path not in seen and (env_path / '.pyrunner').is_dir():
+                seen.add(env_path)
+                paths.append(env_path)
+        return paths
+
+    def find_environment(self, name: str) -> Path:
+        """Resolve an environment argument: a path if it exists, otherwise the name of a known environment."""
+        env_path = Path(name)
+        if env_path.exists() or os.sep in name:
+            return env_path
+        matches = [path for path in self.environment_paths() if path.name == name]
+        return matches[0] if len(matches) == 1 else env_path
+
+    def list_environments(self) -> List[EnvironmentInfo]:
+        environments = []
+        for item in self.environment_paths():
+            env_info = self.get_environment_info(item)
+            if env_info:
+                environments.append(env_info)
+        
+        return sorted(environments, key=lambda x: x.last_used, reverse=True)
+
+    def cleanup_unused_environments(self, days_threshold: int = 30) -> List[str]:
+        threshold_time = time.time() - (days_threshold * 24 * 60 * 60)
+        cleaned = []
+        
+        for env_info in self.list_environments():
+            if env_info.last_used < threshold_time:
+                try:
+                    env_path = Path(env_info.path)
+                    shutil.rmtree(env_path)
+                    cleaned.append(env_info.name)
+                    if self.logger:
+                        self.logger.info(f"Cleaned up unused environment: {env_info.name}")
+                except Exception as e:
+                    if self.logger:
+                        self.logger.error(f"Failed to cleanup {env_info.name}: {e}")
+        
+        return cleaned
+
+    def _site_packages_dirs(self, env_path: Path) -> List[Path]:
+        if sys.platform == "win32":
+            candidates = [env_path / "Lib" / "site-packages"]
+        else:
+            candidates = sorted((env_path / "lib").glob("python*/site-packages"))
+        return [candidate for candidate in candidates if candidate.is_dir()]
+
+    def _read_record(self, dist_info: Path) -> List[Tuple[str, Optional[str], Optional[int]]]:
+        record_file = dist_info / 'RECORD'
+        if not record_file.exists():
+            return []
+        entries = []
+        with open(record_file, 'r', newline='') as f:
+            for row in csv.reader(f):
+                if not row or not row[0]:
+                    continue
+                file_hash = row[1] if len(row) > 1 and row[1] else None
+                size = int(row[2]) if len(row) > 2 and row[2].isdigit() else None
+                entries.append((row[0], file_hash, size))
+        return entries
+
+    def _file_matches_record_hash(self, file_path: Path, record_hash: str) -> bool:
+        algorithm, _, encoded = record_hash.partition('=')
+        try:
+            digest = hashlib.new(algorithm)
+        except ValueError:
+            return False
+        with open(file_path, 'rb') as f:
+            # hashlib releases the GIL on large buffers, so mapped files hash in parallel across threads
+            if os.fstat(f.fileno()).st_size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    digest.update(mapped)
+        return base64.urlsafe_b64encode(digest.digest()).rstrip(b'=').decode() == encoded
+
+    def _record_hash(self, file_path: Path) -> Tuple[str, int]:
+        with open(file_path, 'rb') as f:
+            content = f.read()
+        encoded = base64.urlsafe_b64encode(hashlib.sha256(content).digest()).rstrip(b'=').decode()
+        return f"sha256={encoded}", len(content)
+
+    def _refresh_records(self, env_path: Path, changed_paths: Set[str],
+                         replacements: Optional[Dict[str, str]] = None) -> int:
+        """Rewrite RECORD rows for files PyRunner changed, removed or replaced after install."""
+        replacements = replacements or {}
+        updated = 0
+        for site_packages in self._site_packages_dirs(env_path):
+            for record_file in site_packages.glob('*.dist-info/RECORD'):
+                with open(record_file, 'r', newline='') as f:
+                    rows = list(csv.reader(f))
+                new_rows = []
+                for row in rows:
+                    file_path = os.path.normpath(site_packages / row[0]) if row and row[0] else None
+                    if file_path not in changed_paths:
+                        new_rows.append(row)
+                        continue
+                    updated += 1
+                    if file_path in replacements:
+                        record_hash, size = self._record_hash(Path(replacements[file_path]))
+                        relative_path = os.path.relpath(replacements[file_path], site_packages).replace(os.sep, '/')
+                        new_rows.append([relative_path, record_hash, str(size)])
+                    elif os.path.exists(file_path):
+                        record_hash, size = self._record_hash(Path(file_path))
+                        new_rows.append([row[0], record_hash, str(size)])
+                if new_rows != rows:
+                    with open(record_file, 'w', newline='') as f:
+                        csv.writer(f, lineterminator='\n').writerows(new_rows)
+        return updated
+
+    def _slim_rules(self, value) -> Dict:
+        rules = {'tests': True, 'docs': True, 'bytecode_only': False, 'strip': False, 'keep': [], 'remove': []}
+        if value is True:
+            return rules
+        if not isinstance(value, dict):
+            raise PyRunnerError("'slim' must be true or a mapping of slimming rules")
+        unknown = set(value) - set(rules)
+        if unknown:
+            raise PyRunnerError(f"Unknown slim rules: {', '.join(sorted(unknown))} "
+                                f"(supported: {', '.join(sorted(rules))})")
+        rules.update(value)
+        return rules
+
+    def slim_environment(self, env_path: Path, rules=True, dry_run: bool = False) -> SlimReport:
+        rules = self._slim_rules(rules)
+        report = SlimReport(env_path=str(env_path), dry_run=dry_run)
+        remove_dirs = set()
+        if rules['tests']:
+            remove_dirs |= {'tests', 'test'}
+        if rules['docs']:
+            remove_dirs |= {'docs', 'doc', 'examples'}
+        tooling = {'pip', 'setuptools', 'pkg_resources', 'wheel', '_distutils_hack'}
+        
+        def kept(relative_path):
+            return any(fnmatch.fnmatch(relative_path, pattern) for pattern in rules['keep'])
+        
+        changed_paths = set()
+        replacements = {}
+        for site_packages in self._site_packages_dirs(env_path):
+            doomed = []
+            for top in sorted(site_packages.iterdir()):
+                if not top.is_dir() or top.is_symlink() or top.name.endswith(('.dist-info', '.egg-info')):
+                    continue
+                # Only directories nested inside a package: a top-level `test` package is real code
+                for dirpath, dirnames, _ in os.walk(top):
+                    for dirname in list(dirnames):
+                        candidate = Path(dirpath) / dirname
+                        if dirname in remove_dirs and not kept(str(candidate.relative_to(site_packages))):
+                            doomed.append(candidate)
+                            dirnames.remove(dirname)
+            for pattern in rules['remove']:
+                doomed.extend(path for path in site_packages.glob(pattern)
+                              if not path.name.endswith('.dist-info') and path not in doomed)
+            
+            for target in doomed:
+                files = [target] if not target.is_dir() else [
+                    Path(dirpath) / name for dirpath, _, filenames in os.walk(target) for name in filenames]
+                for file_path in files:
+                    try:
+                        report.bytes_removed += file_path.lstat().st_size
+                    except OSError:
+                        continue
+                    report.files_removed += 1
+                    changed_paths.add(os.path.normpath(file_path))
+                if not dry_run:
+                    if target.is_dir() and not target.is_symlink():
+                        shutil.rmtree(target, ignore_errors=True)
+                    else:
+                        target.unlink(missing_ok=True)
+            
+            if rules['bytecode_only']:
+                sources = [file_path for file_path in site_packages.rglob('*.py')
+                           if file_path.relative_to(site_packages).parts[0] not in tooling
+                           and not kept(str(file_path.relative_to(site_packages)))]
+                if not dry_run and sources:
+                    # Legacy .pyc next to each source (-b) is importable once the .py is gone
+                    excluded = '|'.join(re.escape(f"{os.sep}{name}{os.sep}") for name in tooling)
+                    self.orchestrator.run([str(self.get_python_path(env_path)), "-m", "compileall", "-b", "-q",
+                                           "-j", "0", "-x", excluded, str(site_packages)], timeout=1800)
+                for source in sources:
+                    compiled = source.with_suffix('.pyc')
+                    if dry_run or compiled.exists():
+                        report.sources_replaced += 1
+                        report.bytes_replaced += source.stat().st_size
+                        if not dry_run:
+                            source.unlink()
+                            replacements[os.path.normpath(source)] = os.path.normpath(compiled)
+                for cache_dir in list(site_packages.rglob('__pycache__')):
+                    if cache_dir.relative_to(site_packages).parts[0] in tooling:
+                        continue
+                    for file_path in cache_dir.iterdir():
+                        report.bytes_replaced += file_path.stat().st_size
+                        changed_paths.add(os.path.normpath(file_path))
+                    if not dry_run:
+                        shutil.rmtree(cache_dir, ignore_errors=True)
+            
+            if rules['strip']:
+                strip_tool = shutil.which('strip')
+                libraries = [file_path for file_path in site_packages.rglob('*.so*')
+                             if file_path.is_file() and not file_path.is_symlink()
+                             and not kept(str(file_path.relative_to(site_packages)))]
+                if not strip_tool:
+                    if self.logger:
+                        self.logger.warning("strip not found, skipping debug symbol removal")
+                    libraries = []
+                
+                def strip(library):
+                    with open(library, 'rb') as f:
+                        if f.read(4) != b'\x7fELF':
+                            return 0
+                    if dry_run:
+                        return -1
+                    tmp_path = library.with_name(f".{library.name}.{os.getpid()}.strip")
+                    # --strip-debug keeps the symbol tables that dynamic loading and ctypes rely on
+                    result = subprocess.run([strip_tool, "--strip-debug", "-o", str(tmp_path), str(library)],
+                                            capture_output=True, text=True)
+                    if result.returncode != 0 or tmp_path.stat().st_size >= library.stat().st_size:
+                        tmp_path.unlink(missing_ok=True)
+                        return 0
+                    saved = library.stat().st_size - tmp_path.stat().st_size
+                    shutil.copymode(library, tmp_path)
+                    os.replace(tmp_path, library)
+                    return saved
+                
+                with concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+                    for library, saved in zip(libraries, pool.map(strip, libraries)):
+                        if saved:
+                            report.libraries_stripped += 1
+                            report.bytes_stripped += max(saved, 0)
+                            changed_paths.add(os.path.normpath(library))
+        
+        if dry_run:
+            return report
+        report.records_updated = self._refresh_records(env_path, changed_paths | set(replacements), replacements)
+        slim_file = env_path / '.pyrunner' / 'slim.json'
+        with open(slim_file, 'w') as f:
+            json.dump({'slimmed_at': time.time(), 'rules': rules, **asdict(report)}, f, indent=2)
+        self._env_info_cache.pop(str(env_path.resolve()), None)
+        if self.logger:
+            self.logger.info(f"Slimmed {env_path}: removed {report.files_removed} files, replaced "
+                             f"{report.sources_replaced} sources with bytecode, stripped "
+                             f"{report.libraries_stripped} libraries, saved {report.bytes_saved / (1024 * 1024):.1f}MB")
+        return report
+
+    def verify_environment_files(self, env_path: Path, changed_only: bool = False,
+                                 workers: Optional[int] = None) -> VerificationReport:
+        started = time.time()
+        state_file = env_path / '.pyrunner' / 'verify_state.json'
+        previous = {}
+        if changed_only and state_file.exists():
+            try:
+                with open(state_file, 'r') as f:
+                    previous = json.load(f)
+            except (OSError, ValueError):
+                previous = {}
+        
+        distributions = {}
+        problems = []
+        unverifiable = []
+        pending = []
+        state = {}
+        skipped = 0
+        for dist in self._installed_distributions(env_path):
+            site_packages = Path(dist['site_packages'])
+            records = self._read_record(Path(dist['dist_info']))
+            if not records:
+                unverifiable.append(dist['name'])
+                continue
+            distributions[dist['name']] = dist
+            for relative_path, record_hash, record_size in records:
+                if not record_hash:
+                    skipped += 1
+                    continue
+                file_path = os.path.normpath(site_packages / relative_path)
+                try:
+                    file_stat = os.stat(file_path)
+                except FileNotFoundError:
+                    problems.append({'distribution': dist['name'], 'path': file_path, 'issue': 'missing'})
+                    continue
+                except OSError as e:
+                    problems.append({'distribution': dist['name'], 'path': file_path, 'issue': f'unreadable: {e}'})
+                    continue
+                signature = [file_stat.st_mtime_ns, file_stat.st_size]
+                if record_size is not None and file_stat.st_size != record_size:
+                    issue = 'truncated' if file_stat.st_size < record_size else 'size mismatch'
+                    problems.append({'distribution': dist['name'], 'path': file_path, 'issue': issue})
+                elif changed_only and previous.get(file_path) == signature:
+                    state[file_path] = signature
+                    skipped += 1
+                else:
+                    pending.append((dist['name'], file_path, record_hash, signature))
+
+        def check(item):
+            _, file_path, record_hash, _ = item
+            try:
+                return 'ok' if self._file_matches_record_hash(Path(file_path), record_hash) else 'modified'
+            except (OSError, ValueError) as e:
+                return f'unreadable: {e}'
+        
+        bytes_hashed = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) * 2)) as pool:
+            for (name, file_path, _, signature), outcome in zip(pending, pool.map(check, pending)):
+                bytes_hashed += signature[1]
+                if outcome == 'ok':
+                    state[file_path] = signature
+                else:
+                    problems.append({'distribution': name, 'path': file_path, 'issue': outcome})
+        
+        try:
+            with open(state_file, 'w') as f:
+                json.dump(state, f)
+        except OSError as e:
+            if self.logger:
+                self.logger.warning(f"Failed to save verify state: {e}")
+        
+        repairable, unrepairable = {}, {}
+        for name in sorted({problem['distribution'] for problem in problems}):
+            dist = distributions[name]
+            direct_url = {}
+            direct_url_file = Path(dist['dist_info']) / 'direct_url.json'
+            if direct_url_file.exists():
+                try:
+                    with open(direct_url_file, 'r') as f:
+                        direct_url = json.load(f)
+                except (OSError, ValueError):
+                    direct_url = {}
+            if direct_url.get('dir_info', {}).get('editable'):
+                unrepairable[name] = 'editable install, reinstall from its source tree'
+            elif direct_url.get('url'):
+                repairable[name] = f"{name} @ {direct_url['url']}"
+            elif dist['version']:
+                repairable[name] = f"{name}=={dist['version']}"
+            else:
+                unrepairable[name] = 'installed version unknown'
+        
+        if self.logger:
+            self.logger.info(f"Deep verify of {env_path}: {len(pending)} files hashed, "
+                             f"{len(problems)} problems in {len(repairable) + len(unrepairable)} distributions")
+        return VerificationReport(
+            env_path=str(env_path),
+            files_checked=len(pending),
+            files_skipped=skipped,
+            bytes_hashed=bytes_hashed,
+            duration_seconds=time.time() - started,
+            problems=problems,
+            repairable=repairable,
+            unrepairable=unrepairable,
+            unverifiable=unverifiable
+        )
+
+    def repair_distributions(self, env_path: Path, requirements: List[str]) -> None:
+        if not requirements:
+            return
+        pip_path = self.get_pip_path(env_path)
+        if self.logger:
+            self.logger.info(f"Reinstalling {len(requirements)} damaged distributions: {', '.join(requirements)}")
+        try:
+            subprocess.run([str(pip_path), "install", "--force-reinstall", "--no-deps"] + requirements,
+                           capture_output=True, text=True, check=True)
+        except subprocess.CalledProcessError as e:
+            raise PyRunnerError(f"Failed to reinstall {', '.join(requirements)}: {e.stderr.strip()}")
+        self._validated_envs.pop(str(env_path.resolve()), None)
+
+    def _installed_distributions(self, env_path: Path) -> List[Dict]:
+        distributions = []
+        for site_packages in self._site_packages_dirs(env_path):
+            for dist_info in sorted(site_packages.glob('*.dist-info')):
+                name, version, requires = None, None, []
+                metadata_file = dist_info / 'METADATA'
+                if metadata_file.exists():
+                    with open(metadata_file, 'r', encoding='utf-8', errors='replace') as f:
+                        for line in f:
+                            if not line.strip():
+                                break
+                            key, _, value = line.partition(':')
+                            if key == 'Name':
+                                name = value.strip()
+                            elif key == 'Version':
+                                version = value.strip()
+                            elif key == 'Requires-Dist' and 'extra ==' not in value:
+                                requires.append(self._requirement_name(value))
+                if not name:
+                    name = dist_info.name[:-len('.dist-info')].rsplit('-', 1)[0]
+                
+                records = self._read_record(dist_info)
+                top_level = set()
+                top_level_file = dist_info / 'top_level.txt'
+                if top_level_file.exists():
+                    with open(top_level_file, 'r') as f:
+                        top_level = {line.strip().replace('/', '.').split('.')[0] for line in f if line.strip()}
+                else:
+                    for relative_path, _, _ in records:
+                        first = Path(relative_path).parts[0]
+                        if first in ('..', '__pycache__') or first.endswith(('.dist-info', '.data', '.pth')):
+                            continue
+                        top_level.add(first[:-3] if first.endswith('.py') else first.split('.')[0])
+                
+                size = sum(record_size or 0 for _, _, record_size in records)
+                distributions.append({
+                    'name': name,
+                    'key': self._requirement_name(name),
+                    'version': version,
+                    'dist_info': str(dist_info),
+                    'site_packages': str(site_packages),
+                    'top_level': sorted(top_level),
+                    'requires': requires,
+                    'size_bytes': size
+                })
+        return distributions
+
+    def _stdlib_modules(self, python_path: Optional[Path] = None) -> Set[str]:
+        """Standard library module names of the interpreter at python_path (default: this one)."""
+        if python_path is None or not Path(python_path).exists() \
+                or os.path.realpath(python_path) == os.path.realpath(sys.executable):
+            if hasattr(sys, 'stdlib_module_names'):
+                return set(sys.stdlib_module_names)
+            modules = set(sys.builtin_module_names)
+            stdlib_dir = Path(sysconfig.get_paths()['stdlib'])
+            for entry in stdlib_dir.iterdir():
+                if entry.name == 'site-packages':
+                    continue
+                modules.add(entry.name[:-3] if entry.suffix == '.py' else entry.name.split('.')[0])
+            return modules
+        with self._cache_lock:
+            return set(self._stdlib_modules_locked(Path(os.path.realpath(python_path))))
+
+    def _stdlib_modules_locked(self, interpreter: Path) -> List[str]:
+        stat = interpreter.stat()
+        signature = [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+        entry = self._stdlib_cache.get(str(interpreter))
+        if entry and entry['signature'] == signature:
+            return entry['modules']
+        
+        cache_file = self.cache_dir / 'stdlib_modules.json'
+        try:
+            with open(cache_file, 'r') as f:
+                self._stdlib_cache.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+        entry = self._stdlib_cache.get(str(interpreter))
+        if entry and entry['signature'] == signature:
+            return entry['modules']
+        
+        try:
+            result = subprocess.run([str(interpreter), "-I", "-c", STDLIB_PROBE],
+                                  capture_output=True, text=True, timeout=10)
+            modules = json.loads(result.stdout) if result.returncode == 0 else None
+        except (OSError, ValueError, subprocess.SubprocessError):
+            modules = None
+        if modules is None:
+            if self.logger:
+                self.logger.warning(f"Could not list stdlib modules of {interpreter}, using this interpreter's")
+            return sorted(self._stdlib_modules())
+        self._stdlib_cache[str(interpreter)] = {'signature': signature, 'modules': modules}
+        tmp_file = cache_file.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(self._stdlib_cache, f)
+        os.replace(tmp_file, cache_file)
+        return modules
+
+    def _collect_imports(self, script_path: Path, visited: Optional[Set[Path]] = None) -> Set[str]:
+        visited = visited if visited is not None else set()
+        script_path = script_path.resolve()
+        if script_path in visited or not script_path.exists():
+            return set()
+        visited.add(script_path)
+        
+        try:
+            with open(script_path, 'r', encoding='utf-8', errors='replace') as f:
+                tree = ast.parse(f.read(), filename=str(script_path))
+        except SyntaxError as e:
+            if self.logger:
+                self.logger.warning(f"Could not parse {script_path}: {e}")
+            return set()
+        
+        names = set()
+        for node in self._runtime_import_nodes(tree):
+            if isinstance(node, ast.Import):
+                names.update(alias.name.split('.')[0] for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                if node.level == 0 and node.module:
+                    names.add(node.module.split('.')[0])
+            elif isinstance(node, ast.Call) and node.args and isinstance(node.args[0], ast.Constant) \
+                    and isinstance(node.args[0].value, str):
+                func = node.func
+                func_name = func.attr if isinstance(func, ast.Attribute) else getattr(func, 'id', None)
+                if func_name in ('import_module', '__import__'):
+                    names.add(node.args[0].value.split('.')[0])
+        
+        imports = set()
+        base_dir = script_path.parent
+        for name in names:
+            local_module = base_dir / f"{name}.py"
+            local_package = base_dir / name
+            if local_module.exists():
+                imports |= self._collect_imports(local_module, visited)
+            elif (local_package / '__init__.py').exists():
+                for module_file in sorted(local_package.rglob('*.py')):
+                    imports |= self._collect_imports(module_file, visited)
+            else:
+                imports.add(name)
+        return imports
+
+    def _runtime_import_nodes(self, tree: ast.AST):
+        """Like ast.walk, but skipping imports guarded by an ImportError handler or `if TYPE_CHECKING:`."""
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            yield node
+            if isinstance(node, ast.If) and self._is_type_checking(node.test):
+                children = list(node.orelse)
+            elif self._catches_import_error(node):
+                children = list(node.handlers) + list(node.finalbody)
+            else:
+                children = list(ast.iter_child_nodes(node))
+            stack.extend(reversed(children))
+
+    def _is_type_checking(self, test: ast.AST) -> bool:
+        return (isinstance(test, ast.Name) and test.id == 'TYPE_CHECKING') or \
+            (isinstance(test, ast.Attribute) and test.attr == 'TYPE_CHECKING')
+
+    def _catches_import_error(self, node: ast.AST) -> bool:
+        if not isinstance(node, (ast.Try, getattr(ast, 'TryStar', ast.Try))):
+            return False
+        for handler in node.handlers:
+            if handler.type is None:
+                return True
+            types = handler.type.elts if isinstance(handler.type, ast.Tuple) else [handler.type]
+            for exc_type in types:
+                name = exc_type.attr if isinstance(exc_type, ast.Attribute) else getattr(exc_type, 'id', None)
+                if name in ('ImportError', 'ModuleNotFoundError'):
+                    return True
+        return False
+
+    def analyze_dependencies(self, env_path: Path, keep: Optional[List[str]] = None) -> DependencyAnalysis:
+        config_file = env_path / '.pyrunner' / 'config.json'
+        if not config_file.exists():
+            raise PyRunnerError(f"Environment not found or invalid: {env_path}")
+        with open(config_file, 'r') as f:
+            metadata = json.load(f)
+        
+        scripts = [Path(path) for path in metadata.get('script_paths', [])]
+        known = {path.name for path in scripts}
+        scripts += [Path(name) for name in metadata.get('scripts', []) if name not in known]
+        scripts = [script for script in scripts if script.exists()]
+        if not scripts:
+            raise PyRunnerError(f"No recorded scripts found for {env_path.name}; run a script in it first")
+        
+        visited = set()
+        imports = set()
+        for script in scripts:
+            imports |= self._collect_imports(script, visited)
+        imports -= self._stdlib_modules(self.get_python_path(env_path))
+        
+        distributions = {dist['key']: dist for dist in self._installed_distributions(env_path)}
+        module_owners = {}
+        for dist in distributions.values():
+            for module in dist['top_level']:
+                module_owners.setdefault(module, set()).add(dist['key'])
+        
+        needed = {self._requirement_name(name) for name in ['pip', 'setuptools', 'wheel'] + (keep or [])}
+        unresolved = []
+        for module in sorted(imports):
+            owners = module_owners.get(module)
+            if owners:
+                needed |= owners
+            else:
+                unresolved.append(module)
+        
+        pending = list(needed)
+        while pending:
+            dist = distributions.get(pending.pop())
+            if not dist:
+                continue
+            for requirement in dist['requires']:
+                if requirement not in needed:
+                    needed.add(requirement)
+                    pending.append(requirement)
+        
+        unused = [{'name': dist['name'], 'version': dist['version'], 'size_bytes': dist['size_bytes']}
+                  for key, dist in sorted(distributions.items()) if key not in needed]
+        return DependencyAnalysis(
+            env_path=str(env_path),
+            scripts=[str(script) for script in scripts],
+            imported_modules=sorted(imports),
+            unresolved_imports=unresolved,
+            needed=sorted(distributions[key]['name'] for key in needed if key in distributions),
+            unused=unused
+        )
+
+    def prune_unused_packages(self, env_path: Path, analysis: DependencyAnalysis) -> List[str]:
+        if not analysis.unused:
+            return []
+        pip_path = self.get_pip_path(env_path)
+        names = [package['name'] for package in analysis.unused]
+        result = self.orchestrator.run([str(pip_path), "uninstall", "-y"] + names, timeout=600)
+        if result.returncode != 0:
+            raise PyRunnerError(self.enhanced_error_message(Exception(result.stderr.strip()), f"pruning {env_path}"))
+        
+        metadata = {}
+        config_file = env_path / '.pyrunner' / 'config.json'
+        if config_file.exists():
+            with open(config_file, 'r') as f:
+                metadata = json.load(f)
+        self.generate_lock_file(env_path, {'python_version': metadata.get('python_version')})
+        if self.logger:
+            self.logger.info(f"Pruned {len(names)} unused packages from {env_path}: {', '.join(names)}")
+        return names
+
+    def _parse_size(self, size_text: str) -> int:
+        match = re.match(r'^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*$', str(size_text), re.IGNORECASE)
+        if not match:
+            raise PyRunnerError(f"Invalid size: {size_text} (use e.g. 500M, 20G)")
+        multiplier = 1024 ** ' KMGT'.index(match.group(2).upper() or ' ')
+        return int(float(match.group(1)) * multiplier)
+
+    def deduplicate_environments(self, env_paths: List[Path], report: GarbageCollectionReport,
+                                 min_size: int = 1024, dry_run: bool = False) -> None:
+        store_dir = self.cache_dir / 'store'
+        planned_store_paths = set()
+        if not dry_run:
+            store_dir.mkdir(parents=True, exist_ok=True)
+        store_device = (store_dir if store_dir.exists() else self.cache_dir).stat().st_dev
+        
+        for env_path in env_paths:
+            report.envs_scanned += 1
+            try:
+                cross_device = env_path.stat().st_dev != store_device
+            except OSError:
+                continue
+            if cross_device:
+                # Hardlinks cannot cross filesystems; say so once instead of failing on every file
+                if self.logger:
+                    self.logger.warning(f"Skipping deduplication of {env_path}: not on the same filesystem "
+                                        f"as {store_dir}")
+                continue
+            for site_packages in self._site_packages_dirs(env_path):
+                for dist_info in sorted(site_packages.glob('*.dist-info')):
+                    for relative_path, record_hash, size in self._read_record(dist_info):
+                        if not record_hash or (size is not None and size < min_size):
+                            continue
+                        file_path = site_packages / relative_path
+                        algorithm, _, encoded = record_hash.partition('=')
+                        hex_digest = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)).hex()
+                        store_path = store_dir / algorithm / hex_digest[:2] / hex_digest
+                        try:
+                            file_stat = file_path.lstat()
+                            if not stat.S_ISREG(file_stat.st_mode) or file_stat.st_size < min_size:
+                                continue
+                            if store_path in planned_store_paths:
+                                if not self._file_matches_record_hash(file_path, record_hash):
+                                    continue
+                                report.files_linked += 1
+                                report.bytes_deduplicated += file_stat.st_size
+                            elif store_path.exists():
+                                store_stat = store_path.stat()
+                                if (store_stat.st_dev, store_stat.st_ino) == (file_stat.st_dev, file_stat.st_ino):
+                                    continue
+                                if store_stat.st_size != file_stat.st_size or \
+                                        not self._file_matches_record_hash(file_path, record_hash):
+                                    continue
+                                if not dry_run:
+                                    tmp_path = file_path.with_name(f".{file_path.name}.pyrunner-link")
+                                    os.link(store_path, tmp_path)
+                                    os.replace(tmp_path, file_path)
+                                report.files_linked += 1
+                                if file_stat.st_nlink == 1:
+                                    report.bytes_deduplicated += file_stat.st_size
+                            elif dry_run:
+                                if self._file_matches_record_hash(file_path, record_hash):
+                                    planned_store_paths.add(store_path)
+                            else:
+                                if not self._file_matches_record_hash(file_path, record_hash):
+                                    continue
+                                store_path.parent.mkdir(parents=True, exist_ok=True)
+                                os.link(file_path, store_path)
+                        except OSError as e:
+                            if e.errno == errno.EXDEV:
+                                cross_device = True
+                                break
+                            if self.logger:
+                                self.logger.warning(f"Could not deduplicate {file_path}: {e}")
+                    if cross_device:
+                        break
+                if cross_device:
+                    if self.logger:
+                        self.logger.warning(f"Skipping deduplication of {env_path}: {site_packages} is not on the "
+                                            f"same filesystem as {store_dir}")
+                    break
+            if self.logger and not cross_device:
+                self.logger.info(f"Deduplicated environment: {env_path}")
+
+    def prune_package_store(self, report: GarbageCollectionReport, dry_run: bool = False) -> None:
+        store_dir = self.cache_dir / 'store'
+        if not store_dir.exists():
+            return
+        for store_path in store_dir.glob('*/*/*'):
+            try:
+                store_stat = store_path.stat()
+                if store_stat.st_nlink > 1:
+                    continue
+                if not dry_run:
+                    store_path.unlink()
+                report.store_entries_pruned += 1
+                report.bytes_pruned += store_stat.st_size
+            except OSError:
+                continue
+
+    def enforce_disk_budget(self, environments: List[EnvironmentInfo], budget_bytes: int,
+                            report: GarbageCollectionReport, dry_run: bool = False) -> None:
+        inode_sizes = {}
+        inode_owners = {}
+        env_inodes = {}
+        index = self._load_env_index()
+        for env_info in environments:
+            inodes = set()
+            for dirpath, dirnames, filenames in os.walk(env_info.path):
+                for filename in filenames:
+                    try:
+                        file_stat = os.lstat(os.path.join(dirpath, filename))
+                    except OSError:
+                        continue
+                    key = (file_stat.st_dev, file_stat.st_ino)
+                    inode_sizes[key] = file_stat.st_size
+                    inode_owners.setdefault(key, set()).add(env_info.path)
+                    inodes.add(key)
+            env_inodes[env_info.path] = inodes
+        
+        def shared(env_info):
+            return bool(index['envs'].get(str(Path(env_info.path).resolve()), {}).get('shared'))
+        
+        usage = sum(inode_sizes.values())
+        # Shared environments serve several scripts, so they go only after every private one
+        for env_info in sorted(environments, key=lambda env: (shared(env), env.last_used)):
+            if usage <= budget_bytes:
+                break
+            pids = self.live_pids(Path(env_info.path))
+            if pids:
+                if self.logger:
+                    self.logger.info(f"Not evicting {env_info.name}: in use by PIDs {', '.join(map(str, pids))}")
+                continue
+            freed = sum(inode_sizes[key] for key in env_inodes[env_info.path] if inode_owners[key] == {env_info.path})
+            if not dry_run:
+                try:
+                    shutil.rmtree(env_info.path)
+                except OSError as e:
+                    if self.logger:
+                        self.logger.error(f"Failed to evict {env_info.name}: {e}")
+                    continue
+            for key in env_inodes[env_info.path]:
+                inode_owners[key].discard(env_info.path)
+            usage -= freed
+            report.evicted_envs.append(env_info.name)
+            report.bytes_evicted += freed
+            if self.logger:
+                self.logger.info(f"Evicted environment {env_info.name} ({freed / (1024 * 1024):.1f}MB)")
+        report.usage_bytes = usage
+
+    def garbage_collect(self, budget: Optional[str] = None, dedupe: bool = True,
+                        dry_run: bool = False) -> GarbageCollectionReport:
+        report = GarbageCollectionReport(evicted_envs=[])
+        environments = self.list_environments()
+        if dedupe:
+            self.deduplicate_environments([Path(env.path) for env in environments], report, dry_run=dry_run)
+        self.prune_package_store(report, dry_run)
+        if budget is not None:
+            self.enforce_disk_budget(environments, self._parse_size(budget), report, dry_run)
+            self.prune_package_store(GarbageCollectionReport(evicted_envs=[]), dry_run)
+        return report
+
+    def run_script_with_watch(self, script_path: str, env_path: Path, config_path: str,
+                             extra_args: List[str] = None, env_vars: Dict = None, replicas: int = 1,
+                             replica_env: Optional[Dict[str, str]] = None, pin_cpus: bool = True,
+                             profile: Optional[str] = None, resource_limits: Optional[Dict] = None,
+                             shared_env: bool = False) -> None:
+        print(f"🔍 Starting file watcher for: {script_path}")
+        print("💡 Press Ctrl+C to stop watching")
+        limits = resource_limits or {}
+        self._warn_unenforced_timeout(limits, "--watch")
+        
+        replica_set = None
+        if replicas != 1:
+            cmd = [str(self.get_python_path(env_path)), str(script_path)] + list(extra_args or [])
+            env = os.environ.copy()
+            env.update(env_vars or {})
+            replica_set = ReplicaSet(self, self._limit_command(cmd, limits), env, env_path, replicas, replica_env,
+                                     pin_cpus, preexec_fn=self._limit_preexec(limits))
+        file_watcher = FileWatcher(self, script_path, env_path, extra_args, env_vars, config_path, replica_set,
+                                   profile, limits, shared_env)
+        
+        observer = Observer()
+        script_dir = Path(script_path).parent
+        observer.schedule(file_watcher, str(script_dir), recursive=False)
+        
+        observer.start()
+        
+        try:
+            file_watcher._restart_script()
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("\n⏹️  Stopping file watcher...")
+            if replica_set:
+                replica_set.stop_all()
+            if file_watcher.process and file_watcher.process.poll() is None:
+                file_watcher.process.terminate()
+                file_watcher.process.wait()
+            self.finish_run('stopped')
+        finally:
+            observer.stop()
+            observer.join()
+            print("✅ File watcher stopped")
+
+    def run_matrix(self, script_path: str, config_path: str, profiles: Optional[List[str]] = None,
+                   python_versions: Optional[List[str]] = None, extra_args: List[str] = None,
+                   max_parallel: int = 4) -> List[MatrixResult]:
+        script_file = Path(script_path)
+        if not script_file.exists():
+            error_msg = f"Script file not found: {script_path}"
+            raise PyRunnerError(self.enhanced_error_message(Exception(error_msg), script_path))
+        
+        base_config = self.parse_config(config_path)
+        if not profiles:
+            profiles = list(base_config.get('profiles', {}).keys()) or [base_config['active_profile']]
+        if not python_versions:
+            python_versions = [base_config['python_version']]
+        
+        cells = []
+        for profile in profiles:
+            for python_version in python_versions:
+                label = profile if python_version is None else f"{profile}/py{python_version}"
+                env_name = f"{script_file.stem}_matrix_{profile}"
+                if python_version is not None:
+                    env_name += f"_py{str(python_version).replace('.', '')}"
+                config = self.parse_config(config_path, profile)
+                if python_version is not None:
+                    config['python_version'] = str(python_version)
+                cells.append({'label': label, 'profile': profile, 'python_version': python_version,
+                              'env_path': Path(env_name), 'config': config})
+        
+        print(f"🧪 Matrix: {len(cells)} combinations ({len(profiles)} profiles x {len(python_versions)} interpreters)")
+        
+        print_lock = threading.Lock()
+        
+        def provision(cell):
+            start = time.time()
+            try:
+                self.provision_environment(cell['env_path'], cell['config'])
+                cell['error'] = None
+            except Exception as e:
+                cell['error'] = str(e).split('\n')[0]
+            cell['provision_seconds'] = time.time() - start
+            status = f"❌ {cell['error']}" if cell['error'] else "✅ ready"
+            with print_lock:
+                print(f"📦 [{cell['label']}] {status} ({cell['provision_seconds']:.1f}s)")
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_parallel)) as executor:
+            list(executor.map(provision, cells))
+        
+        label_width = max(len(cell['label']) for cell in cells)
+        
+        def printer(cell):
+            prefix = f"[{cell['label']:<{label_width}}]"
+            
+            def on_line(line):
+                with print_lock:
+                    print(f"{prefix} {line}", end='' if line.endswith('\n') else '\n')
+                if self.logger:
+                    self.logger.info(f"SCRIPT OUTPUT {prefix}: {line.rstrip()}")
+            return on_line
+        
+        runnable = []
+        for cell in cells:
+            cell['run_seconds'] = 0.0
+            cell['exit_code'] = None
+            if cell['error']:
+                continue
+            python_path = self.get_python_path(cell['env_path'])
+            cell['limits'] = cell['config'].get('resource_limits') or {}
+            cell['cmd'] = self._limit_command([str(python_path), str(script_file)] + (extra_args or []),
+                                              cell['limits'])
+            cell['env'] = os.environ.copy()
+            cell['env'].update({key: str(value) for key, value in cell['config']['environment_variables'].items()})
+            self._update_script_usage(cell['env_path'], script_path)
+            runnable.append(cell)
+        
+        async def run_all():
+            tasks = [asyncio.ensure_future(self.orchestrator.stream_async(
+                cell['cmd'], printer(cell), env=cell['env'], timeout=cell['limits'].get('timeout'),
+                preexec_fn=self._limit_preexec(cell['limits']))) for cell in runnable]
+            try:
+                return await asyncio.gather(*tasks)
+            except BaseException:
+                # One failing stream must not leave the other profiles' processes running
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+        
+        for cell, result in zip(runnable, self.orchestrator.submit(run_all())):
+            cell['exit_code'] = result.returncode
+            cell['run_seconds'] = result.duration_seconds
+            if result.returncode is None:
+                cell['error'] = result.stderr
+        
+        return [MatrixResult(
+            label=cell['label'],
+            env_path=str(cell['env_path']),
+            profile=cell['profile'],
+            python_version=cell['python_version'],
+            exit_code=cell['exit_code'],
+            provision_seconds=cell['provision_seconds'],
+            run_seconds=cell['run_seconds'],
+            error=cell['error']
+        ) for cell in cells]
+
+    def _load_batch_manifest(self, manifest_path: Path) -> Dict:
+        if not manifest_path.exists():
+            raise PyRunnerError(f"Batch manifest not found: {manifest_path}")
+        try:
+            with open(manifest_path, 'r') as f:
+                manifest = yaml.safe_load(f) or {}
+        except yaml.YAMLError as e:
+            raise PyRunnerError(f"Error parsing batch manifest: {e}")
+        
+        base_dir = manifest_path.resolve().parent
+        
+        def resolve(path):
+            return str(path) if Path(path).is_absolute() else str(base_dir / path)
+        
+        envs = {}
+        for env_name, env_config in (manifest.get('envs') or {}).items():
+            if not env_config or not env_config.get('config'):
+                raise PyRunnerError(f"Batch env '{env_name}' must define a config file")
+            envs[env_name] = {
+                'config': resolve(env_config['config']),
+                'profile': env_config.get('profile'),
+                'path': resolve(env_config.get('path', f"{env_name}_env")),
+                'max_concurrency': int(env_config.get('max_concurrency', 0)) or None
+            }
+        
+        jobs = {}
+        for job in manifest.get('jobs') or []:
+            name = job.get('name') or Path(job.get('script', '')).stem
+            if not job.get('script'):
+                raise PyRunnerError(f"Batch job '{name}' must define a script")
+            if name in jobs:
+                raise PyRunnerError(f"Duplicate batch job name: {name}")
+            if job.get('env') not in envs:
+                raise PyRunnerError(f"Batch job '{name}' references unknown env: {job.get('env')}")
+            args = job.get('args', [])
+            jobs[name] = {
+                'name': name,
+                'script': resolve(job['script']),
+                'env': job['env'],
+                'args': self.parse_extra_args(args) if isinstance(args, str) else [str(arg) for arg in args],
+                'env_vars': {key: str(value) for key, value in (job.get('env_vars') or {}).items()},
+                'depends_on': list(job.get('depends_on') or []),
+                'timeout': job.get('timeout'),
+                'cwd': resolve(job['cwd']) if job.get('cwd') else str(base_dir)
+            }
+        
+        for job in jobs.values():
+            for dependency in job['depends_on']:
+                if dependency not in jobs:
+                    raise PyRunnerError(f"Batch job '{job['name']}' depends on unknown job: {dependency}")
+        
+        remaining = {name: set(job['depends_on']) for name, job in jobs.items()}
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps & remaining.keys()]
+            if not ready:
+                raise PyRunnerError(f"Batch manifest has a dependency cycle between: {', '.join(sorted(remaining))}")
+            for name in ready:
+                del remaining[name]
+        
+        return {
+            'envs': envs,
+            'jobs': jobs,
+            'max_workers': int(manifest.get('max_workers', os.cpu_count() or 4)),
+            'report': resolve(manifest.get('report', 'batch_report.json')),
+            'log_dir': resolve(manifest.get('log_dir', 'batch_logs'))
+        }
+
+    def run_batch(self, manifest_path: str, report_path: Optional[str] = None,
+                  max_workers: Optional[int] = None) -> List[BatchJobResult]:
+        manifest = self._load_batch_manifest(Path(manifest_path))
+        envs = manifest['envs']
+        jobs = manifest['jobs']
+        max_workers = max(1, max_workers or manifest['max_workers'])
+        log_dir = Path(manifest['log_dir'])
+        log_dir.mkdir(parents=True, exist_ok=True)
+        batch_started = time.time()
+        
+        used_envs = sorted({job['env'] for job in jobs.values()})
+        print(f"📋 Batch: {len(jobs)} jobs across {len(used_envs)} environments (max {max_workers} workers)")
+        
+        def provision(env_name):
+            env = envs[env_name]
+            try:
+                env['parsed_config'] = self.parse_config(env['config'], env['profile'])
+                self.provision_environment(Path(env['path']), env['parsed_config'])
+                env['error'] = None
+                print(f"📦 [{env_name}] ✅ ready")
+            except Exception as e:
+                env['error'] = str(e).split('\n')[0]
+                print(f"📦 [{env_name}] ❌ {env['error']}")
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(provision, used_envs))
+        
+        def run_job(job):
+            env = envs[job['env']]
+            log_file = log_dir / f"{job['name']}.log"
+            limits = env['parsed_config'].get('resource_limits') or {}
+            cmd = self._limit_command([str(self.get_python_path(Path(env['path']))), job['script']] + job['args'],
+                                      limits)
+            timeout = min(filter(None, [job['timeout'], limits.get('timeout')]), default=None)
+            process_env = os.environ.copy()
+            process_env.update({key: str(value) for key, value in env['parsed_config']['environment_variables'].items()})
+            process_env.update(job['env_vars'])
+            started_at = time.time()
+            status, exit_code, error = 'failed', None, None
+            try:
+                with open(log_file, 'w') as log:
+                    result = subprocess.run(cmd, env=process_env, cwd=job['cwd'], stdout=log,
+                                          stderr=subprocess.STDOUT, timeout=timeout,
+                                          preexec_fn=self._limit_preexec(limits))
+                exit_code = result.returncode
+                status = 'success' if exit_code == 0 else 'failed'
+            except subprocess.TimeoutExpired:
+                status, error = 'timeout', f"Timed out after {timeout}s"
+            except Exception as e:
+                error = str(e)
+            finished_at = time.time()
+            return BatchJobResult(job['name'], job['script'], job['env'], status, exit_code, started_at,
+                                  finished_at, finished_at - started_at, str(log_file), error)
+        
+        results = {}
+        pending = list(jobs)
+        env_running = {env_name: 0 for env_name in envs}
+        futures = {}
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending or futures:
+                for name in list(pending):
+                    job = jobs[name]
+                    if any(dep not in results for dep in job['depends_on']):
+                        continue
+                    env = envs[job['env']]
+                    blocked_by = [dep for dep in job['depends_on'] if results[dep].status != 'success']
+                    if blocked_by or env['error']:
+                        error = f"Dependency failed: {', '.join(blocked_by)}" if blocked_by else f"Environment failed: {env['error']}"
+                        results[name] = BatchJobResult(name, job['script'], job['env'], 'skipped', None,
+                                                       None, None, 0.0, None, error)
+                        pending.remove(name)
+                        print(f"⏭️  [{name}] skipped ({error})")
+                        continue
+                    if len(futures) >= max_workers:
+                        continue
+                    if env['max_concurrency'] and env_running[job['env']] >= env['max_concurrency']:
+                        continue
+                    self._update_script_usage(Path(env['path']), job['script'])
+                    futures[executor.submit(run_job, job)] = name
+                    env_running[job['env']] += 1
+                    pending.remove(name)
+                    print(f"🚀 [{name}] started in {job['env']}")
+                
+                if not futures:
+                    continue
+                done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    name = futures.pop(future)
+                    result = future.result()
+                    results[name] = result
+                    env_running[result.env] -= 1
+                    icon = '✅' if result.status == 'success' else '❌'
+                    print(f"{icon} [{name}] {result.status} (exit {result.exit_code}, {result.duration_seconds:.1f}s)")
+        
+        ordered_results = [results[name] for name in jobs]
+        report_file = Path(report_path or manifest['report'])
+        report = {
+            'manifest': str(Path(manifest_path).resolve()),
+            'started_at': batch_started,
+            'finished_at': time.time(),
+            'duration_seconds': time.time() - batch_started,
+            'summary': {status: sum(1 for r in ordered_results if r.status == status)
+                        for status in ('success', 'failed', 'timeout', 'skipped')},
+            'jobs': [asdict(result) for result in ordered_results]
+        }
+        report_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(report_file, 'w') as f:
+            json.dump(report, f, indent=2)
+        if self.logger:
+            self.logger.info(f"Batch report written to {report_file}")
+        print(f"📊 Report: {report_file}")
+        return ordered_results
+
+    def _startup_signature(self, env_path: Path) -> List:
+        paths = [str(self.get_python_path(env_path))]
+        for site_packages in self._site_packages_dirs(env_path):
+            paths.append(str(site_packages))
+            paths += sorted(str(pth_file) for pth_file in site_packages.glob('*.pth'))
+        return self._path_signature(paths)
+
+    def _load_startup_manifest(self, env_path: Path) -> Dict:
+        try:
+            with open(env_path / '.pyrunner' / 'startup.json', 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def build_startup_bootstrap(self, env_path: Path, module_index: Optional[bool] = None) -> Dict:
+        pyrunner_dir = env_path / '.pyrunner'
+        if module_index is None:
+            module_index = self._load_startup_manifest(env_path).get('module_index', False)
         
-        for item in current_dir.iterdir():
-            if item.is_dir() and (item / '.pyrunner').exists():
-                env_info = self.get_environment_info(item)
-                if env_info:
-                    environments.append(env_info)
+        started = time.time()
+        python_path = self.get_python_path(env_path)
+        try:
+            result = subprocess.run([str(python_path), "-I", "-c", STARTUP_PROBE],
+                                    capture_output=True, text=True, timeout=120)
+            probe = json.loads(result.stdout) if result.returncode == 0 else None
+        except (OSError, subprocess.TimeoutExpired, ValueError) as e:
+            raise PyRunnerError(f"Failed to probe startup state of {env_path}: {e}")
+        if probe is None:
+            raise PyRunnerError(f"Failed to probe startup state of {env_path}: {result.stderr.strip()}")
         
-        return sorted(environments, key=lambda x: x.last_used, reverse=True)
+        sys_path = [entry for entry in probe['sys_path'] if entry]
+        source = STARTUP_BOOTSTRAP
+        for placeholder, value in [('__SYS_PATH__', sys_path), ('__PREFIX__', probe['prefix']),
+                                   ('__EXEC_PREFIX__', probe['exec_prefix']),
+                                   ('__PTH_IMPORTS__', probe['pth_imports']),
+                                   ('__MODULE_INDEX__', probe['module_index'] if module_index else {})]:
+            source = source.replace(placeholder, repr(value))
+        pyrunner_dir.mkdir(exist_ok=True)
+        shutil.rmtree(pyrunner_dir / '__pycache__', ignore_errors=True)
+        (pyrunner_dir / 'pyrunner_startup.py').write_text(source)
+        
+        manifest = {
+            'created_at': time.time(),
+            'module_index': module_index,
+            'sys_path_entries': len(sys_path),
+            'pth_imports': len(probe['pth_imports']),
+            'indexed_modules': len(probe['module_index']) if module_index else 0,
+            'build_seconds': time.time() - started,
+            'signature': self._startup_signature(env_path)
+        }
+        with open(pyrunner_dir / 'startup.json', 'w') as f:
+            json.dump(manifest, f, indent=2)
+        if self.logger:
+            self.logger.info(f"Built startup bootstrap for {env_path}: {len(sys_path)} path entries, "
+                             f"{len(probe['pth_imports'])} .pth imports, {manifest['indexed_modules']} indexed modules")
+        return manifest
 
-    def cleanup_unused_environments(self, days_threshold: int = 30) -> List[str]:
-        threshold_time = time.time() - (days_threshold * 24 * 60 * 60)
-        cleaned = []
+    def fast_startup_blockers(self, env: Dict) -> List[str]:
+        """Variables a `-I` launch would drop with no way to restore them once the interpreter is up."""
+        return [name for name in ('PYTHONHASHSEED',) if env.get(name, 'random') != 'random']
+
+    def startup_command(self, env_path: Path, script_path: Path, extra_args: List[str],
+                        env: Optional[Dict] = None) -> List[str]:
+        pyrunner_dir = env_path / '.pyrunner'
+        manifest = self._load_startup_manifest(env_path)
+        if (not (pyrunner_dir / 'pyrunner_startup.py').exists()
+                or manifest.get('signature') != self._startup_signature(env_path)):
+            self.build_startup_bootstrap(env_path)
+        loader = (f"import sys; sys.path.insert(0, {str(pyrunner_dir.resolve())!r}); "
+                  f"from pyrunner_startup import boot; boot()")
+        # Variables that only take effect at interpreter startup are passed as the equivalent options
+        env = os.environ if env is None else env
+        options = []
+        if env.get('PYTHONUTF8') in ('0', '1'):
+            options += ["-X", f"utf8={env['PYTHONUTF8']}"]
+        for warning_filter in env.get('PYTHONWARNINGS', '').split(','):
+            if warning_filter.strip():
+                options += ["-W", warning_filter.strip()]
+        return ([str(self.get_python_path(env_path)), "-I", "-S"] + options + ["-c", loader, str(script_path)]
+                + list(extra_args))
+
+    def benchmark_startup(self, env_path: Path, modules: Optional[List[str]] = None, runs: int = 10) -> Dict:
+        if modules is None:
+            tooling = {'pip', 'setuptools', 'pkg_resources', 'wheel'}
+            modules = sorted({name for dist in self._installed_distributions(env_path) for name in dist['top_level']
+                              if not name.startswith('_') and name not in tooling})
+        bench_script = env_path / '.pyrunner' / 'startup_bench.py'
+        bench_script.write_text(f"for name in {modules!r}:\n"
+                                f"    try:\n        __import__(name)\n    except Exception:\n        pass\n")
+        commands = {
+            'default': [str(self.get_python_path(env_path)), str(bench_script)],
+            'fast': self.startup_command(env_path, bench_script, [])
+        }
+        for label, cmd in commands.items():
+            warmup = subprocess.run(cmd, capture_output=True, text=True)
+            if warmup.returncode != 0:
+                raise PyRunnerError(f"Startup benchmark ({label}) failed: {warmup.stderr.strip()}")
         
-        for env_info in self.list_environments():
-            if env_info.last_used < threshold_time:
-                try:
-                    env_path = Path(env_info.path)
-                    shutil.rmtree(env_path)
-                    cleaned.append(env_info.name)
-                    if self.logger:
-                        self.logger.info(f"Cleaned up unused environment: {env_info.name}")
-                except Exception as e:
-                    if self.logger:
-                        self.logger.error(f"Failed to cleanup {env_info.name}: {e}")
+        timings = {label: [] for label in commands}
+        for _ in range(runs):
+            for label, cmd in commands.items():
+                started = time.perf_counter()
+                subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                timings[label].append((time.perf_counter() - started) * 1000)
         
-        return cleaned
+        report = {'modules': len(modules), 'runs': runs}
+        for label, values in timings.items():
+            report[label] = {'median_ms': statistics.median(values), 'mean_ms': statistics.mean(values),
+                             'min_ms': min(values)}
+        report['speedup'] = report['default']['median_ms'] / max(report['fast']['median_ms'], 1e-9)
+        return report
 
-    def run_script_with_watch(self, script_path: str, env_path: Path, config_path: str,
-                             extra_args: List[str] = None, env_vars: Dict = None) -> None:
-        print(f"🔍 Starting file watcher for: {script_path}")
-        print("💡 Press Ctrl+C to stop watching")
+    def _module_distributions(self, env_path: Path) -> Dict[str, Dict]:
+        modules = {}
+        for dist in self._installed_distributions(env_path):
+            owner = {'name': dist['name'], 'version': dist['version']}
+            for relative_path, _, _ in self._read_record(Path(dist['dist_info'])):
+                parts = Path(relative_path).parts
+                if not parts or parts[0] == '..' or '__pycache__' in parts or parts[0].endswith(('.dist-info', '.data')):
+                    continue
+                stem = parts[-1].split('.')[0]
+                if not stem or parts[-1].endswith(('.pth', '.pyi')):
+                    continue
+                dotted = parts[:-1] if stem == '__init__' else parts[:-1] + (stem,)
+                if dotted:
+                    modules.setdefault('.'.join(dotted), owner)
+        return modules
+
+    def _script_import_statements(self, script_path: Path) -> List[str]:
+        """Absolute imports executed when the script's module body runs, in source order."""
+        try:
+            tree = ast.parse(script_path.read_text(encoding='utf-8', errors='replace'), filename=str(script_path))
+        except SyntaxError as e:
+            raise PyRunnerError(f"Could not parse {script_path}: {e}")
+        statements = []
         
-        file_watcher = FileWatcher(self, script_path, env_path, extra_args, env_vars, config_path)
+        def visit(body):
+            for node in body:
+                if isinstance(node, ast.Import) or (isinstance(node, ast.ImportFrom) and node.level == 0):
+                    statements.append(ast.unparse(node))
+                elif isinstance(node, ast.If) and self._is_type_checking(node.test):
+                    visit(node.orelse)
+                elif isinstance(node, (ast.If, ast.Try, ast.With)):
+                    for block in ('body', 'orelse', 'finalbody'):
+                        visit(getattr(node, block, []))
+                    # An ImportError handler is the fallback for when the try body's import is missing
+                    if not self._catches_import_error(node):
+                        for handler in getattr(node, 'handlers', []):
+                            visit(handler.body)
+        visit(tree.body)
+        return statements
+
+    def profile_imports(self, script_path: str, env_path: Path, runs: int = 3, full_run: bool = False,
+                        timeout: int = 300) -> Dict:
+        script_file = Path(script_path).resolve()
+        if not script_file.exists():
+            raise PyRunnerError(f"Script file not found: {script_path}")
+        python_path = self.get_python_path(env_path)
+        if full_run:
+            cmd = [str(python_path), "-X", "importtime", str(script_file)]
+        else:
+            # Each import gets its own try so one broken dependency does not hide the rest
+            probe = "\n".join(f"try:\n    {statement}\nexcept Exception:\n    pass"
+                              for statement in self._script_import_statements(script_file))
+            cmd = [str(python_path), "-X", "importtime", "-c", probe or "pass"]
         
-        observer = Observer()
-        script_dir = Path(script_path).parent
-        observer.schedule(file_watcher, str(script_dir), recursive=False)
+        samples = {}
+        for _ in range(max(1, runs)):
+            try:
+                result = subprocess.run(cmd, cwd=script_file.parent, capture_output=True, text=True, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                raise PyRunnerError(f"Import profiling timed out after {timeout}s")
+            stack = []
+            for line in result.stderr.splitlines():
+                match = re.match(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$', line)
+                if not match:
+                    continue
+                self_us, cumulative_us, depth, module = int(match.group(1)), int(match.group(2)), \
+                    len(match.group(3)) // 2, match.group(4)
+                sample = samples.setdefault(module, {'self_us': [], 'cumulative_us': [], 'parent': None})
+                sample['self_us'].append(self_us)
+                sample['cumulative_us'].append(cumulative_us)
+                # importtime prints children before their parent, so pending deeper entries belong to this one
+                while stack and stack[-1][0] > depth:
+                    samples[stack.pop()[1]]['parent'] = module
+                stack.append((depth, module))
         
-        observer.start()
+        owners = self._module_distributions(env_path)
+        stdlib = self._stdlib_modules(self.get_python_path(env_path))
+        script_dir = script_file.parent
         
-        try:
-            file_watcher._restart_script()
-            while True:
-                time.sleep(1)
-        except KeyboardInterrupt:
-            print("\n⏹️  Stopping file watcher...")
-            if file_watcher.process and file_watcher.process.poll() is None:
-                file_watcher.process.terminate()
-                file_watcher.process.wait()
-        finally:
-            observer.stop()
-            observer.join()
-            print("✅ File watcher stopped")
+        def owner_of(module):
+            parts = module.split('.')
+            for end in range(len(parts), 0, -1):
+                owner = owners.get('.'.join(parts[:end]))
+                if owner:
+                    return owner['name'], owner['version']
+            if parts[0] in stdlib:
+                return 'stdlib', None
+            if (script_dir / f"{parts[0]}.py").exists() or (script_dir / parts[0]).is_dir():
+                return 'local', None
+            return 'not installed', None
+        
+        distributions = {}
+        roots = {}
+        for module, sample in samples.items():
+            name, version = owner_of(module)
+            self_ms = min(sample['self_us']) / 1000
+            dist = distributions.setdefault(name, {'version': version, 'self_ms': 0.0, 'cumulative_ms': 0.0,
+                                                   'modules': 0, 'imports': {}, 'top_modules': []})
+            dist['self_ms'] += self_ms
+            dist['modules'] += 1
+            dist['top_modules'].append((self_ms, module))
+            
+            # An entry point is where another distribution (or the script) first imported this one
+            parent = sample['parent']
+            if parent is not None and owner_of(parent)[0] == name:
+                continue
+            cumulative_ms = min(sample['cumulative_us']) / 1000
+            ancestor = parent
+            while ancestor is not None and owner_of(ancestor)[0] != name:
+                ancestor = samples[ancestor]['parent']
+            if ancestor is None:
+                dist['cumulative_ms'] += cumulative_ms
+            if parent is None:
+                roots[name] = roots.get(name, 0.0) + cumulative_ms
+            else:
+                importer = distributions.setdefault(owner_of(parent)[0], {
+                    'version': owner_of(parent)[1], 'self_ms': 0.0, 'cumulative_ms': 0.0,
+                    'modules': 0, 'imports': {}, 'top_modules': []})
+                importer['imports'][name] = importer['imports'].get(name, 0.0) + cumulative_ms
+        for dist in distributions.values():
+            dist['top_modules'] = [module for _, module in sorted(dist['top_modules'], reverse=True)[:5]]
+            dist['imports'] = {name: round(ms, 3) for name, ms in dist['imports'].items()}
+            dist['self_ms'] = round(dist['self_ms'], 3)
+            dist['cumulative_ms'] = round(dist['cumulative_ms'], 3)
+        
+        return {
+            'timestamp': time.time(),
+            'script': str(script_file),
+            'mode': 'full' if full_run else 'imports',
+            'runs': max(1, runs),
+            'total_ms': round(sum(roots.values()), 3),
+            'roots': {name: round(ms, 3) for name, ms in roots.items()},
+            'distributions': distributions
+        }
+
+    def compare_import_profiles(self, baseline: Dict, current: Dict, threshold: float = 0.2,
+                                min_ms: float = 5.0) -> List[Dict]:
+        regressions = []
+        for name, dist in current['distributions'].items():
+            before = baseline['distributions'].get(name)
+            if not before or name in ('local', 'stdlib', 'not installed'):
+                continue
+            delta = dist['self_ms'] - before['self_ms']
+            if delta >= min_ms and delta >= before['self_ms'] * threshold:
+                regressions.append({
+                    'distribution': name,
+                    'baseline_ms': before['self_ms'],
+                    'current_ms': dist['self_ms'],
+                    'delta_ms': round(delta, 3),
+                    'baseline_version': before['version'],
+                    'current_version': dist['version'],
+                    'updated': before['version'] != dist['version']
+                })
+        return sorted(regressions, key=lambda regression: regression['delta_ms'], reverse=True)
+
+    def record_import_profile(self, env_path: Path, profile: Dict, set_baseline: bool = False,
+                              history_limit: int = 50) -> Optional[Dict]:
+        """Append a profile to the env's history and return the baseline it should be compared with."""
+        history_file = env_path / '.pyrunner' / 'import_profiles.json'
+        data = {'baselines': {}, 'history': []}
+        if history_file.exists():
+            try:
+                with open(history_file, 'r') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                pass
+        key = f"{profile['script']}|{profile['mode']}"
+        baseline = data['baselines'].get(key)
+        lock_file = env_path / '.pyrunner' / 'requirements.lock'
+        profile['lock_digest'] = self._sha256_file(lock_file) if lock_file.exists() else None
+        data['history'] = (data['history'] + [profile])[-history_limit:]
+        if set_baseline or baseline is None:
+            data['baselines'][key] = profile
+        with open(history_file, 'w') as f:
+            json.dump(data, f, indent=2)
+        return None if set_baseline else baseline
 
     def run_script(self, script_path: str, env_path: Path, extra_args: List[str] = None, 
-                  run_in_background: bool = False, env_vars: Dict = None) -> Optional[int]:
+                  run_in_background: bool = False, env_vars: Dict = None,
+                  fast_startup: bool = False, replicas: int = 1,
+                  replica_env: Optional[Dict[str, str]] = None, pin_cpus: bool = True,
+                  resource_limits: Optional[Dict] = None) -> Optional[int]:
         script_file = Path(script_path)
         if not script_file.exists():
             error_msg = f"Script file not found: {script_path}"
@@ -902,30 +5409,58 @@ class PyRunner:
         
         self._update_script_usage(env_path, script_path)
         
-        cmd = [str(python_path), str(script_file)]
-        if extra_args:
-            cmd.extend(extra_args)
         env = os.environ.copy()
         if env_vars:
             env.update(env_vars)
+        blockers = self.fast_startup_blockers(env) if fast_startup else []
+        if blockers:
+            message = f"{', '.join(blockers)} cannot be honoured by a fast-startup launch"
+            if self.logger:
+                self.logger.warning(f"{message}, using a regular launch")
+            print(f"⚠️  {message}, using a regular launch")
+        if fast_startup and not blockers:
+            cmd = self.startup_command(env_path, script_file, extra_args or [], env)
+        else:
+            cmd = [str(python_path), str(script_file)]
+            if extra_args:
+                cmd.extend(extra_args)
         if self.logger:
             self.logger.info(f"Running script: {' '.join(cmd)}")
             if env_vars:
                 self.logger.info(f"Environment variables: {list(env_vars.keys())}")
+        limits = resource_limits or {}
+        mode = 'replicas' if replicas != 1 else 'background' if run_in_background else 'foreground'
+        if mode != 'foreground':
+            self._warn_unenforced_timeout(limits, mode)
+        outcome = 'error'
         try:
-            if run_in_background:
-                return self._run_background_process(cmd, env, env_path)
+            if replicas != 1:
+                code = self._run_replicas(self._limit_command(cmd, limits), env, env_path, replicas, replica_env,
+                                          pin_cpus, run_in_background, self._limit_preexec(limits))
+            elif run_in_background:
+                code = self._run_background_process(self._limit_command(cmd, limits), env, env_path,
+                                                    self._limit_preexec(limits))
+            elif limits:
+                code = self._run_limited_process(cmd, env, env_path, limits)
             else:
-                return self._run_foreground_process(cmd, env)
+                code = self._run_foreground_process(cmd, env)
+            outcome = 'started' if run_in_background else 'success' if not code else 'failure'
+            return code
+        except PyRunnerError:
+            raise
         except Exception as e:
             enhanced_error = self.enhanced_error_message(e, script_path)
             raise PyRunnerError(enhanced_error)
+        finally:
+            self.metrics.inc('pyrunner_runs_total', mode=mode, result=outcome)
+            self.finish_run(outcome, code if outcome in ('success', 'failure') else None)
 
     def _run_foreground_process(self, cmd: List[str], env: Dict) -> int:
         if self.logger:
             self.logger.info("Running in foreground mode")
         process = subprocess.Popen(cmd, env=env, stdout=subprocess.PIPE, 
                                  stderr=subprocess.STDOUT, text=True, bufsize=1)
+        self.record_run_pid(process.pid)
         for line in process.stdout:
             print(line, end='')
             if self.logger:
@@ -935,12 +5470,13 @@ class PyRunner:
             self.logger.info(f"Script finished with return code: {process.returncode}")
         return process.returncode
 
-    def _run_background_process(self, cmd: List[str], env: Dict, env_path: Path) -> int:
+    def _run_background_process(self, cmd: List[str], env: Dict, env_path: Path, preexec_fn=None) -> int:
         if self.logger:
             self.logger.info("Running in background mode")
         process = subprocess.Popen(cmd, env=env, stdout=subprocess.PIPE, 
                                  stderr=subprocess.STDOUT, text=True,
-                                 start_new_session=True)
+                                 start_new_session=True, preexec_fn=preexec_fn)
+        self.record_run_pid(process.pid)
         pid_file = env_path / '.pyrunner' / 'process.pid'
         with open(pid_file, 'w') as f:
             f.write(str(process.pid))
@@ -957,6 +5493,227 @@ class PyRunner:
             log_thread.start()
         return process.pid
 
+    def _parse_resource_limits(self, raw: Optional[Dict]) -> Dict:
+        if not raw:
+            return {}
+        if not isinstance(raw, dict):
+            raise PyRunnerError("'resource_limits' must be a mapping")
+        unknown = set(raw) - RESOURCE_LIMIT_KEYS
+        if unknown:
+            raise PyRunnerError(f"Unknown resource limits: {', '.join(sorted(unknown))} "
+                                f"(supported: {', '.join(sorted(RESOURCE_LIMIT_KEYS))})")
+        limits = {}
+        try:
+            for key in ('memory', 'data'):
+                if raw.get(key) is not None:
+                    limits[key] = self._parse_size(raw[key])
+            for key in ('cpu_seconds', 'open_files', 'nice'):
+                if raw.get(key) is not None:
+                    limits[key] = int(raw[key])
+            for key in ('timeout', 'kill_after'):
+                if raw.get(key) is not None:
+                    limits[key] = float(raw[key])
+        except (TypeError, ValueError) as e:
+            raise PyRunnerError(f"Invalid resource limit value: {e}")
+        if raw.get('ionice') is not None:
+            io_class, _, level = str(raw['ionice']).partition(':')
+            if io_class not in ('idle', 'best-effort', 'realtime') or (level and not level.isdigit()):
+                raise PyRunnerError(f"Invalid ionice setting {raw['ionice']!r} "
+                                    f"(use idle, best-effort[:0-7] or realtime[:0-7])")
+            limits['ionice'] = str(raw['ionice'])
+        return limits
+
+    def _limit_command(self, cmd: List[str], limits: Dict) -> List[str]:
+        if not limits.get('ionice'):
+            return cmd
+        ionice = shutil.which('ionice')
+        if not ionice:
+            if self.logger:
+                self.logger.warning("ionice not found, running without an I/O priority")
+            return cmd
+        io_class, _, level = limits['ionice'].partition(':')
+        prefix = [ionice, '-c', {'realtime': '1', 'best-effort': '2', 'idle': '3'}[io_class]]
+        if level:
+            prefix += ['-n', level]
+        return prefix + cmd
+
+    def _limit_preexec(self, limits: Dict):
+        rlimits = []
+        if resource is not None:
+            if 'memory' in limits:
+                rlimits.append((resource.RLIMIT_AS, (limits['memory'], limits['memory'])))
+            if 'data' in limits:
+                rlimits.append((resource.RLIMIT_DATA, (limits['data'], limits['data'])))
+            if 'cpu_seconds' in limits:
+                # SIGXCPU at the soft limit lets the script clean up, SIGKILL follows a second later
+                rlimits.append((resource.RLIMIT_CPU, (limits['cpu_seconds'], limits['cpu_seconds'] + 1)))
+            if 'open_files' in limits:
+                rlimits.append((resource.RLIMIT_NOFILE, (limits['open_files'], limits['open_files'])))
+        elif self.logger and set(limits) & {'memory', 'data', 'cpu_seconds', 'open_files'}:
+            self.logger.warning("Resource limits are not supported on this platform")
+        nice = limits.get('nice')
+        if not rlimits and not nice:
+            return None
+        
+        def preexec():
+            for limit, values in rlimits:
+                resource.setrlimit(limit, values)
+            if nice:
+                os.nice(nice)
+        return preexec
+
+    def _process_usage(self, pid: int) -> Dict:
+        usage = {}
+        try:
+            with open(f"/proc/{pid}/status", 'r') as f:
+                for line in f:
+                    key, _, value = line.partition(':')
+                    if key in ('VmPeak', 'VmRSS', 'VmData'):
+                        usage[f"{key.lower()}_bytes"] = int(value.split()[0]) * 1024
+            usage['open_files'] = len(os.listdir(f"/proc/{pid}/fd"))
+        except (OSError, ValueError, IndexError):
+            pass
+        return usage
+
+    def _run_limited_process(self, cmd: List[str], env: Dict, env_path: Path, limits: Dict) -> int:
+        if self.logger:
+            self.logger.info(f"Running in foreground mode with resource limits: {limits}")
+        started = time.time()
+        process = subprocess.Popen(self._limit_command(cmd, limits), env=env, stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT, text=True, bufsize=1,
+                                   preexec_fn=self._limit_preexec(limits))
+        self.record_run_pid(process.pid)
+        timed_out = threading.Event()
+        finished = threading.Event()
+        # Only the main thread reaps; signals are sent under this lock while the PID is known to be unreaped
+        reap_lock = threading.Lock()
+        reaped = False
+        snapshot = {}
+        peaks = {'vmpeak_bytes': 0, 'vmdata_bytes': 0}
+        
+        def signal_child(signum):
+            with reap_lock:
+                if not reaped:
+                    os.kill(process.pid, signum)
+        
+        def escalate():
+            timed_out.set()
+            snapshot.update(self._process_usage(process.pid))
+            signal_child(signal.SIGTERM)
+            if not finished.wait(limits.get('kill_after', 10)):
+                signal_child(signal.SIGKILL)
+        
+        def sample_memory():
+            while not finished.wait(0.5):
+                usage = self._process_usage(process.pid)
+                for key in peaks:
+                    peaks[key] = max(peaks[key], usage.get(key, 0))
+        
+        timer = None
+        if limits.get('timeout'):
+            timer = threading.Timer(limits['timeout'], escalate)
+            timer.daemon = True
+            timer.start()
+        if 'memory' in limits or 'data' in limits:
+            threading.Thread(target=sample_memory, daemon=True).start()
+        
+        markers = {'memory': False, 'open_files': False}
+        for line in process.stdout:
+            print(line, end='')
+            if self.logger:
+                self.logger.info(f"SCRIPT OUTPUT: {line.strip()}")
+            if 'MemoryError' in line or 'Cannot allocate memory' in line:
+                markers['memory'] = True
+            elif 'Too many open files' in line:
+                markers['open_files'] = True
+        if hasattr(os, 'waitid'):
+            os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+        with reap_lock:
+            _, status, rusage = os.wait4(process.pid, 0)
+            reaped = True
+        finished.set()
+        process.returncode = os.waitstatus_to_exitcode(status)
+        if timer:
+            timer.cancel()
+        
+        usage = {
+            'wall_seconds': round(time.time() - started, 3),
+            'cpu_seconds': round(rusage.ru_utime + rusage.ru_stime, 3),
+            'max_rss_bytes': rusage.ru_maxrss * 1024
+        }
+        usage.update(snapshot)
+        for key, value in peaks.items():
+            if value:
+                usage[key] = max(usage.get(key, 0), value)
+        signal_name = signal.Signals(-process.returncode).name if process.returncode < 0 else None
+        limit_hit, detail = None, ""
+        if timed_out.is_set():
+            limit_hit, detail = 'timeout', f"wall-clock timeout of {limits['timeout']:g}s"
+        elif 'cpu_seconds' in limits and (signal_name == 'SIGXCPU'
+                                          or (signal_name == 'SIGKILL' and usage['cpu_seconds'] >= limits['cpu_seconds'])):
+            limit_hit, detail = 'cpu_seconds', f"CPU time limit of {limits['cpu_seconds']}s"
+        elif ('memory' in limits or 'data' in limits) and (markers['memory'] or (
+                signal_name in ('SIGSEGV', 'SIGABRT') and self._near_memory_limit(limits, usage, peaks))):
+            limit_hit = 'memory' if 'memory' in limits else 'data'
+            detail = f"{limit_hit} limit of {limits[limit_hit] / (1024 * 1024):.0f}MB"
+        elif 'open_files' in limits and markers['open_files']:
+            limit_hit, detail = 'open_files', f"open files limit of {limits['open_files']}"
+        
+        report = ResourceLimitReport(exit_code=process.returncode, limit_hit=limit_hit, signal=signal_name,
+                                     limits=limits, usage=usage, detail=detail)
+        try:
+            with open(env_path / '.pyrunner' / 'limit_report.json', 'w') as f:
+                json.dump(asdict(report), f, indent=2)
+        except OSError:
+            pass
+        if self.logger:
+            self.logger.info(f"Script finished with return code: {process.returncode}")
+            self.logger.info(f"Resource report: {json.dumps(asdict(report))}")
+        if limit_hit:
+            print(f"⛔ Script stopped by {detail} (exit code {process.returncode}, "
+                  f"CPU {usage['cpu_seconds']:.1f}s, peak RSS {usage['max_rss_bytes'] / (1024 * 1024):.1f}MB)")
+        return process.returncode
+
+    def _warn_unenforced_timeout(self, limits: Dict, mode: str) -> None:
+        if limits.get('timeout'):
+            message = f"Wall-clock timeout is not enforced in {mode} runs; the other resource limits apply"
+            if self.logger:
+                self.logger.warning(message)
+            print(f"⚠️  {message}")
+
+    def _near_memory_limit(self, limits: Dict, usage: Dict, peaks: Dict, threshold: float = 0.9) -> bool:
+        """A crash only counts as a memory-limit hit if the process had actually grown close to the limit."""
+        if 'memory' in limits:
+            used = max(usage.get('max_rss_bytes', 0), peaks.get('vmpeak_bytes', 0))
+            return used >= limits['memory'] * threshold
+        used = max(usage.get('max_rss_bytes', 0), peaks.get('vmdata_bytes', 0))
+        return used >= limits['data'] * threshold
+
+    def _run_replicas(self, cmd: List[str], env: Dict, env_path: Path, replicas: int,
+                      replica_env: Optional[Dict[str, str]], pin_cpus: bool, background: bool,
+                      preexec_fn=None) -> Optional[int]:
+        replica_set = ReplicaSet(self, cmd, env, env_path, replicas, replica_env, pin_cpus, background, preexec_fn)
+        if self.logger:
+            self.logger.info(f"Running {replicas} replicas in {'background' if background else 'foreground'} mode")
+        pids = replica_set.start_all()
+        if background:
+            print(f"Started {replicas} replicas in background with PIDs: {', '.join(map(str, pids))}")
+            print(f"PID files: {replica_set.pid_dir}")
+            return None
+        
+        print(f"🚀 Started {replicas} replicas (PIDs: {', '.join(map(str, pids))})")
+        try:
+            exit_codes = replica_set.wait()
+        except KeyboardInterrupt:
+            replica_set.stop_all()
+            raise
+        if self.logger:
+            self.logger.info(f"Replicas finished with return codes: {exit_codes}")
+        failed = [code for code in exit_codes if code != 0]
+        if failed:
+            print(f"❌ {len(failed)} of {replicas} replicas failed (exit codes: {exit_codes})")
+        return failed[0] if failed else 0
+
     def reset_environment(self, env_path: Path) -> None:
         if not env_path.exists():
             raise PyRunnerError(f"Environment not found: {env_path}")
@@ -981,8 +5738,238 @@ class PyRunner:
         except ValueError as e:
             raise PyRunnerError(f"Invalid extra arguments format: {e}")
 
+    def parse_replica_env(self, assignments: Optional[List[str]]) -> Dict[str, str]:
+        templates = {}
+        for assignment in assignments or []:
+            key, sep, template = assignment.partition('=')
+            if not sep or not key:
+                raise PyRunnerError(f"Invalid --replica-env {assignment!r}, expected KEY=TEMPLATE (e.g. PORT={{8000+i}})")
+            templates[key] = template
+        return templates
+
+
+
+class _EventLogHandler(logging.Handler):
+    def __init__(self, callback):
+        super().__init__()
+        self.callback = callback
+    
+    def emit(self, record):
+        self.callback(record)
+
+
+class PyRunnerAPI:
+    """In-process PyRunner for job servers.
+
+    Methods never print; progress is reported as PyRunnerEvent objects passed to
+    ``on_event`` callbacks and outcomes are returned as EnvHandle / RunResult.
+    Instances are safe to share between threads: provisioning is serialized per
+    environment and script runs go through a shared AsyncOrchestrator.
+    """
+    
+    def __init__(self, envs_dir: Optional[str] = None, max_concurrency: Optional[int] = None, on_event=None):
+        self._runner = PyRunner()
+        self._runner.orchestrator.show_progress = False
+        atexit.register(self._runner.metrics.flush)
+        self.envs_dir = Path(envs_dir) if envs_dir else self._runner.cache_dir / 'envs'
+        self.on_event = on_event
+        self.orchestrator = AsyncOrchestrator(max_concurrency or int(os.environ.get('PYRUNNER_MAX_CONCURRENCY', 8)),
+                                              show_progress=False)
+        self._env_locks = {}
+        self._usage_locks = {}
+        self._lock = threading.Lock()
+    
+    def ensure_env(self, config, env_path: Optional[str] = None, profile: Optional[str] = None,
+                   force_update: bool = False, on_event=None) -> EnvHandle:
+        """Create or update the environment for ``config`` and return a handle to it.
+
+        ``config`` may be a path to a requirements.txt/YAML file, a list of requirement
+        strings or a config dict. Without ``env_path`` the environment lives under
+        ``envs_dir`` at a path derived from the config hash, so equal configs share it.
+        """
+        runner = self._call_runner(on_event)
+        config = self._normalize_config(runner, config, profile)
+        config_hash = runner._get_config_hash(config)
+        env_path = Path(env_path) if env_path else self.envs_dir / config_hash[:16]
+        env_path.parent.mkdir(parents=True, exist_ok=True)
+        self._emit(on_event, 'provision_started', f"Provisioning {env_path}", env_path,
+                   dependencies=len(config['dependencies']))
+        
+        started = time.time()
+        with self._path_lock(self._env_locks, env_path):
+            try:
+                if (not force_update and env_path.exists()
+                        and runner._get_stored_config_hash(env_path) == runner._get_config_hash(config, env_path)
+                        and runner.validate_environment(env_path)[0]):
+                    status = 'up_to_date'
+                else:
+                    status = runner.provision_environment(env_path, config, force_update)
+            except Exception as e:
+                self._emit(on_event, 'provision_failed', str(e), env_path, 'error')
+                if isinstance(e, PyRunnerError):
+                    raise
+                raise PyRunnerError(f"Failed to provision {env_path}: {e}") from e
+            finally:
+                self._absorb(runner)
+        
+        info = runner.get_environment_info(env_path)
+        handle = EnvHandle(
+            path=str(env_path),
+            python=str(runner.get_python_path(env_path)),
+            config_hash=config_hash,
+            python_version=info.python_version if info else (config['python_version'] or 'unknown'),
+            status=status,
+            env_vars={key: str(value) for key, value in (config['environment_variables'] or {}).items()},
+            provision_seconds=time.time() - started
+        )
+        self._emit(on_event, 'provision_finished', f"{env_path} {status}", env_path,
+                   status=status, seconds=handle.provision_seconds)
+        return handle
+    
+    def run(self, handle: EnvHandle, script: str, args: Optional[List[str]] = None,
+            env_vars: Optional[Dict[str, str]] = None, timeout: Optional[float] = None,
+            cwd: Optional[str] = None, on_event=None) -> RunResult:
+        """Run ``script`` with the environment's interpreter and capture its output."""
+        cmd, env = self._prepare_run(handle, script, args, env_vars)
+        return self.orchestrator.submit(self._run_coro(handle, script, cmd, env, timeout, cwd, on_event))
+    
+    async def ensure_env_async(self, config, **kwargs) -> EnvHandle:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.ensure_env, config, **kwargs))
+    
+    async def run_async(self, handle: EnvHandle, script: str, args: Optional[List[str]] = None,
+                        env_vars: Optional[Dict[str, str]] = None, timeout: Optional[float] = None,
+                        cwd: Optional[str] = None, on_event=None) -> RunResult:
+        loop = asyncio.get_running_loop()
+        cmd, env = await loop.run_in_executor(None, self._prepare_run, handle, script, args, env_vars)
+        future = asyncio.run_coroutine_threadsafe(self._run_coro(handle, script, cmd, env, timeout, cwd, on_event),
+                                                  self.orchestrator._ensure_loop())
+        return await asyncio.wrap_future(future)
+    
+    def _prepare_run(self, handle: EnvHandle, script: str, args: Optional[List[str]],
+                     env_vars: Optional[Dict[str, str]]) -> Tuple[List[str], Dict]:
+        if not Path(script).exists():
+            raise PyRunnerError(f"Script file not found: {script}")
+        if not Path(handle.python).exists():
+            raise PyRunnerError(f"Python executable not found in virtual environment: {handle.python}")
+        with self._path_lock(self._usage_locks, Path(handle.path)):
+            self._runner._update_script_usage(Path(handle.path), script)
+        env = os.environ.copy()
+        env.update(handle.env_vars)
+        env.update(env_vars or {})
+        return [handle.python, str(script)] + list(args or []), env
+    
+    async def _run_coro(self, handle: EnvHandle, script: str, cmd: List[str], env: Dict,
+                        timeout: Optional[float], cwd: Optional[str], on_event) -> RunResult:
+        started_at = time.time()
+        self._emit(on_event, 'run_started', f"Running {script}", handle.path, args=cmd[2:])
+        result = await self.orchestrator.run_async(cmd, timeout=timeout, env=env, cwd=cwd)
+        run_result = RunResult(script=str(script), args=cmd[2:], env_path=handle.path, returncode=result.returncode,
+                               stdout=result.stdout, stderr=result.stderr, started_at=started_at,
+                               duration_seconds=result.duration_seconds, timed_out=result.timed_out)
+        self._emit(on_event, 'run_finished', f"{script} exited with {result.returncode}", handle.path,
+                   'info' if run_result.ok else 'error', returncode=result.returncode,
+                   seconds=result.duration_seconds, timed_out=result.timed_out)
+        return run_result
+    
+    def _normalize_config(self, runner: 'PyRunner', config, profile: Optional[str]) -> Dict:
+        if isinstance(config, (str, Path)):
+            return runner.parse_config(str(config), profile)
+        if isinstance(config, (list, tuple)):
+            config = {'dependencies': list(config)}
+        if not isinstance(config, dict):
+            raise PyRunnerError(f"Unsupported config type: {type(config).__name__}")
+        normalized = {
+            'python_version': None,
+            'dependencies': [],
+            'dev_dependencies': [],
+            'editables': [],
+            'constraints': [],
+            'constraint_files': [],
+            'pip_options': [],
+            'requirement_files': [],
+            'environment_variables': {},
+            'config_type': 'api',
+            'profiles': {},
+            'active_profile': 'default',
+            'hot_reload': False,
+            'pipeline': False,
+            'wheelhouse': None,
+            'artifact_cache': None,
+            'fast_startup': False,
+            'share_env': False,
+            'slim': False,
+            'resource_limits': {},
+            'template': None
+        }
+        normalized.update(copy.deepcopy(config))
+        if not isinstance(normalized['dependencies'], list):
+            raise PyRunnerError("'dependencies' must be a list of requirement strings")
+        return normalized
+    
+    def _call_runner(self, on_event) -> 'PyRunner':
+        # Shallow copy shares the caches and orchestrator but gets its own event-routing logger
+        runner = copy.copy(self._runner)
+        logger = logging.Logger('pyrunner.api')
+        logger.addHandler(_EventLogHandler(
+            lambda record: self._emit(on_event, 'log', record.getMessage(), None, record.levelname.lower())))
+        runner.logger = logger
+        return runner
+    
+    def _absorb(self, runner: 'PyRunner') -> None:
+        with self._lock:
+            if self._runner._interpreters is None:
+                self._runner._interpreters = runner._interpreters
+            if self._runner._digest_cache is None:
+                self._runner._digest_cache = runner._digest_cache
+    
+    def _path_lock(self, locks: Dict, path: Path) -> threading.Lock:
+        key = str(path.resolve())
+        with self._lock:
+            return locks.setdefault(key, threading.Lock())
+    
+    def _emit(self, on_event, kind: str, message: str, env_path=None, level: str = 'info', **data) -> None:
+        event = PyRunnerEvent(kind, message, str(env_path) if env_path else None, level, data)
+        for callback in (self.on_event, on_event):
+            if callback:
+                callback(event)
+
+
+_default_api = None
+_default_api_lock = threading.Lock()
+
+
+def _daemon_socket_path() -> str:
+    return os.environ.get('PYRUNNER_SOCKET') or os.path.join(os.path.expanduser('~'), '.pyrunner_cache', 'daemon.sock')
+
+
+def _api() -> PyRunnerAPI:
+    global _default_api
+    with _default_api_lock:
+        if _default_api is None:
+            _default_api = PyRunnerAPI()
+        return _default_api
+
 
-def main():
+def ensure_env(config, **kwargs) -> EnvHandle:
+    """Provision or reuse an environment for ``config``; see PyRunnerAPI.ensure_env."""
+    return _api().ensure_env(config, **kwargs)
+
+
+def run(handle: EnvHandle, script: str, args: Optional[List[str]] = None, **kwargs) -> RunResult:
+    """Run a script in a provisioned environment; see PyRunnerAPI.run."""
+    return _api().run(handle, script, args, **kwargs)
+
+
+async def ensure_env_async(config, **kwargs) -> EnvHandle:
+    return await _api().ensure_env_async(config, **kwargs)
+
+
+async def run_async(handle: EnvHandle, script: str, args: Optional[List[str]] = None, **kwargs) -> RunResult:
+    return await _api().run_async(handle, script, args, **kwargs)
+
+
+def main(argv: Optional[List[str]] = None, runner: Optional['PyRunner'] = None):
     parser = argparse.ArgumentParser(
         description="PyRunner - Advanced Python Virtual Environment Manager",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -1006,6 +5993,15 @@ Examples:
     run_parser.add_argument('--watch', action='store_true', help='Enable hot reloading')
     run_parser.add_argument('--env', help='Environment to use')
     run_parser.add_argument('--profile', help='Configuration profile to use')
+    run_parser.add_argument('--artifact-cache', metavar='DIR', help='Shared environment artifact cache directory')
+    run_parser.add_argument('--fast-startup', action='store_true', help='Launch with -I -S and a precomputed bootstrap')
+    run_parser.add_argument('--slim', action='store_true', help='Remove tests and docs from packages after install')
+    run_parser.add_argument('--share-env', action='store_true',
+                            help='Reuse any environment whose locked versions satisfy the config')
+    run_parser.add_argument('--replicas', type=int, default=1, metavar='N', help='Run N copies, each pinned to its own CPUs')
+    run_parser.add_argument('--replica-env', action='append', metavar='KEY=TEMPLATE',
+                            help='Per-replica environment variable, e.g. PORT={8000+i} (repeatable)')
+    run_parser.add_argument('--no-pin', action='store_true', help='Do not set CPU affinity for replicas')
     run_parser.add_argument('packages', nargs='*', help='Packages to install if no config found')
     
     # Install command
@@ -1026,6 +6022,109 @@ Examples:
     doctor_parser = subparsers.add_parser('doctor', help='Diagnose environment issues')
     doctor_parser.add_argument('env', nargs='?', help='Specific environment to check')
     
+    # Matrix command
+    matrix_parser = subparsers.add_parser('matrix', help='Run script across profiles and interpreters in parallel')
+    matrix_parser.add_argument('script', help='Python script to run')
+    matrix_parser.add_argument('-c', '--config', help='Configuration file (default: auto-detect)')
+    matrix_parser.add_argument('--profiles', nargs='+', help='Profiles to run (default: all profiles)')
+    matrix_parser.add_argument('--python', nargs='+', dest='python_versions',
+                               help='Python versions to run (default: config python_version)')
+    matrix_parser.add_argument('-j', '--jobs', type=int, default=4,
+                               help='Maximum environments provisioned concurrently (default: 4)')
+    matrix_parser.add_argument('-e', '--extra', type=str, help='Arguments to pass to target script')
+    
+    # Batch command
+    batch_parser = subparsers.add_parser('batch', help='Run jobs from a YAML manifest')
+    batch_parser.add_argument('manifest', help='Batch manifest file (.yaml)')
+    batch_parser.add_argument('--report', help='JSON report path (default: from manifest)')
+    batch_parser.add_argument('-j', '--jobs', type=int, help='Maximum concurrent jobs')
+    
+    # GC command
+    gc_parser = subparsers.add_parser('gc', help='Deduplicate packages across environments and enforce a disk budget')
+    gc_parser.add_argument('--budget', help='Total disk budget for environments (e.g. 20G); evicts least recently used')
+    gc_parser.add_argument('--no-dedupe', action='store_true', help='Skip hardlink deduplication')
+    gc_parser.add_argument('--dry-run', action='store_true', help='Report what would be reclaimed without changing anything')
+    
+    # Pack/unpack commands
+    pack_parser = subparsers.add_parser('pack', help='Pack environment into a relocatable archive')
+    pack_parser.add_argument('env', help='Environment to pack')
+    pack_parser.add_argument('-o', '--output', help='Archive path (default: <env>.pyrunner.tar.gz)')
+    unpack_parser = subparsers.add_parser('unpack', help='Unpack a packed environment on this host')
+    unpack_parser.add_argument('archive', help='Archive created by pyrunner pack')
+    unpack_parser.add_argument('target', nargs='?', help='Target environment path (default: packed env name)')
+    
+    # Analyze command
+    analyze_parser = subparsers.add_parser('analyze', help='Find packages not imported by the scripts using an environment')
+    analyze_parser.add_argument('env', help='Environment to analyze')
+    analyze_parser.add_argument('--prune', action='store_true', help='Uninstall unused packages and update the lock file')
+    analyze_parser.add_argument('--keep', nargs='+', default=[], help='Packages to always keep (e.g. tools run via -m)')
+    
+    slim_parser = subparsers.add_parser('slim', help='Remove tests, docs and debug symbols from an environment')
+    slim_parser.add_argument('env', help='Environment to slim')
+    slim_parser.add_argument('--keep-tests', action='store_true', help='Keep tests/ and test/ directories')
+    slim_parser.add_argument('--keep-docs', action='store_true', help='Keep docs/, doc/ and examples/ directories')
+    slim_parser.add_argument('--bytecode-only', action='store_true', help='Replace .py sources with .pyc (read-only deployments)')
+    slim_parser.add_argument('--strip', action='store_true', help='Strip debug symbols from shared libraries')
+    slim_parser.add_argument('--keep', nargs='+', default=[], metavar='GLOB', help='site-packages paths never to touch')
+    slim_parser.add_argument('--dry-run', action='store_true', help='Report what would be removed')
+    
+    verify_parser = subparsers.add_parser('verify', help='Verify environment integrity')
+    verify_parser.add_argument('env', help='Environment to verify')
+    verify_parser.add_argument('--deep', action='store_true', help='Check every installed file against its RECORD hash')
+    verify_parser.add_argument('--changed-only', action='store_true',
+                               help='With --deep, only hash files whose mtime or size changed since the last verify')
+    verify_parser.add_argument('--repair', action='store_true', help='Reinstall distributions with damaged files')
+    verify_parser.add_argument('--workers', type=int, metavar='N', help='Hashing threads (default: 2x CPUs, max 32)')
+
+    profile_imports_parser = subparsers.add_parser('profile-imports',
+                                                   help='Profile import time per distribution against a baseline')
+    profile_imports_parser.add_argument('script', help='Python script whose imports to profile')
+    profile_imports_parser.add_argument('--env', help='Environment to use (default: <script>_env)')
+    profile_imports_parser.add_argument('--runs', type=int, default=3, help='Runs per profile, fastest kept (default: 3)')
+    profile_imports_parser.add_argument('--full', action='store_true',
+                                        help='Run the whole script instead of only its module-level imports')
+    profile_imports_parser.add_argument('--set-baseline', action='store_true', help='Store this profile as the new baseline')
+    profile_imports_parser.add_argument('--threshold', type=float, default=20, metavar='PCT',
+                                        help='Flag distributions at least PCT%% slower than the baseline (default: 20)')
+    profile_imports_parser.add_argument('--min-ms', type=float, default=5, metavar='MS',
+                                        help='Ignore slowdowns smaller than MS milliseconds (default: 5)')
+    
+    startup_parser = subparsers.add_parser('startup', help='Build the fast-startup bootstrap for an environment')
+    startup_parser.add_argument('env', help='Environment to prepare')
+    startup_parser.add_argument('--module-index', action='store_true', default=None,
+                                help='Also index module locations so imports skip sys.path scans')
+    startup_parser.add_argument('--no-module-index', dest='module_index', action='store_false',
+                                help='Drop a previously built module index')
+    startup_parser.add_argument('--bench', action='store_true', help='Benchmark default vs fast startup')
+    startup_parser.add_argument('--runs', type=int, default=10, help='Benchmark runs per mode (default: 10)')
+    startup_parser.add_argument('--imports', nargs='+', metavar='MODULE',
+                                help='Modules the benchmark imports (default: all installed top-level packages)')
+    
+    logs_parser = subparsers.add_parser('logs', help='Query run logs written with --log')
+    logs_parser.add_argument('target', help='Script, run-log name or run-log directory')
+    logs_parser.add_argument('--dir', default='./logs/', help='Log directory given to --log (default: ./logs/)')
+    logs_parser.add_argument('--runs', action='store_true', help='List matching runs instead of log lines')
+    logs_parser.add_argument('--run', action='append', metavar='ID', help='Only this run (repeatable)')
+    logs_parser.add_argument('--pid', type=int, action='append', help='Only runs that started this PID (repeatable)')
+    logs_parser.add_argument('--exit-code', type=int, metavar='N', help='Only runs that exited with N')
+    logs_parser.add_argument('--failed', action='store_true', help='Only runs that failed, errored or were interrupted')
+    logs_parser.add_argument('--since', metavar='TIME', help='Start of the time range: 30m, 2h, 7d or an ISO timestamp')
+    logs_parser.add_argument('--until', metavar='TIME', help='End of the time range')
+    logs_parser.add_argument('--grep', metavar='REGEX', help='Only lines matching REGEX')
+    logs_parser.add_argument('--tail', type=int, metavar='N', help='Only the last N matching lines')
+    
+    metrics_parser = subparsers.add_parser('metrics', help='Show or serve PyRunner metrics in Prometheus format')
+    metrics_parser.add_argument('action', choices=['show', 'serve', 'reset'], nargs='?', default='show',
+                                help='serve answers GET /metrics over HTTP on a Unix socket')
+    metrics_parser.add_argument('--socket', metavar='PATH',
+                                help='Socket for serve (default: ~/.pyrunner_cache/metrics.sock)')
+    metrics_parser.add_argument('--textfile', metavar='PATH',
+                                help='Also write a textfile-collector file (or PYRUNNER_METRICS_TEXTFILE)')
+    
+    daemon_parser = subparsers.add_parser('daemon', help='Manage the persistent PyRunner daemon')
+    daemon_parser.add_argument('action', choices=['start', 'stop', 'status', 'serve'],
+                               help='serve runs the daemon in the foreground')
+    
     # Traditional arguments
     parser.add_argument('-f', '--file', type=str, help='Python script to run')
     parser.add_argument('-c', '--config', type=str, 
@@ -1046,10 +6145,28 @@ Examples:
                        help='Watch dependency files for changes')
     parser.add_argument('--reset', type=str, metavar='LOCATION',
                        help='Reset virtual environment at specified location')
+    parser.add_argument('--fast-startup', action='store_true',
+                       help='Launch the script with -I -S and a precomputed bootstrap')
+    parser.add_argument('--slim', action='store_true',
+                       help='Remove tests and docs from installed packages (or use the slim rules in config.yaml)')
+    parser.add_argument('--share-env', action='store_true',
+                       help='Reuse any environment whose locked versions satisfy the config (ignored with --env)')
+    parser.add_argument('--replicas', type=int, default=1, metavar='N',
+                       help='Run N copies of the script, each pinned to its own CPUs')
+    parser.add_argument('--replica-env', action='append', metavar='KEY=TEMPLATE',
+                       help='Per-replica environment variable, e.g. PORT={8000+i} or WORKER_ID={i} (repeatable)')
+    parser.add_argument('--no-pin', action='store_true',
+                       help='Do not set CPU affinity for replicas')
+    parser.add_argument('--pipeline', action='store_true',
+                       help='Install dependencies through the pipelined fetch/build/install stages')
+    parser.add_argument('--artifact-cache', type=str, metavar='DIR',
+                       help='Shared environment artifact cache directory (or PYRUNNER_ARTIFACT_CACHE)')
     parser.add_argument('--force-update', action='store_true',
                        help='Force update dependencies even if they appear unchanged')
     parser.add_argument('--list-envs', action='store_true',
                        help='List all PyRunner environments')
+    parser.add_argument('--list-interpreters', action='store_true',
+                       help='List discovered Python interpreters')
     parser.add_argument('--cleanup-envs', type=int, metavar='DAYS',
                        help='Cleanup environments unused for specified days')
     parser.add_argument('--clone-env', nargs=2, metavar=('SOURCE', 'TARGET'),
@@ -1060,13 +6177,17 @@ Examples:
                        help='Auto-fix environment issues')
     parser.add_argument('--health-check', action='store_true',
                        help='Check health of all environments')
+    parser.add_argument('--max-concurrency', type=int, metavar='N',
+                       help='Maximum concurrent subprocesses (default: 8 or PYRUNNER_MAX_CONCURRENCY)')
     parser.add_argument('--debug', action='store_true',
                        help='Enable debug mode with verbose error messages')
     parser.add_argument('--version', action='version', version='PyRunner 2.0.0')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
-    runner = PyRunner()
+    runner = runner or PyRunner()
+    if args.max_concurrency:
+        runner.orchestrator.max_concurrency = args.max_concurrency
     
     try:
         # Handle quick commands
@@ -1075,26 +6196,367 @@ Examples:
             if not config_path and args.packages:
                 config_path = runner.create_quick_config(args.script, args.packages)
             elif not config_path:
-                print("❌ No configuration file found and no packages specified")
-                print("💡 Create requirements.txt or specify packages: pyrunner run script.py flask requests")
-                return 1
+                if not Path(args.script).exists():
+                    raise PyRunnerError(runner.enhanced_error_message(
+                        Exception(f"Script file not found: {args.script}"), args.script))
+                existing_env = Path(args.env or f"{Path(args.script).stem}_env")
+                packages, unresolved = runner.infer_dependencies(args.script, runner.get_python_path(existing_env))
+                print(f"🔎 Inferred {len(packages)} packages from imports: {', '.join(packages) or 'none'}")
+                if unresolved:
+                    print(f"❓ No known package provides: {', '.join(unresolved)}")
+                    answer = ''
+                    if sys.stdin.isatty():
+                        answer = input("   Install packages with these exact names from the index? [y/N] ")
+                    if answer.strip().lower() not in ('y', 'yes'):
+                        raise PyRunnerError(f"Unresolved imports: {', '.join(unresolved)}. List the packages to install, "
+                                            f"e.g. pyrunner run {args.script} {' '.join(packages + unresolved)}")
+                    packages += unresolved
+                config_path = runner.create_quick_config(args.script, packages)
             
             script_name = Path(args.script).stem
             env_path = Path(args.env or f"{script_name}_env")
             
-            config = runner.parse_config(config_path)
-            if args.profile and args.profile in config.get('profiles', {}):
-                config['active_profile'] = args.profile
+            config = runner.parse_config(config_path, args.profile)
+            if args.artifact_cache:
+                config['artifact_cache'] = args.artifact_cache
+            if args.slim and not config.get('slim'):
+                config['slim'] = True
             
-            runner.create_virtual_environment(env_path, config['python_version'])
-            runner.install_dependencies(env_path, config)
+            shared_env = bool(args.share_env or config.get('share_env')) and not args.env
+            if shared_env:
+                config['share_env'] = True
+                env_path, status = runner.provision_shared_environment(config)
+                print(f"♻️  Using shared environment {env_path} ({status})")
+            else:
+                runner.provision_environment(env_path, config)
+            replica_env = runner.parse_replica_env(args.replica_env)
             
             if args.watch:
                 runner.run_script_with_watch(args.script, env_path, config_path, 
-                                           env_vars=config['environment_variables'])
+                                           env_vars=config['environment_variables'],
+                                           replicas=args.replicas, replica_env=replica_env,
+                                           pin_cpus=not args.no_pin, profile=args.profile,
+                                           resource_limits=config.get('resource_limits'), shared_env=shared_env)
             else:
                 return runner.run_script(args.script, env_path, 
-                                       env_vars=config['environment_variables'])
+                                       env_vars=config['environment_variables'],
+                                       fast_startup=args.fast_startup or config.get('fast_startup', False),
+                                       replicas=args.replicas, replica_env=replica_env,
+                                       pin_cpus=not args.no_pin,
+                                       resource_limits=config.get('resource_limits'))
+        
+        elif args.command == 'matrix':
+            config_path = args.config or runner.smart_auto_detect_config(args.script)
+            if not config_path:
+                print("❌ No configuration file found")
+                print("💡 Create config.yaml/requirements.txt or pass one with -c")
+                return 1
+            
+            extra_args = runner.parse_extra_args(args.extra) if args.extra else []
+            results = runner.run_matrix(args.script, config_path, args.profiles, args.python_versions,
+                                        extra_args, args.jobs)
+            
+            label_width = max(20, max(len(result.label) for result in results) + 2)
+            print(f"\n{'Combination':<{label_width}} {'Exit':<6} {'Provision':<11} {'Run':<9} {'Environment'}")
+            print("-" * (label_width + 50))
+            for result in results:
+                exit_code = str(result.exit_code) if result.exit_code is not None else 'error'
+                provision_time = f"{result.provision_seconds:.1f}s"
+                run_time = f"{result.run_seconds:.1f}s"
+                print(f"{result.label:<{label_width}} {exit_code:<6} {provision_time:<11} {run_time:<9} {result.env_path}")
+                if result.error:
+                    print(f"{'':<{label_width}} ❌ {result.error}")
+            
+            return 0 if all(result.exit_code == 0 for result in results) else 1
+        
+        elif args.command == 'batch':
+            results = runner.run_batch(args.manifest, args.report, args.jobs)
+            return 0 if all(result.status == 'success' for result in results) else 1
+        
+        elif args.command == 'gc':
+            report = runner.garbage_collect(args.budget, not args.no_dedupe, args.dry_run)
+            mb = 1024 * 1024
+            prefix = "Would reclaim" if args.dry_run else "Reclaimed"
+            print("🧹 PyRunner Garbage Collection")
+            print("=" * 50)
+            print(f"   Environments scanned: {report.envs_scanned}")
+            print(f"   Files hardlinked into store: {report.files_linked} ({report.bytes_deduplicated / mb:.1f}MB)")
+            print(f"   Orphaned store entries: {report.store_entries_pruned} ({report.bytes_pruned / mb:.1f}MB)")
+            if args.budget:
+                evicted = ', '.join(report.evicted_envs) or 'none'
+                print(f"   Evicted environments: {evicted} ({report.bytes_evicted / mb:.1f}MB)")
+                print(f"   Usage after eviction: {report.usage_bytes / mb:.1f}MB (budget {args.budget})")
+            print(f"✅ {prefix} {report.bytes_reclaimed / mb:.1f}MB")
+            return 0
+        
+        elif args.command == 'pack':
+            started = time.time()
+            archive = runner.pack_environment(Path(args.env), Path(args.output) if args.output else None)
+            size_mb = archive.stat().st_size / (1024 * 1024)
+            print(f"📦 Packed {args.env} into {archive} ({size_mb:.1f}MB, {time.time() - started:.1f}s)")
+            return 0
+        
+        elif args.command == 'unpack':
+            started = time.time()
+            env_path = runner.unpack_environment(Path(args.archive), Path(args.target) if args.target else None)
+            print(f"✅ Unpacked environment into {env_path} ({time.time() - started:.1f}s)")
+            return 0
+        
+        elif args.command == 'analyze':
+            env_path = runner.find_environment(args.env)
+            analysis = runner.analyze_dependencies(env_path, args.keep)
+            mb = 1024 * 1024
+            print(f"🔍 Import analysis for {env_path.name} ({len(analysis.scripts)} scripts)")
+            print(f"   Needed packages: {len(analysis.needed)}")
+            if analysis.unresolved_imports:
+                print(f"   ⚠️  Imports without an installed distribution: {', '.join(analysis.unresolved_imports)}")
+            if not analysis.unused:
+                print("✅ No unused packages found")
+                return 0
+            
+            total = sum(package['size_bytes'] for package in analysis.unused)
+            print(f"\n{'Unused package':<30} {'Version':<15} {'Size (MB)':<10}")
+            print("-" * 57)
+            for package in analysis.unused:
+                print(f"{package['name']:<30} {package['version'] or '?':<15} {package['size_bytes'] / mb:<10.1f}")
+            print(f"\n   Total: {len(analysis.unused)} packages, {total / mb:.1f}MB")
+            
+            if args.prune:
+                removed = runner.prune_unused_packages(env_path, analysis)
+                print(f"🗑️  Removed {len(removed)} packages and updated the lock file")
+            else:
+                print("💡 Run with --prune to remove them")
+            return 0
+        
+        elif args.command == 'slim':
+            env_path = Path(args.env)
+            if not runner.get_python_path(env_path).exists():
+                print(f"❌ Environment not found: {env_path}")
+                return 1
+            rules = {'tests': not args.keep_tests, 'docs': not args.keep_docs, 'bytecode_only': args.bytecode_only,
+                     'strip': args.strip, 'keep': args.keep}
+            report = runner.slim_environment(env_path, rules, args.dry_run)
+            mb = 1024 * 1024
+            prefix = "Would save" if args.dry_run else "Saved"
+            print(f"✂️  Slimming {env_path.name}")
+            print(f"   Removed files: {report.files_removed} ({report.bytes_removed / mb:.1f}MB)")
+            if args.bytecode_only:
+                print(f"   Sources replaced with bytecode: {report.sources_replaced} ({report.bytes_replaced / mb:.1f}MB)")
+            if args.strip:
+                print(f"   Libraries stripped: {report.libraries_stripped} ({report.bytes_stripped / mb:.1f}MB)")
+            if not args.dry_run:
+                print(f"   RECORD rows updated: {report.records_updated}")
+            print(f"✅ {prefix} {report.bytes_saved / mb:.1f}MB")
+            return 0
+        
+        elif args.command == 'verify':
+            env_path = Path(args.env)
+            is_valid, issues = runner.validate_environment(env_path)
+            if not is_valid:
+                print(f"❌ Environment {env_path} has issues:")
+                for issue in issues:
+                    print(f"   • {issue}")
+                return 1
+            if not args.deep:
+                print(f"✅ Environment {env_path} is valid (use --deep to check installed files)")
+                return 0
+            
+            report = runner.verify_environment_files(env_path, args.changed_only, args.workers)
+            print(f"🔍 Verified {report.files_checked} files ({report.bytes_hashed / (1024 * 1024):.1f}MB) "
+                  f"in {report.duration_seconds:.1f}s, skipped {report.files_skipped}")
+            if report.unverifiable:
+                print(f"   ⚠️  No RECORD, not verifiable: {', '.join(report.unverifiable)}")
+            if report.ok:
+                print("✅ All installed files match their RECORD hashes")
+                return 0
+            
+            print(f"❌ {len(report.problems)} damaged files:")
+            for problem in report.problems[:20]:
+                print(f"   • [{problem['distribution']}] {problem['path']}: {problem['issue']}")
+            if len(report.problems) > 20:
+                print(f"   ... and {len(report.problems) - 20} more")
+            for name, reason in report.unrepairable.items():
+                print(f"   ⚠️  {name}: {reason}")
+            if not report.repairable:
+                return 1
+            if not args.repair:
+                print(f"💡 Repairable by reinstalling: {', '.join(report.repairable.values())} (run with --repair)")
+                return 1
+            
+            print(f"🔧 Reinstalling {len(report.repairable)} distributions...")
+            runner.repair_distributions(env_path, list(report.repairable.values()))
+            report = runner.verify_environment_files(env_path, changed_only=True, workers=args.workers)
+            if report.ok:
+                print("✅ Repaired, all installed files match their RECORD hashes")
+                return 0
+            print(f"❌ {len(report.problems)} damaged files remain")
+            return 1
+        
+        elif args.command == 'profile-imports':
+            env_path = Path(args.env or f"{Path(args.script).stem}_env")
+            if not runner.get_python_path(env_path).exists():
+                print(f"❌ Environment not found: {env_path}")
+                print(f"💡 Run the script once with 'pyrunner run {args.script}' or pass --env")
+                return 1
+            profile = runner.profile_imports(args.script, env_path, args.runs, args.full)
+            baseline = runner.record_import_profile(env_path, profile, args.set_baseline)
+            distributions = profile['distributions']
+            print(f"⏱️  Import profile of {Path(args.script).name} in {env_path.name} "
+                  f"({profile['total_ms']:.1f}ms, fastest of {profile['runs']} runs)")
+            
+            def show(name, elapsed_ms, indent, seen):
+                dist = distributions[name]
+                branch = f"{'   ' * indent}{'└─ ' if indent else ''}"
+                if name in ('stdlib', 'not installed'):
+                    # Shared by every importer, so only the time spent on behalf of this branch is meaningful
+                    print(f"{branch}{name}: {elapsed_ms:.1f}ms")
+                    return
+                version = f" {dist['version']}" if dist['version'] else ""
+                print(f"{branch}{name}{version}: {elapsed_ms:.1f}ms (self {dist['self_ms']:.1f}ms, {dist['modules']} modules)")
+                for child, child_ms in sorted(dist['imports'].items(), key=lambda item: -item[1]):
+                    if child not in seen and child_ms >= 0.1:
+                        show(child, child_ms, indent + 1, seen | {child})
+            
+            for root, root_ms in sorted(profile['roots'].items(), key=lambda item: -item[1]):
+                show(root, root_ms, 0, {root})
+            
+            if baseline is None:
+                print(f"\n📌 Stored as baseline in {env_path / '.pyrunner' / 'import_profiles.json'}")
+                return 0
+            regressions = runner.compare_import_profiles(baseline, profile, args.threshold / 100, args.min_ms)
+            baseline_date = datetime.fromtimestamp(baseline['timestamp']).strftime('%Y-%m-%d %H:%M')
+            print(f"\n📊 Baseline from {baseline_date}: {baseline['total_ms']:.1f}ms -> {profile['total_ms']:.1f}ms")
+            if not regressions:
+                print("✅ No distribution got slower")
+                return 0
+            print(f"🐢 {len(regressions)} distributions got slower:")
+            for regression in regressions:
+                update = ""
+                if regression['updated']:
+                    update = f" after update {regression['baseline_version']} -> {regression['current_version']}"
+                print(f"   • {regression['distribution']}: {regression['baseline_ms']:.1f}ms -> "
+                      f"{regression['current_ms']:.1f}ms (+{regression['delta_ms']:.1f}ms){update}")
+            return 1
+        
+        elif args.command == 'startup':
+            env_path = Path(args.env)
+            if not runner.get_python_path(env_path).exists():
+                print(f"❌ Environment not found: {env_path}")
+                return 1
+            manifest = runner.build_startup_bootstrap(env_path, args.module_index)
+            print(f"⚡ Startup bootstrap built for {env_path.name} in {manifest['build_seconds']:.2f}s")
+            print(f"   sys.path entries: {manifest['sys_path_entries']}, .pth imports: {manifest['pth_imports']}, "
+                  f"indexed modules: {manifest['indexed_modules']}")
+            if args.bench:
+                report = runner.benchmark_startup(env_path, args.imports, args.runs)
+                print(f"\n⏱️  Startup benchmark ({report['modules']} imports, {report['runs']} runs each)")
+                print(f"{'Mode':<10} {'Median (ms)':<12} {'Mean (ms)':<12} {'Min (ms)':<10}")
+                print("-" * 46)
+                for mode in ('default', 'fast'):
+                    print(f"{mode:<10} {report[mode]['median_ms']:<12.1f} {report[mode]['mean_ms']:<12.1f} "
+                          f"{report[mode]['min_ms']:<10.1f}")
+                print(f"\n   Speedup: {report['speedup']:.2f}x")
+            return 0
+        
+        elif args.command == 'logs':
+            store = runner.resolve_run_log(args.target, args.dir)
+            since = runner._parse_time_spec(args.since) if args.since else None
+            until = runner._parse_time_spec(args.until) if args.until else None
+            run_ids = set(args.run) if args.run else None
+            if args.runs or args.pid or args.exit_code is not None or args.failed:
+                matches = store.find_runs(args.pid, args.exit_code, args.failed, since, until)
+                if run_ids is not None:
+                    matches = [run for run in matches if run['run'] in run_ids]
+                if args.runs:
+                    if not matches:
+                        print("ℹ️  No matching runs")
+                        return 0
+                    print(f"{'Run':<24} {'Started':<20} {'Duration':<10} {'Exit':<6} {'Result':<12} PIDs")
+                    print("-" * 88)
+                    for run in matches:
+                        started = datetime.fromtimestamp(run['started']).strftime('%Y-%m-%d %H:%M:%S') \
+                            if run['started'] else '-'
+                        duration = f"{run['finished'] - run['started']:.1f}s" \
+                            if run['finished'] and run['started'] else '-'
+                        exit_code = '-' if run['exit_code'] is None else str(run['exit_code'])
+                        pids = ', '.join(str(pid) for pid in run['pids']) or '-'
+                        print(f"{run['run']:<24} {started:<20} {duration:<10} {exit_code:<6} "
+                              f"{run['result'] or 'running':<12} {pids}")
+                    return 0
+                run_ids = {run['run'] for run in matches}
+                if not run_ids:
+                    print("ℹ️  No matching runs")
+                    return 0
+            
+            pattern = re.compile(args.grep) if args.grep else None
+            lines = (line for line in store.read_lines(run_ids, since, until, reverse=bool(args.tail))
+                     if not pattern or pattern.search(line['message']))
+            if args.tail:
+                lines = reversed(list(itertools.islice(lines, args.tail)))
+            for line in lines:
+                stamp = datetime.fromtimestamp(line['time']).strftime('%Y-%m-%d %H:%M:%S,%f')[:-3]
+                print(f"{stamp} - {line['level']} - [{line['run']}] {line['message']}")
+            return 0
+        
+        elif args.command == 'metrics':
+            if args.action == 'reset':
+                with runner.metrics._state_lock():
+                    for name in ('metrics.json', 'metrics.prom'):
+                        (runner.cache_dir / name).unlink(missing_ok=True)
+                print("🧹 Metrics reset")
+                return 0
+            runner.metrics.flush(args.textfile)
+            if args.action == 'serve':
+                runner.metrics.serve(Path(args.socket) if args.socket else runner.cache_dir / 'metrics.sock')
+                return 0
+            print(runner.metrics.render(), end='')
+            return 0
+        
+        elif args.command == 'daemon':
+            socket_path = Path(_daemon_socket_path())
+            if args.action == 'serve':
+                PyRunnerDaemon(runner, socket_path).serve()
+                return 0
+            
+            status = PyRunnerDaemon.control(socket_path, 'status')
+            if args.action == 'start':
+                if status:
+                    print(f"✅ Daemon already running (PID: {status['pid']})")
+                    return 0
+                log_path = runner.cache_dir / 'daemon.log'
+                with open(log_path, 'a') as log:
+                    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), 'daemon', 'serve'],
+                                               stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+                                               start_new_session=True)
+                deadline = time.time() + 30
+                while time.time() < deadline and process.poll() is None:
+                    status = PyRunnerDaemon.control(socket_path, 'status')
+                    if status:
+                        print(f"🛰️  Daemon started (PID: {status['pid']}, socket: {socket_path})")
+                        return 0
+                    time.sleep(0.1)
+                print(f"❌ Daemon failed to start, see {log_path}")
+                return 1
+            
+            if not status:
+                print("ℹ️  Daemon is not running")
+                return 0 if args.action == 'stop' else 1
+            if args.action == 'stop':
+                PyRunnerDaemon.control(socket_path, 'stop')
+                deadline = time.time() + 10
+                while socket_path.exists() and time.time() < deadline:
+                    time.sleep(0.1)
+                print(f"⏹️  Daemon stopped (PID: {status['pid']})")
+                return 0
+            
+            print(f"🛰️  PyRunner daemon (PID: {status['pid']})")
+            print(f"   Socket: {status['socket']}")
+            print(f"   Uptime: {timedelta(seconds=int(status['uptime_seconds']))}")
+            print(f"   Requests served: {status['requests_served']}")
+            print(f"   Cached configs: {status['cached_configs']}, validated envs: {status['validated_envs']}, "
+                  f"env info: {status['cached_env_info']}")
+            print(f"   Interpreters: {status['interpreters']}, watched directories: {status['watched_dirs']}")
+            return 0
         
         elif args.command == 'install':
             env_path = Path(args.env or 'current_env')
@@ -1120,7 +6582,7 @@ Examples:
         
         elif args.command == 'doctor':
             if args.env:
-                env_path = Path(args.env)
+                env_path = runner.find_environment(args.env)
                 issues = runner.doctor_diagnose(env_path)
             else:
                 issues = runner.doctor_diagnose()
@@ -1177,6 +6639,19 @@ Examples:
                 print(f"{env.name:<20} {env.size_mb:<10.1f} {env.dependency_count:<12} {scripts_count:<8} {last_used:<12}")
             return 0
         
+        if args.list_interpreters:
+            interpreters = runner.discover_interpreters(refresh=True)
+            if not interpreters:
+                print("No Python interpreters found.")
+                return 0
+            
+            print(f"\n{'Version':<10} {'Implementation':<15} {'ABI':<32} {'Path'}")
+            print("-" * 90)
+            for interpreter in interpreters:
+                print(f"{interpreter.version:<10} {interpreter.implementation:<15} "
+                      f"{interpreter.abi_tag or '-':<32} {interpreter.path}")
+            return 0
+        
         if args.cleanup_envs is not None:
             cleaned = runner.cleanup_unused_environments(args.cleanup_envs)
             if cleaned:
@@ -1249,28 +6724,43 @@ Examples:
         
         # Parse configuration
         config = runner.parse_config(args.config)
+        if args.pipeline:
+            config['pipeline'] = True
+        if args.slim and not config.get('slim'):
+            config['slim'] = True
         
-        # Apply template if specified
-        if config.get('template'):
-            template_path = Path(config['template'])
-            if template_path.exists():
-                if runner.logger:
-                    runner.logger.info(f"Using template: {template_path}")
-                runner.clone_environment(template_path, env_path)
-        
-        # Create virtual environment
-        runner.create_virtual_environment(env_path, config['python_version'])
+        if args.artifact_cache:
+            config['artifact_cache'] = args.artifact_cache
         
-        # Install dependencies
-        runner.install_dependencies(env_path, config, args.force_update)
+        shared_env = bool(args.share_env or config.get('share_env')) and not (args.env or args.location
+                                                                             or args.force_update)
+        if shared_env:
+            config['share_env'] = True
+            # Reuse (or extend) any indexed environment that already satisfies the config
+            env_path, status = runner.provision_shared_environment(config)
+            print(f"♻️  Using shared environment {env_path} ({status})")
+        else:
+            # Apply template if specified
+            if config.get('template'):
+                template_path = Path(config['template'])
+                if template_path.exists():
+                    if runner.logger:
+                        runner.logger.info(f"Using template: {template_path}")
+                    runner.clone_environment(template_path, env_path)
+            
+            # Create virtual environment and install dependencies
+            runner.provision_environment(env_path, config, args.force_update)
         
         # Parse extra arguments
         extra_args = runner.parse_extra_args(args.extra) if args.extra else []
+        replica_env = runner.parse_replica_env(args.replica_env)
         
         # Run with hot reloading if requested
         if args.watch or args.watch_deps:
             runner.run_script_with_watch(args.file, env_path, args.config, 
-                                       extra_args, config['environment_variables'])
+                                       extra_args, config['environment_variables'],
+                                       args.replicas, replica_env, not args.no_pin,
+                                       resource_limits=config.get('resource_limits'), shared_env=shared_env)
             return 0
         
         # Run script normally
@@ -1279,7 +6769,12 @@ Examples:
             env_path, 
             extra_args, 
             args.pid, 
-            config['environment_variables']
+            config['environment_variables'],
+            args.fast_startup or config.get('fast_startup', False),
+            args.replicas,
+            replica_env,
+            not args.no_pin,
+            config.get('resource_limits')
         )
         
         if not args.pid:
@@ -1296,8 +6791,10 @@ Examples:
             print(error_lines[0])
             if len(error_lines) > 1:
                 print("💡 Run with --debug for detailed suggestions")
+        runner.finish_run('error')
         return 1
     except KeyboardInterrupt:
+        runner.finish_run('interrupted')
         print("\n⏹️  Operation cancelled by user")
         return 1
     except Exception as e:
@@ -1308,7 +6805,12 @@ Examples:
         else:
             print(f"💥 Unexpected error: {e}")
             print("💡 Run with --debug for full traceback")
+        runner.finish_run('error')
         return 1
+    finally:
+        # Paths that never reach run_script (or return before it) end the run without a verdict
+        runner.finish_run('ended')
+        runner.metrics.flush()
 
 
 if __name__ == "__main__":
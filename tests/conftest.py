@@ -0,0 +1,57 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ['PYRUNNER_NO_DAEMON'] = '1'
+
+import pyrunner  # noqa: E402
+
+
+@pytest.fixture
+def runner(tmp_path, monkeypatch):
+    """A PyRunner whose cache directory lives under the test's tmp_path."""
+    monkeypatch.setenv('HOME', str(tmp_path / 'home'))
+    (tmp_path / 'home').mkdir()
+    return pyrunner.PyRunner()
+
+
+@pytest.fixture
+def bare_env(tmp_path):
+    """A pip-less virtual environment, fast to create and enough for interpreter-level checks."""
+    import venv
+    env_path = tmp_path / 'env'
+    venv.create(env_path, with_pip=False)
+    (env_path / '.pyrunner').mkdir()
+    return env_path
+
+
+def record_hash(content: bytes) -> str:
+    import base64
+    import hashlib
+    return 'sha256=' + base64.urlsafe_b64encode(hashlib.sha256(content).digest()).rstrip(b'=').decode()
+
+
+@pytest.fixture
+def make_dist():
+    """Install a fake distribution with a correct RECORD into an environment's site-packages."""
+    def make(runner, env_path, name, files, version='1.0'):
+        site_packages = runner._site_packages_dirs(env_path)[0]
+        dist_info = site_packages / f"{name}-{version}.dist-info"
+        dist_info.mkdir(parents=True)
+        (dist_info / 'METADATA').write_text(f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n")
+        (dist_info / 'top_level.txt').write_text(f"{name}\n")
+        rows = []
+        for relative_path, content in files.items():
+            file_path = site_packages / relative_path
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_bytes(content)
+            rows.append(f"{relative_path},{record_hash(content)},{len(content)}")
+        for meta in ('METADATA', 'top_level.txt'):
+            rows.append(f"{dist_info.name}/{meta},,")
+        rows.append(f"{dist_info.name}/RECORD,,")
+        (dist_info / 'RECORD').write_text('\n'.join(rows) + '\n')
+        return site_packages
+    return make
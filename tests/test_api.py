@@ -0,0 +1,70 @@
+import asyncio
+import sys
+
+import pytest
+
+import pyrunner
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path / 'home'))
+    (tmp_path / 'home').mkdir()
+    return pyrunner.PyRunnerAPI(envs_dir=str(tmp_path / 'envs'), max_concurrency=4)
+
+
+@pytest.fixture
+def handle(bare_env):
+    return pyrunner.EnvHandle(path=str(bare_env), python=sys.executable, config_hash='0' * 64,
+                              python_version='3', status='up_to_date', env_vars={'API_FLAG': 'handle'},
+                              provision_seconds=0.0)
+
+
+def test_equal_configs_share_an_environment_and_report_events(api, monkeypatch):
+    provisioned = []
+    monkeypatch.setattr(api._runner, 'provision_environment',
+                        lambda env_path, config, force_update=False: provisioned.append(env_path) or 'built')
+    events = []
+
+    first = api.ensure_env(['six==1.16.0'], on_event=events.append)
+    second = api.ensure_env({'dependencies': ['six==1.16.0']})
+
+    assert first.path == second.path == str(api.envs_dir / first.config_hash[:16])
+    assert first.status == 'built' and len(provisioned) == 2
+    assert [event.kind for event in events] == ['provision_started', 'provision_finished']
+    assert events[-1].data['status'] == 'built'
+
+
+def test_failed_provisioning_raises_and_emits_an_error_event(api, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("no network")
+
+    monkeypatch.setattr(api._runner, 'provision_environment', fail)
+    events = []
+
+    with pytest.raises(pyrunner.PyRunnerError, match="no network"):
+        api.ensure_env(['six'], on_event=events.append)
+    assert events[-1].kind == 'provision_failed' and events[-1].level == 'error'
+
+
+def test_sync_and_async_runs_capture_output(api, handle, tmp_path):
+    script = tmp_path / 'job.py'
+    script.write_text("import os, sys, time\n"
+                      "time.sleep(float(sys.argv[2]))\n"
+                      "print(os.environ['API_FLAG'], sys.argv[1])\n")
+
+    result = api.run(handle, str(script), ['sync', '0'], env_vars={'API_FLAG': 'call'})
+    assert result.ok and result.stdout == "call sync\n" and result.args == ['sync', '0']
+
+    async def gather():
+        return await asyncio.gather(*(api.run_async(handle, str(script), [str(i), '0']) for i in range(4)),
+                                    api.run_async(handle, str(script), ['slow', '30'], timeout=0.5))
+
+    *results, slow = asyncio.run(gather())
+    assert [r.stdout for r in results] == [f"handle {i}\n" for i in range(4)]
+    assert slow.timed_out and not slow.ok
+
+
+def test_missing_script_is_rejected_before_running(api, handle, tmp_path):
+    with pytest.raises(pyrunner.PyRunnerError, match="Script file not found"):
+        api.run(handle, str(tmp_path / 'missing.py'))
@@ -0,0 +1,103 @@
+import json
+import os
+import platform
+import time
+
+import pytest
+
+import pyrunner
+
+
+def test_cache_hit_refuses_to_replace_a_foreign_directory(runner, tmp_path):
+    env_path = tmp_path / 'project'
+    env_path.mkdir()
+    (env_path / 'notes.txt').write_text("keep me")
+
+    with pytest.raises(pyrunner.PyRunnerError, match='not a PyRunner environment'):
+        runner._replace_from_artifact(env_path, tmp_path / 'env.tar.gz')
+    assert (env_path / 'notes.txt').read_text() == "keep me"
+
+
+def test_cache_hit_restores_the_old_env_when_unpacking_fails(runner, bare_env, tmp_path, monkeypatch):
+    (bare_env / '.pyrunner' / 'config.json').write_text('{}')
+
+    def broken_unpack(archive_path, target_env=None):
+        target_env.mkdir()
+        raise pyrunner.PyRunnerError("corrupt archive")
+
+    monkeypatch.setattr(runner, 'unpack_environment', broken_unpack)
+    with pytest.raises(pyrunner.PyRunnerError, match='corrupt archive'):
+        runner._replace_from_artifact(bare_env, tmp_path / 'env.tar.gz')
+    assert (bare_env / '.pyrunner' / 'config.json').exists()
+    assert [path.name for path in tmp_path.iterdir() if path.name.startswith('.')] == []
+
+
+def test_cache_hit_swaps_in_the_unpacked_env(runner, bare_env, tmp_path, monkeypatch):
+    (bare_env / '.pyrunner' / 'config.json').write_text('{"old": true}')
+
+    def unpack(archive_path, target_env=None):
+        (target_env / '.pyrunner').mkdir(parents=True)
+        (target_env / '.pyrunner' / 'config.json').write_text('{"old": false}')
+        return target_env
+
+    monkeypatch.setattr(runner, 'unpack_environment', unpack)
+    runner._replace_from_artifact(bare_env, tmp_path / 'env.tar.gz')
+    assert json.loads((bare_env / '.pyrunner' / 'config.json').read_text()) == {'old': False}
+    assert [path.name for path in tmp_path.iterdir() if path.name.startswith('.')] == []
+
+
+def test_stale_lock_is_broken_once_and_fresh_locks_survive(runner, tmp_path):
+    cache_dir = tmp_path / 'artifacts'
+    cache_dir.mkdir()
+    lock_path = cache_dir / 'artifact.lock'
+    lock_path.write_text(json.dumps({'host': 'elsewhere', 'pid': 1}))
+    old = time.time() - 3600
+    os.utime(lock_path, (old, old))
+
+    assert runner._acquire_artifact_lock(lock_path) is False
+    assert not lock_path.exists()
+    assert runner._acquire_artifact_lock(lock_path) is True
+    assert runner._acquire_artifact_lock(lock_path) is False
+    assert lock_path.exists()
+    assert [path.name for path in cache_dir.iterdir()] == ['artifact.lock']
+
+
+def test_release_leaves_locks_taken_over_by_other_hosts(runner, tmp_path):
+    lock_path = tmp_path / 'artifact.lock'
+    lock_path.write_text(json.dumps({'host': platform.node(), 'pid': os.getpid() + 1}))
+    runner._release_artifact_lock(lock_path)
+    assert lock_path.exists()
+
+    lock_path.unlink()
+    assert runner._acquire_artifact_lock(lock_path)
+    runner._release_artifact_lock(lock_path)
+    assert not lock_path.exists()
+
+
+def test_cache_hit_from_another_patch_release_is_up_to_date_afterwards(runner, tmp_path, monkeypatch):
+    cache_dir = tmp_path / 'artifacts'
+    config = {'dependencies': ['six==1.16.0'], 'dev_dependencies': [], 'python_version': None,
+              'artifact_cache': str(cache_dir)}
+    env_path = tmp_path / 'consumer_env'
+    tags = {'implementation': 'cpython', 'cache_tag': 'cpython-311', 'platform': 'linux-x86_64',
+            'machine': 'x86_64', 'version': '3.11.4'}
+    monkeypatch.setattr(runner, '_interpreter_tags', lambda *args, **kwargs: dict(tags))
+    publisher_hash = runner._get_config_hash(config)
+    tags['version'] = '3.11.9'
+    unpacked = []
+
+    def unpack(target_env, artifact):
+        unpacked.append(artifact)
+        (target_env / '.pyrunner').mkdir(parents=True)
+        (target_env / '.pyrunner' / 'config.json').write_text(json.dumps({'config_hash': publisher_hash}))
+
+    monkeypatch.setattr(runner, '_replace_from_artifact', unpack)
+    monkeypatch.setattr(runner, 'validate_environment', lambda *args, **kwargs: (True, []))
+    monkeypatch.setattr(runner, 'create_virtual_environment', lambda *args, **kwargs: pytest.fail("built"))
+    cache_dir.mkdir()
+    key = f"{runner._get_config_hash(config, env_path)}-cpython-311-linux-x86_64"
+    (cache_dir / f"{key}.tar.gz").write_bytes(b"")
+
+    assert runner.provision_environment(env_path, config) == 'cache_hit'
+    assert runner.provision_environment(env_path, config) == 'up_to_date'
+    assert len(unpacked) == 1
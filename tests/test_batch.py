@@ -0,0 +1,61 @@
+import json
+import textwrap
+
+import pytest
+
+import pyrunner
+
+
+@pytest.fixture
+def manifest(tmp_path, bare_env):
+    def write(jobs, **extra):
+        (tmp_path / 'ok.py').write_text("import os, sys\nprint(os.environ['BATCH_FLAG'], *sys.argv[1:])\n")
+        (tmp_path / 'fail.py').write_text("raise SystemExit(3)\n")
+        path = tmp_path / 'batch.yaml'
+        path.write_text(textwrap.dedent(f"""
+            envs:
+              main:
+                config: requirements.txt
+                path: {bare_env}
+            report: report.json
+        """) + pyrunner.yaml.safe_dump({'jobs': jobs, **extra}))
+        return path
+    return write
+
+
+@pytest.fixture
+def no_provision(runner, monkeypatch):
+    monkeypatch.setattr(runner, 'parse_config', lambda *args, **kwargs: {'environment_variables': {'BATCH_FLAG': 'on'}})
+    monkeypatch.setattr(runner, 'provision_environment', lambda *args, **kwargs: 'up_to_date')
+
+
+def test_jobs_run_in_dependency_order_and_failures_skip_dependents(runner, manifest, no_provision, tmp_path):
+    path = manifest([
+        {'name': 'extract', 'script': 'ok.py', 'env': 'main', 'args': ['--day', 1]},
+        {'name': 'transform', 'script': 'fail.py', 'env': 'main', 'depends_on': ['extract']},
+        {'name': 'load', 'script': 'ok.py', 'env': 'main', 'depends_on': ['transform']},
+        {'name': 'audit', 'script': 'ok.py', 'env': 'main', 'depends_on': ['extract']},
+    ], max_workers=2)
+
+    results = {result.name: result for result in runner.run_batch(str(path))}
+
+    assert {name: result.status for name, result in results.items()} == {
+        'extract': 'success', 'transform': 'failed', 'load': 'skipped', 'audit': 'success'}
+    assert results['transform'].exit_code == 3
+    assert results['load'].error == "Dependency failed: transform"
+    assert results['transform'].started_at >= results['extract'].finished_at
+    assert (tmp_path / 'batch_logs' / 'extract.log').read_text() == "on --day 1\n"
+    report = json.loads((tmp_path / 'report.json').read_text())
+    assert report['summary'] == {'success': 2, 'failed': 1, 'timeout': 0, 'skipped': 1}
+    assert [job['name'] for job in report['jobs']] == ['extract', 'transform', 'load', 'audit']
+
+
+def test_dependency_cycles_are_rejected(runner, manifest):
+    path = manifest([
+        {'name': 'a', 'script': 'ok.py', 'env': 'main', 'depends_on': ['b']},
+        {'name': 'b', 'script': 'ok.py', 'env': 'main', 'depends_on': ['a']},
+        {'name': 'c', 'script': 'ok.py', 'env': 'main'},
+    ])
+
+    with pytest.raises(pyrunner.PyRunnerError, match="dependency cycle between: a, b"):
+        runner.run_batch(str(path))
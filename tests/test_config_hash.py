@@ -0,0 +1,53 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+def make_config(runner, tmp_path, text="six==1.16.0\n"):
+    req = tmp_path / 'requirements.txt'
+    req.write_text(text)
+    return runner.parse_config(str(req))
+
+
+def test_hash_is_stable_and_covers_file_contents(runner, tmp_path):
+    config = make_config(runner, tmp_path)
+    first = runner._get_config_hash(config)
+    assert runner._get_config_hash(config) == first
+
+    (tmp_path / 'base.txt').write_text("idna\n")
+    changed = make_config(runner, tmp_path, "six==1.16.0\n-r base.txt\n")
+    assert runner._get_config_hash(changed) != first
+
+    # Editing an included file changes the fingerprint even though the parsed top file did not
+    (tmp_path / 'base.txt').write_text("idna==3.4\n")
+    reparsed = make_config(runner, tmp_path, "six==1.16.0\n-r base.txt\n")
+    assert runner._get_config_hash(reparsed) != runner._get_config_hash(changed)
+
+
+def test_digest_cache_is_persisted(runner, tmp_path):
+    config = make_config(runner, tmp_path)
+    runner._get_config_hash(config)
+    assert (runner.cache_dir / 'file_digests.json').exists()
+
+
+def other_interpreter():
+    current = Path(sys.executable).resolve()
+    for candidate in ('/usr/bin/python3', '/usr/local/bin/python3'):
+        if Path(candidate).exists() and Path(candidate).resolve() != current:
+            return candidate
+    return None
+
+
+@pytest.mark.skipif(other_interpreter() is None, reason="needs a second Python interpreter")
+def test_unpinned_env_is_fingerprinted_with_its_own_interpreter(runner, tmp_path):
+    python = other_interpreter()
+    env_path = tmp_path / 'env'
+    subprocess.run([python, '-m', 'venv', '--without-pip', str(env_path)], check=True)
+    version = subprocess.run([str(env_path / 'bin' / 'python'), '-c', 'import platform; print(platform.python_version())'],
+                             capture_output=True, text=True, check=True).stdout.strip()
+    assert runner._interpreter_tags(None, env_path)['version'] == version
+    config = make_config(runner, tmp_path)
+    if version != runner._interpreter_tags(None)['version']:
+        assert runner._get_config_hash(config, env_path) != runner._get_config_hash(config)
@@ -0,0 +1,62 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+import pyrunner
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'send_fds'), reason="daemon needs SCM_RIGHTS support")
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    socket_path = tmp_path / 'daemon.sock'
+    env = dict(os.environ, HOME=str(tmp_path), PYRUNNER_SOCKET=str(socket_path))
+    env.pop('PYRUNNER_NO_DAEMON', None)
+    process = subprocess.Popen([sys.executable, str(Path(pyrunner.__file__)), 'daemon', 'serve'], env=env,
+                               cwd=tmp_path, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while not pyrunner.PyRunnerDaemon.control(socket_path, 'status'):
+        assert time.time() < deadline and process.poll() is None, "daemon did not start"
+        time.sleep(0.1)
+    yield socket_path, env
+    pyrunner.PyRunnerDaemon.control(socket_path, 'stop')
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def test_silent_client_does_not_block_other_requests(daemon, tmp_path):
+    socket_path, env = daemon
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as silent:
+        silent.connect(str(socket_path))
+        started = time.time()
+        status = pyrunner.PyRunnerDaemon.control(socket_path, 'status', timeout=5)
+        assert status is not None and time.time() - started < 2
+
+        result = subprocess.run([sys.executable, str(Path(pyrunner.__file__)), 'daemon', 'status'], env=env,
+                                cwd=tmp_path, capture_output=True, text=True, timeout=30)
+        assert 'PyRunner daemon' in result.stdout
+
+
+def test_requests_run_in_forked_workers(daemon, tmp_path):
+    socket_path, env = daemon
+    result = subprocess.run([sys.executable, str(Path(pyrunner.__file__)), '--version'], env=env,
+                            cwd=tmp_path, capture_output=True, text=True, timeout=30)
+    assert result.returncode == 0 and 'PyRunner' in result.stdout
+    assert pyrunner.PyRunnerDaemon.control(socket_path, 'status')['requests_served'] == 1
+
+
+def test_stop_request_ends_the_accept_loop(daemon):
+    socket_path, _ = daemon
+    assert pyrunner.PyRunnerDaemon.control(socket_path, 'stop')['stopped']
+    deadline = time.time() + 10
+    while socket_path.exists() and time.time() < deadline:
+        time.sleep(0.1)
+    assert not socket_path.exists()
@@ -0,0 +1,103 @@
+import os
+import shutil
+import venv
+
+import pyrunner
+from pyrunner import EnvironmentInfo, GarbageCollectionReport
+
+
+def make_env(tmp_path, name):
+    env_path = tmp_path / name
+    venv.create(env_path, with_pip=False)
+    (env_path / '.pyrunner').mkdir()
+    return env_path
+
+
+def test_identical_files_are_hardlinked_and_stay_writable(runner, tmp_path, make_dist):
+    payload = os.urandom(4096)
+    envs = [make_env(tmp_path, name) for name in ('a', 'b')]
+    sites = [make_dist(runner, env, 'pkg', {'pkg/data.bin': payload, 'pkg/__init__.py': b''}) for env in envs]
+
+    dry = GarbageCollectionReport()
+    runner.deduplicate_environments(envs, dry, dry_run=True)
+    assert dry.files_linked == 1 and dry.bytes_deduplicated == 4096
+
+    report = GarbageCollectionReport()
+    runner.deduplicate_environments(envs, report)
+    first, second = (site / 'pkg' / 'data.bin' for site in sites)
+    assert os.stat(first).st_ino == os.stat(second).st_ino
+    assert os.stat(first).st_nlink == 3  # both envs plus the store
+    assert os.access(second, os.W_OK)
+    assert second.read_bytes() == payload
+
+    # Store entries still linked from an environment are never pruned
+    pruned = GarbageCollectionReport()
+    runner.prune_package_store(pruned)
+    assert pruned.store_entries_pruned == 0
+
+
+def test_cross_device_env_is_skipped_once(runner, tmp_path, make_dist, monkeypatch):
+    env_path = make_env(tmp_path, 'a')
+    make_dist(runner, env_path, 'pkg', {'pkg/data.bin': os.urandom(4096)})
+    warnings = []
+    runner.logger = type('Logger', (), {'warning': lambda self, msg: warnings.append(msg),
+                                        'info': lambda self, msg: None})()
+    real_stat = type(env_path).stat
+
+    def fake_stat(path, *args, **kwargs):
+        result = real_stat(path, *args, **kwargs)
+        if path == env_path:
+            return os.stat_result((result.st_mode, result.st_ino, result.st_dev + 1) + tuple(result)[3:])
+        return result
+
+    monkeypatch.setattr(type(env_path), 'stat', fake_stat)
+    report = GarbageCollectionReport()
+    runner.deduplicate_environments([env_path], report)
+    assert report.files_linked == 0
+    assert len(warnings) == 1 and 'same filesystem' in warnings[0]
+
+
+def env_info(env_path, last_used):
+    return EnvironmentInfo(name=env_path.name, path=str(env_path), created_at=0, last_used=last_used, scripts=[],
+                           size_mb=0, python_version='3', dependency_count=0)
+
+
+def sized_dir(tmp_path, name, files):
+    env_path = tmp_path / name
+    (env_path / '.pyrunner').mkdir(parents=True)
+    for file_name, content in files.items():
+        (env_path / file_name).write_bytes(content)
+    return env_path
+
+
+def test_budget_skips_envs_with_running_processes(runner, tmp_path):
+    busy = sized_dir(tmp_path, 'busy', {'data.bin': b'x' * 1000})
+    (busy / '.pyrunner' / 'process.pid').write_text(str(os.getpid()))
+    idle = sized_dir(tmp_path, 'idle', {'data.bin': b'y' * 1000})
+    report = GarbageCollectionReport(evicted_envs=[])
+
+    runner.enforce_disk_budget([env_info(busy, 1), env_info(idle, 2)], 1500, report)
+
+    assert report.evicted_envs == ['idle'] and busy.exists() and not idle.exists()
+    assert runner.live_pids(busy) == [os.getpid()]
+
+
+def test_failed_eviction_keeps_its_share_of_linked_files(runner, tmp_path, monkeypatch):
+    stuck = sized_dir(tmp_path, 'stuck', {'own.bin': b'a' * 1000, 'linked.bin': b'l' * 4000})
+    other = sized_dir(tmp_path, 'other', {'own.bin': b'b' * 500})
+    os.link(stuck / 'linked.bin', other / 'linked.bin')
+    real_rmtree = shutil.rmtree
+
+    def rmtree(path, *args, **kwargs):
+        if str(path) == str(stuck):
+            raise PermissionError("busy")
+        real_rmtree(path, *args, **kwargs)
+
+    monkeypatch.setattr(pyrunner.shutil, 'rmtree', rmtree)
+    report = GarbageCollectionReport(evicted_envs=[])
+
+    runner.enforce_disk_budget([env_info(stuck, 1), env_info(other, 2)], 0, report)
+
+    assert report.evicted_envs == ['other']
+    assert report.bytes_evicted == 500
+    assert report.usage_bytes == 5000
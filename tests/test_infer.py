@@ -0,0 +1,67 @@
+import textwrap
+
+import pytest
+
+import pyrunner
+
+
+@pytest.fixture
+def script(tmp_path):
+    def write(source):
+        path = tmp_path / 'app.py'
+        path.write_text(textwrap.dedent(source))
+        return str(path)
+    return write
+
+
+@pytest.fixture
+def no_learned(runner, monkeypatch):
+    monkeypatch.setattr(runner, 'learn_module_index', lambda *args, **kwargs: {})
+
+
+def test_only_mapped_imports_are_installed(runner, script, no_learned):
+    path = script("""
+        import requests
+        import yaml
+        import google.cloud.storage
+        import acme_internal_tools
+    """)
+
+    packages, unresolved = runner.infer_dependencies(path)
+
+    assert packages == ['requests', 'PyYAML']
+    assert unresolved == ['acme_internal_tools', 'google']
+
+
+def test_learned_module_names_count_as_mapped(runner, script, monkeypatch):
+    monkeypatch.setattr(runner, 'learn_module_index', lambda *args, **kwargs: {'acme_internal_tools': 'acme-tools'})
+    assert runner.infer_dependencies(script("import acme_internal_tools\n")) == (['acme-tools'], [])
+
+
+def test_optional_and_type_checking_imports_are_skipped(runner, script, no_learned):
+    path = script("""
+        from typing import TYPE_CHECKING
+        try:
+            import ujson as json
+        except ImportError:
+            import json
+        try:
+            from yaml import CSafeLoader as Loader
+        except (AttributeError, ModuleNotFoundError):
+            from yaml import SafeLoader as Loader
+        if TYPE_CHECKING:
+            from pandas import DataFrame
+        else:
+            import numpy
+    """)
+
+    assert runner.infer_dependencies(path) == (['numpy', 'PyYAML'], [])
+
+
+def test_run_refuses_unresolved_imports_without_confirmation(runner, script, no_learned, monkeypatch, capsys):
+    path = script("import acme_internal_tools\n")
+    monkeypatch.setattr(pyrunner.sys.stdin, 'isatty', lambda: False, raising=False)
+    monkeypatch.setattr(runner, 'provision_environment', lambda *args, **kwargs: pytest.fail("provisioned"))
+
+    assert pyrunner.main(['run', path], runner=runner) == 1
+    assert 'Unresolved imports: acme_internal_tools' in capsys.readouterr().out
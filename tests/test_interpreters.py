@@ -0,0 +1,42 @@
+import pytest
+
+from pyrunner import PyRunnerError
+
+
+def test_version_specifiers(runner):
+    assert runner._version_matches('3.10.4', '3.10')
+    assert not runner._version_matches('3.1.4', '3.10')
+    assert runner._version_matches('3.11.2', '>=3.9,<3.12')
+    assert not runner._version_matches('3.12.0', '>=3.9,<3.12')
+    assert runner._version_matches('3.11.7', '~=3.11')
+    with pytest.raises(PyRunnerError):
+        runner._version_matches('3.11.7', 'latest')
+
+
+def test_unquoted_yaml_version_is_rejected(runner, tmp_path):
+    config_file = tmp_path / 'config.yaml'
+    config_file.write_text("python_version: 3.10\ndependencies: [six]\n")
+    with pytest.raises(PyRunnerError, match='quoted string'):
+        runner.parse_config(str(config_file))
+
+    config_file.write_text("python_version: '3.10'\ndependencies: [six]\n")
+    assert runner.parse_config(str(config_file))['python_version'] == '3.10'
+
+
+def test_host_interpreter_is_discovered(runner):
+    interpreters = runner.discover_interpreters()
+    assert interpreters
+    assert all(info.version.count('.') == 2 for info in interpreters)
+    assert (runner.cache_dir / 'interpreters.json').exists()
+
+
+def test_existing_env_is_kept_when_no_interpreter_matches(runner, bare_env, capsys):
+    (bare_env / 'bin' / 'pip').write_text('')
+    runner.create_virtual_environment(bare_env, '2.6')
+    assert 'keeping the existing environment' in capsys.readouterr().out
+    assert (bare_env / 'bin' / 'python').exists()
+
+
+def test_missing_interpreter_fails_for_new_env(runner, tmp_path):
+    with pytest.raises(PyRunnerError, match="No installed interpreter matches python_version '2.6'"):
+        runner.create_virtual_environment(tmp_path / 'new_env', '2.6')
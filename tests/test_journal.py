@@ -0,0 +1,83 @@
+import json
+import subprocess
+
+import pytest
+
+import pyrunner
+
+
+def make_config(dependencies):
+    return {'dependencies': dependencies, 'dev_dependencies': [], 'python_version': None}
+
+
+def plan_item(name, version='1.0'):
+    return {'metadata': {'name': name, 'version': version}, 'download_info': {'url': 'https://example.invalid'}}
+
+
+class RecordingOrchestrator(pyrunner.AsyncOrchestrator):
+    """Records commands sent through run() instead of executing them; run_many still runs for real."""
+
+    def __init__(self):
+        super().__init__(show_progress=False)
+        self.commands = []
+
+    def run(self, args, **kwargs):
+        self.commands.append(args)
+        return pyrunner.CommandResult(list(args), 0, '', '', 0.0)
+
+
+def test_fresh_install_is_a_single_pip_run(runner, bare_env, monkeypatch):
+    runner.orchestrator = RecordingOrchestrator()
+    monkeypatch.setattr(runner, '_resolve_install_plan', lambda *args, **kwargs: pytest.fail("resolved"))
+
+    assert runner.install_journaled(bare_env, ['six==1.16.0'], make_config(['six==1.16.0'])) == []
+
+    assert len(runner.orchestrator.commands) == 1
+    assert '--dry-run' not in runner.orchestrator.commands[0]
+    assert not (bare_env / '.pyrunner' / 'install_journal.json').exists()
+
+
+def test_interrupted_single_pass_resumes_only_broken_packages(runner, bare_env, make_dist, monkeypatch):
+    config = make_config(['good==1.0', 'broken==1.0'])
+    site_packages = make_dist(runner, bare_env, 'good', {'good/__init__.py': b"OK = 1\n"})
+    make_dist(runner, bare_env, 'broken', {'broken/__init__.py': b"OK = 1\n", 'broken/core.py': b"X = 1\n"})
+    (site_packages / 'broken' / 'core.py').unlink()
+    old_stash = site_packages / '~ld'
+    old_stash.mkdir()
+    journal = {'config_hash': runner._get_config_hash(config, bare_env), 'started_at': 0, 'single_pass': True,
+               'operations': [], 'stashes_before': [str(old_stash)]}
+    (bare_env / '.pyrunner' / 'install_journal.json').write_text(json.dumps(journal))
+    new_stash = site_packages / '~roken'
+    new_stash.mkdir()
+
+    runner.orchestrator = RecordingOrchestrator()
+    monkeypatch.setattr(runner, '_resolve_install_plan',
+                        lambda *args, **kwargs: [plan_item('good'), plan_item('broken')])
+    # pip is absent from the bare env, so the rollback falls back to removing the dist-info
+    monkeypatch.setattr(pyrunner.subprocess, 'run',
+                        lambda cmd, **kwargs: subprocess.CompletedProcess(cmd, 1, '', 'no pip'))
+
+    assert runner.install_journaled(bare_env, config['dependencies'], config) == []
+
+    assert old_stash.exists() and not new_stash.exists()
+    [command] = runner.orchestrator.commands
+    assert '--force-reinstall' in command and '--no-deps' in command
+    assert command[-1] == 'broken==1.0' and 'good==1.0' not in command
+    assert not (bare_env / '.pyrunner' / 'install_journal.json').exists()
+
+
+def test_completed_operations_leave_stashes_alone(runner, bare_env, make_dist, monkeypatch):
+    config = make_config(['good==1.0'])
+    site_packages = make_dist(runner, bare_env, 'good', {'good/__init__.py': b"OK = 1\n"})
+    foreign_stash = site_packages / '~oreign'
+    foreign_stash.mkdir()
+    journal = {'config_hash': runner._get_config_hash(config, bare_env), 'started_at': 0,
+               'operations': [{'name': 'good', 'key': 'good', 'version': '1.0', 'requirement': 'good==1.0',
+                               'state': 'failed'}]}
+    (bare_env / '.pyrunner' / 'install_journal.json').write_text(json.dumps(journal))
+    runner.orchestrator = RecordingOrchestrator()
+
+    assert runner.install_journaled(bare_env, config['dependencies'], config) == []
+
+    assert foreign_stash.exists()
+    assert runner.orchestrator.commands[0][-1] == 'good==1.0'
@@ -0,0 +1,37 @@
+import json
+import sys
+
+import pytest
+
+import pyrunner
+
+pytestmark = pytest.mark.skipif(pyrunner.resource is None, reason="needs the resource module")
+
+
+def run_limited(runner, env_path, tmp_path, source, limits):
+    script = tmp_path / 'script.py'
+    script.write_text(source)
+    code = runner._run_limited_process([sys.executable, str(script)], {}, env_path, limits)
+    return code, json.loads((env_path / '.pyrunner' / 'limit_report.json').read_text())
+
+
+def test_timeout_is_reported_without_reaping_twice(runner, bare_env, tmp_path):
+    code, report = run_limited(runner, bare_env, tmp_path, "import time\ntime.sleep(30)\n",
+                               {'timeout': 0.5, 'kill_after': 1})
+
+    assert code == -15
+    assert report['limit_hit'] == 'timeout' and report['signal'] == 'SIGTERM'
+
+
+def test_crash_far_below_the_memory_limit_is_not_blamed_on_it(runner, bare_env, tmp_path):
+    code, report = run_limited(runner, bare_env, tmp_path, "import os\nos.abort()\n", {'memory': 64 * 1024 ** 3})
+
+    assert code == -6
+    assert report['signal'] == 'SIGABRT' and report['limit_hit'] is None
+
+
+def test_near_memory_limit_uses_the_sampled_peaks(runner):
+    limits = {'memory': 1000}
+    assert runner._near_memory_limit(limits, {'max_rss_bytes': 100}, {'vmpeak_bytes': 950})
+    assert not runner._near_memory_limit(limits, {'max_rss_bytes': 100}, {'vmpeak_bytes': 500})
+    assert runner._near_memory_limit({'data': 1000}, {'max_rss_bytes': 920}, {})
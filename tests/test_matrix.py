@@ -0,0 +1,53 @@
+import threading
+import venv
+
+
+def fake_provision(runner):
+    def provision(env_path, config, force_update=False):
+        # Exercise the shared config/digest caches from every worker, like a real provision does
+        runner._get_config_hash(config, env_path)
+        venv.create(env_path, with_pip=False)
+        (env_path / '.pyrunner').mkdir(exist_ok=True)
+        return 'built'
+    return provision
+
+
+def test_matrix_runs_every_profile(runner, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'base.txt').write_text("six\n")
+    (tmp_path / 'config.yaml').write_text(
+        "requirements_file: base.txt\ndependencies: [six]\n"
+        "profiles:\n  dev:\n    env_vars: {STAGE: dev}\n  prod:\n    env_vars: {STAGE: prod}\n")
+    (tmp_path / 'app.py').write_text("import os, sys\nprint('stage', os.environ['STAGE'])\n"
+                                     "sys.exit(0 if os.environ['STAGE'] == 'dev' else 3)\n")
+    monkeypatch.setattr(runner, 'provision_environment', fake_provision(runner))
+
+    results = {result.profile: result for result in runner.run_matrix('app.py', 'config.yaml', max_parallel=2)}
+    assert results['dev'].exit_code == 0 and results['prod'].exit_code == 3
+    assert results['dev'].error is None
+    output = capsys.readouterr().out
+    assert '[dev ] stage dev' in output and '[prod] stage prod' in output
+
+
+def test_shared_caches_survive_concurrent_workers(runner, tmp_path):
+    files = []
+    for index in range(16):
+        req = tmp_path / f"req{index}.txt"
+        req.write_text(f"package{index}\n")
+        files.append(req)
+    errors = []
+
+    def work(req):
+        try:
+            for _ in range(20):
+                runner._get_config_hash(runner.parse_config(str(req)))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(req,)) for req in files]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(runner._digest_cache) == 16
@@ -0,0 +1,37 @@
+import json
+
+import pyrunner
+
+
+def test_render_merges_flushed_samples(runner):
+    metrics = pyrunner.MetricsRegistry(runner.cache_dir)
+    metrics.inc('pyrunner_runs_total', mode='foreground', result='success')
+    metrics.inc('pyrunner_runs_total', mode='foreground', result='success')
+    metrics.observe('pyrunner_install_seconds', 0.3, kind='full')
+    metrics.flush()
+
+    text = (runner.cache_dir / 'metrics.prom').read_text()
+    assert text == metrics.render()
+    lines = text.splitlines()
+    assert 'pyrunner_runs_total{mode="foreground",result="success"} 2' in lines
+    assert 'pyrunner_install_seconds_bucket{kind="full",le="+Inf"} 1' in lines
+    assert 'pyrunner_install_seconds_count{kind="full"} 1' in lines
+    assert 'pyrunner_environments 0' in lines
+
+
+def test_flush_without_samples_leaves_the_files_alone(runner):
+    metrics = pyrunner.MetricsRegistry(runner.cache_dir)
+    metrics.flush()
+    assert not (runner.cache_dir / 'metrics.json').exists()
+    assert not (runner.cache_dir / 'metrics.prom').exists()
+
+
+def test_partial_state_file_is_completed(runner):
+    runner.cache_dir.mkdir(parents=True, exist_ok=True)
+    (runner.cache_dir / 'metrics.json').write_text(json.dumps({'counters': {}}))
+    metrics = pyrunner.MetricsRegistry(runner.cache_dir)
+
+    assert metrics.load_state() == {'counters': {}, 'histograms': {}}
+    metrics.observe('pyrunner_validation_seconds', 0.01, result='valid')
+    metrics.flush()
+    assert 'pyrunner_validation_seconds_count{result="valid"} 1' in metrics.render().splitlines()
@@ -0,0 +1,37 @@
+import os
+import sys
+import time
+
+import pytest
+
+import pyrunner
+
+
+def test_stream_handles_lines_longer_than_the_reader_limit():
+    orchestrator = pyrunner.AsyncOrchestrator(show_progress=False)
+    lines = []
+    script = "import sys; sys.stdout.write('x' * 300000 + '\\nshort\\ntail')"
+
+    result = orchestrator.submit(orchestrator.stream_async([sys.executable, '-c', script], lines.append))
+
+    assert result.returncode == 0
+    assert lines == ['x' * 300000 + '\n', 'short\n', 'tail']
+
+
+def test_stream_terminates_the_process_when_the_callback_fails(tmp_path):
+    orchestrator = pyrunner.AsyncOrchestrator(show_progress=False)
+    pid_file = tmp_path / 'pid'
+    script = (f"import os, time; open({str(pid_file)!r}, 'w').write(str(os.getpid())); "
+              "print('ready', flush=True); time.sleep(60)")
+
+    def on_line(line):
+        raise RuntimeError("consumer failed")
+
+    started = time.time()
+    with pytest.raises(RuntimeError, match='consumer failed'):
+        orchestrator.submit(orchestrator.stream_async([sys.executable, '-c', script], on_line))
+
+    assert time.time() - started < 30
+    pid = int(pid_file.read_text())
+    with pytest.raises(ProcessLookupError):
+        os.kill(pid, 0)
@@ -0,0 +1,54 @@
+import io
+import os
+import tarfile
+
+import pytest
+
+import pyrunner
+
+
+@pytest.fixture
+def packable_env(runner, bare_env, make_dist):
+    # validate_environment wants a pip entry point; the pack round-trip never runs it
+    pip_path = runner.get_pip_path(bare_env)
+    pip_path.write_text(f"#!{bare_env}/bin/python\n")
+    pip_path.chmod(0o755)
+    (bare_env / '.pyrunner' / 'config.json').write_text('{"config_hash": "abc", "scripts": []}')
+    make_dist(runner, bare_env, 'shared', {'shared/__init__.py': b"VALUE = 1\n", 'shared/copy.py': b"VALUE = 1\n"})
+    return bare_env
+
+
+def test_pack_unpack_round_trip_keeps_hardlinks(runner, packable_env, tmp_path):
+    site_packages = runner._site_packages_dirs(packable_env)[0]
+    # gc deduplication leaves identical files hardlinked together
+    (site_packages / 'shared' / 'copy.py').unlink()
+    os.link(site_packages / 'shared' / '__init__.py', site_packages / 'shared' / 'copy.py')
+
+    archive = runner.pack_environment(packable_env, tmp_path / 'env.pyrunner.tar.gz')
+    with tarfile.open(archive) as tar:
+        assert any(member.islnk() for member in tar.getmembers())
+
+    target = runner.unpack_environment(archive, tmp_path / 'unpacked')
+
+    unpacked_site = runner._site_packages_dirs(target)[0]
+    assert (unpacked_site / 'shared' / 'copy.py').read_bytes() == b"VALUE = 1\n"
+    assert (unpacked_site / 'shared' / 'copy.py').stat().st_ino == (unpacked_site / 'shared' / '__init__.py').stat().st_ino
+    assert f"-m venv {target}" in (target / 'pyvenv.cfg').read_text()
+    assert not (tmp_path / f".unpacked.unpacking-{os.getpid()}").exists()
+
+
+def test_unpack_rejects_hardlinks_outside_the_archive(runner, tmp_path):
+    archive_path = tmp_path / 'evil.pyrunner.tar.gz'
+    with tarfile.open(archive_path, 'w:gz') as tar:
+        manifest = b'{"env_name": "evil"}'
+        member = tarfile.TarInfo('.pyrunner/pack.json')
+        member.size = len(manifest)
+        tar.addfile(member, io.BytesIO(manifest))
+        link = tarfile.TarInfo('passwd')
+        link.type = tarfile.LNKTYPE
+        link.linkname = 'etc/passwd'
+        tar.addfile(link)
+
+    with pytest.raises(pyrunner.PyRunnerError, match='Hardlink outside the archive'):
+        runner.unpack_environment(archive_path, tmp_path / 'evil')
+    assert not (tmp_path / 'evil').exists()
@@ -0,0 +1,90 @@
+import json
+import subprocess
+import threading
+
+import pyrunner
+
+
+def report_item(name, version):
+    return {
+        'metadata': {'name': name, 'version': version},
+        'download_info': {
+            'url': f"https://example.invalid/packages/{name}-{version}-py3-none-any.whl",
+            'archive_info': {},
+        },
+    }
+
+
+class FakePip:
+    """Stands in for pip: resolves to a fixed plan, "downloads" empty wheels and fails installs on demand."""
+
+    def __init__(self, plan, install_error=None):
+        self.plan = plan
+        self.install_error = install_error
+        self.calls = []
+
+    def __call__(self, cmd, **kwargs):
+        self.calls.append(cmd)
+        if '--dry-run' in cmd:
+            return subprocess.CompletedProcess(cmd, 0, json.dumps({'install': self.plan}), '')
+        if cmd[1] == 'download':
+            dest = cmd[cmd.index('--dest') + 1]
+            filename = cmd[-1].rsplit('/', 1)[-1]
+            with open(f"{dest}/{filename}", 'wb'):
+                pass
+            return subprocess.CompletedProcess(cmd, 0, '', '')
+        if self.install_error:
+            raise self.install_error
+        return subprocess.CompletedProcess(cmd, 0, '', '')
+
+
+def run_pipeline(runner, env_path, config, **kwargs):
+    result = {}
+    worker = threading.Thread(target=lambda: result.setdefault(
+        'failed', runner.install_pipelined(env_path, config['dependencies'], config, build_workers=1, **kwargs)))
+    worker.start()
+    worker.join(timeout=30)
+    assert not worker.is_alive(), "pipeline deadlocked"
+    return result['failed']
+
+
+def test_install_timeouts_are_recorded_without_deadlocking(runner, bare_env, tmp_path, monkeypatch):
+    # More items than the install queue holds, so a dead installer would block the builders
+    plan = [report_item(f"pkg{i}", '1.0') for i in range(12)]
+    fake_pip = FakePip(plan, install_error=subprocess.TimeoutExpired('pip', 1800))
+    monkeypatch.setattr(pyrunner.subprocess, 'run', fake_pip)
+    config = {'dependencies': [item['metadata']['name'] for item in plan], 'wheelhouse': str(tmp_path / 'wheels')}
+
+    failed = run_pipeline(runner, bare_env, config)
+
+    assert sorted(failed) == sorted(config['dependencies'])
+    assert all(cmd[1] == 'download' for cmd in fake_pip.calls if '--dest' in cmd)
+
+
+def test_lock_pins_constrain_unrequested_packages(runner, bare_env, tmp_path, monkeypatch):
+    lock = {'entries': [{'name': 'requests', 'version': '2.31.0'}, {'name': 'urllib3', 'version': '1.26.18'}]}
+    (bare_env / '.pyrunner' / 'requirements.lock').write_text(json.dumps(lock))
+    fake_pip = FakePip([report_item('requests', '2.32.0')])
+    monkeypatch.setattr(pyrunner.subprocess, 'run', fake_pip)
+    config = {'dependencies': ['requests>=2.32'], 'wheelhouse': str(tmp_path / 'wheels')}
+
+    assert run_pipeline(runner, bare_env, config) == []
+
+    resolve = next(cmd for cmd in fake_pip.calls if '--dry-run' in cmd)
+    assert '--upgrade' not in resolve
+    constraints = (bare_env / '.pyrunner' / 'lock-constraints.txt').read_text().split()
+    assert constraints == ['urllib3==1.26.18']
+    assert resolve[resolve.index('-c') + 1].endswith('lock-constraints.txt')
+
+
+def test_force_update_ignores_the_lock(runner, bare_env, tmp_path, monkeypatch):
+    lock = {'entries': [{'name': 'urllib3', 'version': '1.26.18'}]}
+    (bare_env / '.pyrunner' / 'requirements.lock').write_text(json.dumps(lock))
+    fake_pip = FakePip([report_item('requests', '2.32.0')])
+    monkeypatch.setattr(pyrunner.subprocess, 'run', fake_pip)
+    config = {'dependencies': ['requests'], 'wheelhouse': str(tmp_path / 'wheels')}
+
+    run_pipeline(runner, bare_env, config, force_update=True)
+
+    resolve = next(cmd for cmd in fake_pip.calls if '--dry-run' in cmd)
+    assert '--upgrade' in resolve and '-c' not in resolve
@@ -0,0 +1,26 @@
+import textwrap
+
+
+def test_import_statements_skip_fallbacks_and_type_checking(runner, tmp_path):
+    script = tmp_path / 'app.py'
+    script.write_text(textwrap.dedent("""
+        import os
+        from typing import TYPE_CHECKING
+        try:
+            import ujson as json
+        except ImportError:
+            import json
+        try:
+            import yaml
+        except ValueError:
+            import csv
+        if TYPE_CHECKING:
+            from pandas import DataFrame
+        else:
+            import numpy
+        from . import sibling
+    """))
+
+    assert runner._script_import_statements(script) == [
+        'import os', 'from typing import TYPE_CHECKING', 'import ujson as json', 'import yaml', 'import csv',
+        'import numpy']
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pytest
+
+import pyrunner
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'sched_setaffinity'), reason="needs CPU affinity support")
+
+
+def test_replicas_start_pinned_and_with_limits(runner, bare_env, tmp_path, monkeypatch):
+    calls = tmp_path / 'calls'
+    real_setaffinity = os.sched_setaffinity
+
+    def setaffinity(pid, cpus):
+        # Runs in the forked child: record that pinning happened there, before exec
+        with open(calls, 'a') as f:
+            f.write(f"affinity {pid} {sorted(cpus)}\n")
+        real_setaffinity(pid, cpus)
+
+    def limit_preexec():
+        with open(calls, 'a') as f:
+            f.write("limits\n")
+
+    monkeypatch.setattr(pyrunner.os, 'sched_setaffinity', setaffinity)
+    cmd = [sys.executable, '-c', "import os; print(sorted(os.sched_getaffinity(0)))"]
+    replica_set = pyrunner.ReplicaSet(runner, cmd, dict(os.environ), bare_env, 2, preexec_fn=limit_preexec)
+
+    # Started one at a time so each child's preexec lines are adjacent
+    for index in range(2):
+        replica_set.start(index)
+    assert replica_set.wait() == [0, 0]
+
+    lines = calls.read_text().splitlines()
+    assert lines == [line for cpus in replica_set.cpu_sets for line in (f"affinity 0 {sorted(cpus)}", 'limits')]
+
+
+def test_unpinned_replicas_keep_the_limit_preexec(runner, bare_env):
+    def limit_preexec():
+        pass
+
+    replica_set = pyrunner.ReplicaSet(runner, ['true'], {}, bare_env, 2, pin_cpus=False, preexec_fn=limit_preexec)
+    assert replica_set._preexec(None) is limit_preexec
@@ -0,0 +1,52 @@
+from pathlib import Path
+
+import pytest
+
+from pyrunner import PyRunnerError
+
+
+def write(path: Path, text: str) -> Path:
+    path.write_text(text)
+    return path
+
+
+def test_includes_constraints_and_editables(runner, tmp_path):
+    write(tmp_path / 'base.txt', "requests>=2.0  # http\n")
+    write(tmp_path / 'constraints.txt', "urllib3<3\n")
+    req = write(tmp_path / 'requirements.txt',
+                "--index-url https://pypi.example.com/simple\n-r base.txt\n-c constraints.txt\n"
+                "-e ./libs/mylib\nflask>=2.0 \\\n  ; python_version >= '3.8'\n")
+    config = runner.parse_config(str(req))
+    assert config['dependencies'] == ['requests>=2.0', "flask>=2.0 ; python_version >= '3.8'"]
+    assert config['constraints'] == ['urllib3<3']
+    assert config['editables'] == ['./libs/mylib']
+    assert config['pip_options'] == ['--index-url', 'https://pypi.example.com/simple']
+    assert len(config['requirement_files']) == 3
+
+
+def test_circular_include_is_reported(runner, tmp_path):
+    write(tmp_path / 'a.txt', "-r b.txt\n")
+    write(tmp_path / 'b.txt', "-r a.txt\n")
+    with pytest.raises(PyRunnerError, match='Circular requirements include'):
+        runner.parse_config(str(tmp_path / 'a.txt'))
+
+
+def test_hashes_stay_attached_to_their_requirement(runner, tmp_path):
+    req = write(tmp_path / 'requirements.txt',
+                "--require-hashes\nsix==1.16.0 \\\n    --hash=sha256:aaa \\\n    --hash=sha256:bbb\n")
+    config = runner.parse_config(str(req))
+    assert config['dependencies'] == ['six==1.16.0 --hash=sha256:aaa --hash=sha256:bbb']
+    assert runner._hash_checked(config)
+
+    env_path = tmp_path / 'env'
+    args = runner._requirement_args(env_path, config['dependencies'] + ['flask'])
+    assert args[0] == 'flask' and args[1] == '-r'
+    assert Path(args[2]).read_text() == 'six==1.16.0 --hash=sha256:aaa --hash=sha256:bbb\n'
+
+
+def test_unknown_options_are_forwarded_to_pip(runner, tmp_path):
+    req = write(tmp_path / 'requirements.txt',
+                "--use-feature=truststore\n--no-deps\n--config-settings editable_mode=compat\nsix\n")
+    config = runner.parse_config(str(req))
+    assert config['pip_options'] == ['--use-feature=truststore', '--no-deps', '--config-settings=editable_mode=compat']
+    assert config['dependencies'] == ['six']
@@ -0,0 +1,52 @@
+import logging
+
+import pytest
+
+import pyrunner
+
+
+@pytest.fixture
+def logged_run(runner, tmp_path):
+    runner.run_log = pyrunner.RunLogStore(tmp_path / 'logs' / 'app')
+    runner.run_id = 'run-1'
+    runner.run_log.record_run(runner.run_id, script='app', started=1.0, pyrunner_pid=100)
+    handler = pyrunner.RunLogHandler(runner.run_log, runner.run_id, flush_interval=3600)
+    root = logging.getLogger()
+    root.addHandler(handler)
+    logger = logging.getLogger('pyrunner.test_run_log')
+    logger.setLevel(logging.INFO)
+    yield runner.run_log, logger, handler
+    root.removeHandler(handler)
+    handler.close()
+
+
+def test_finish_run_writes_buffered_lines_and_indexes_the_run(runner, logged_run):
+    store, logger, handler = logged_run
+    logger.info("starting")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("step failed")
+    runner.record_run_pid(4242)
+
+    runner.finish_run('failure', 3)
+
+    assert handler not in logging.getLogger().handlers
+    [run] = store.find_runs(pids=[4242])
+    assert run['result'] == 'failure' and run['exit_code'] == 3 and run['finished']
+    assert store.find_runs(failed=True) == [run]
+    messages = [line['message'] for line in store.read_lines(runs={'run-1'})]
+    assert messages[0] == "starting"
+    assert messages[1].startswith("step failed\nTraceback") and "ValueError: boom" in messages[1]
+    blocks, _ = store.load_index()
+    assert [block['runs'] for block in blocks] == [['run-1']]
+
+
+def test_main_without_a_verdict_records_a_neutral_result(runner, logged_run):
+    store, _, _ = logged_run
+
+    assert pyrunner.main(['logs', str(store.path), '--runs'], runner=runner) == 0
+
+    [run] = store.find_runs()
+    assert run['result'] == 'ended' and run['exit_code'] is None
+    assert store.find_runs(failed=True) == []
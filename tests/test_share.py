@@ -0,0 +1,87 @@
+import json
+import venv
+
+import pytest
+
+import pyrunner
+
+
+def make_indexed_env(runner, env_path, share_env):
+    venv.create(env_path, with_pip=False)
+    (env_path / '.pyrunner').mkdir()
+    (env_path / '.pyrunner' / 'config.json').write_text(json.dumps({'scripts': [], 'last_used': 0}))
+    (env_path / '.pyrunner' / 'requirements.lock').write_text(
+        json.dumps({'entries': [{'name': 'six', 'version': '1.0'}]}))
+    runner._index_environment(env_path, {'pip_options': [], 'share_env': share_env})
+    return env_path
+
+
+def make_shared_env(runner):
+    return make_indexed_env(runner, runner.cache_dir / 'shared' / 'env-0123456789ab', share_env=True)
+
+
+def plan_item(name, version):
+    return {'metadata': {'name': name, 'version': version}, 'download_info': {'url': 'https://example.invalid'}}
+
+
+class RecordingOrchestrator(pyrunner.AsyncOrchestrator):
+    def __init__(self):
+        super().__init__(show_progress=False)
+        self.commands = []
+
+    def run(self, args, **kwargs):
+        self.commands.append(args)
+        return pyrunner.CommandResult(list(args), 0, '', '', 0.0)
+
+
+def test_shared_envs_are_listed_outside_their_directory(runner, tmp_path, monkeypatch):
+    shared = make_shared_env(runner)
+    workdir = tmp_path / 'work'
+    workdir.mkdir()
+    monkeypatch.chdir(workdir)
+
+    assert runner.environment_paths() == [shared.resolve()]
+    assert [env.name for env in runner.list_environments()] == [shared.name]
+    assert runner.find_environment(shared.name) == shared.resolve()
+    assert runner.find_environment('missing_env').name == 'missing_env'
+
+
+def test_config_edits_in_a_shared_env_keep_locked_versions(runner, monkeypatch):
+    shared = make_shared_env(runner)
+    runner.get_pip_path(shared).touch()
+    runner.orchestrator = RecordingOrchestrator()
+    monkeypatch.setattr(runner, 'generate_lock_file', lambda *args, **kwargs: None)
+    config = {'dependencies': ['six', 'attrs'], 'dev_dependencies': [], 'python_version': None, 'pip_options': []}
+    diff = pyrunner.ConfigDiff(deps_added=['attrs'])
+
+    monkeypatch.setattr(runner, '_resolve_install_plan',
+                        lambda *args, **kwargs: [plan_item('attrs', '23.1'), plan_item('six', '2.0')])
+    with pytest.raises(pyrunner.PyRunnerError, match="would change six"):
+        runner.install_config_changes(shared, config, diff, shared_env=True)
+    assert runner.orchestrator.commands == []
+
+    monkeypatch.setattr(runner, '_resolve_install_plan', lambda *args, **kwargs: [plan_item('attrs', '23.1')])
+    assert runner.install_config_changes(shared, config, diff, shared_env=True) == []
+    [command] = runner.orchestrator.commands
+    assert '--no-deps' in command and command[-1] == 'attrs==23.1'
+    assert not (shared / '.pyrunner' / 'share.lock').exists()
+
+
+def test_private_envs_are_never_shared_or_extended(runner, tmp_path, monkeypatch):
+    private = make_indexed_env(runner, tmp_path / 'report_env', share_env=False)
+    config = {'dependencies': ['six', 'attrs'], 'dev_dependencies': [], 'python_version': None, 'pip_options': []}
+    built = []
+    monkeypatch.setattr(runner, '_resolve_install_plan', lambda *args, **kwargs: pytest.fail("resolved"))
+    monkeypatch.setattr(runner, 'provision_environment',
+                        lambda env_path, config, force_update=False: built.append((env_path, config)) or 'built')
+
+    assert runner.find_shared_environments(config) == []
+    env_path, status = runner.provision_shared_environment(config)
+
+    assert status == 'built' and env_path.parent == runner.cache_dir / 'shared'
+    assert built[0][1]['share_env'] is True
+    # Re-indexing the private env later does not make it shareable either
+    runner._index_environment(private, {'pip_options': []})
+    assert runner.find_shared_environments(config) == []
+    shared = make_shared_env(runner)
+    assert [path for path, _ in runner.find_shared_environments(config)] == [shared.resolve()]
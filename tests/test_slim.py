@@ -0,0 +1,40 @@
+import subprocess
+
+
+def record_paths(site_packages, name='pkg-1.0.dist-info'):
+    return [line.split(',')[0] for line in (site_packages / name / 'RECORD').read_text().splitlines()]
+
+
+def test_removed_directories_leave_the_record_consistent(runner, bare_env, make_dist):
+    site_packages = make_dist(runner, bare_env, 'pkg', {
+        'pkg/__init__.py': b"A = 1\n",
+        'pkg/tests/test_core.py': b"def test(): pass\n",
+        'pkg/docs/guide.txt': b"guide\n",
+        'pkg/examples/keep_me.py': b"print(1)\n",
+    })
+
+    dry = runner.slim_environment(bare_env, {'keep': ['pkg/examples']}, dry_run=True)
+    assert dry.files_removed == 2 and (site_packages / 'pkg' / 'tests').exists()
+
+    report = runner.slim_environment(bare_env, {'keep': ['pkg/examples']})
+
+    assert report.files_removed == 2 and report.records_updated == 2
+    assert not (site_packages / 'pkg' / 'tests').exists() and not (site_packages / 'pkg' / 'docs').exists()
+    assert 'pkg/tests/test_core.py' not in record_paths(site_packages)
+    assert 'pkg/examples/keep_me.py' in record_paths(site_packages)
+    assert runner.verify_environment_files(bare_env).ok
+
+
+def test_bytecode_only_records_the_compiled_files(runner, bare_env, make_dist):
+    site_packages = make_dist(runner, bare_env, 'pkg', {'pkg/__init__.py': b"A = 1\n", 'pkg/core.py': b"B = 2\n"})
+
+    report = runner.slim_environment(bare_env, {'tests': False, 'docs': False, 'bytecode_only': True})
+
+    assert report.sources_replaced == 2
+    assert not (site_packages / 'pkg' / 'core.py').exists()
+    paths = record_paths(site_packages)
+    assert 'pkg/core.pyc' in paths and 'pkg/core.py' not in paths
+    assert runner.verify_environment_files(bare_env).ok
+    result = subprocess.run([str(runner.get_python_path(bare_env)), '-c', "import pkg.core; print(pkg.core.B)"],
+                            capture_output=True, text=True, timeout=60)
+    assert result.stdout.strip() == '2'
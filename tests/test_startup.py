@@ -0,0 +1,58 @@
+import os
+import subprocess
+import zipfile
+
+
+def run_fast(runner, env_path, script, env=None):
+    cmd = runner.startup_command(env_path, script, [], env)
+    return subprocess.run(cmd, capture_output=True, text=True, timeout=60, env=env)
+
+
+def test_module_index_continues_past_zip_entries(runner, bare_env, tmp_path):
+    site_packages = runner._site_packages_dirs(bare_env)[0]
+    archive = tmp_path / 'vendored.zip'
+    with zipfile.ZipFile(archive, 'w') as zf:
+        zf.writestr('zipped_mod.py', 'VALUE = 1\n')
+    extra_dir = tmp_path / 'extra'
+    extra_dir.mkdir()
+    (extra_dir / 'marker_mod.py').write_text('VALUE = 2\n')
+    # .pth entries are appended in file name order: the zip first, then a directory after it
+    (site_packages / 'a_zip.pth').write_text(f"{archive}\n")
+    (site_packages / 'b_dir.pth').write_text(f"{extra_dir}\n")
+
+    runner.build_startup_bootstrap(bare_env, module_index=True)
+
+    source = (bare_env / '.pyrunner' / 'pyrunner_startup.py').read_text()
+    assert repr('marker_mod') in source
+    script = tmp_path / 'script.py'
+    script.write_text("import zipped_mod, marker_mod\nprint(zipped_mod.VALUE + marker_mod.VALUE)\n")
+    assert run_fast(runner, bare_env, script).stdout.strip() == '3'
+
+
+def test_fast_startup_keeps_site_builtins(runner, bare_env, tmp_path):
+    script = tmp_path / 'script.py'
+    script.write_text("print(type(help).__name__, type(copyright).__name__, type(credits).__name__)\nexit(3)\n")
+
+    result = run_fast(runner, bare_env, script)
+
+    assert result.returncode == 3
+    assert result.stdout.split() == ['_Helper', '_Printer', '_Printer']
+
+
+def test_fast_startup_reapplies_startup_variables(runner, bare_env, tmp_path):
+    script = tmp_path / 'script.py'
+    script.write_text("import sys, warnings\n"
+                      "print(sys.stdout.encoding, sys.stdout.errors, sys.flags.utf8_mode)\n"
+                      "print(any(f[0] == 'error' and f[2] is DeprecationWarning for f in warnings.filters))\n")
+    env = dict(os.environ, PYTHONIOENCODING='latin-1:replace', PYTHONUTF8='1',
+               PYTHONWARNINGS='error::DeprecationWarning')
+
+    result = run_fast(runner, bare_env, script, env)
+
+    assert result.stdout.split() == ['latin-1', 'replace', '1', 'True']
+
+
+def test_pinned_hash_seed_blocks_fast_startup(runner):
+    assert runner.fast_startup_blockers({'PYTHONHASHSEED': '0'}) == ['PYTHONHASHSEED']
+    assert runner.fast_startup_blockers({'PYTHONHASHSEED': 'random'}) == []
+    assert runner.fast_startup_blockers({}) == []
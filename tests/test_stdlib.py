@@ -0,0 +1,39 @@
+import sys
+
+import pyrunner
+
+
+def fake_interpreter(tmp_path, modules):
+    """An executable that answers the stdlib probe with a fixed module list and counts its invocations."""
+    calls = tmp_path / 'calls'
+    python_path = tmp_path / 'bin' / 'python'
+    python_path.parent.mkdir()
+    python_path.write_text(f"#!/bin/sh\necho probe >> {calls}\necho '{modules}'\n")
+    python_path.chmod(0o755)
+    return python_path, calls
+
+
+def test_stdlib_modules_come_from_the_env_interpreter(runner, tmp_path):
+    python_path, calls = fake_interpreter(tmp_path, '["tomllib", "zoneinfo"]')
+
+    assert runner._stdlib_modules(python_path) == {'tomllib', 'zoneinfo'}
+    assert runner._stdlib_modules(python_path) == {'tomllib', 'zoneinfo'}
+    # A new runner reuses the on-disk cache instead of probing again
+    assert pyrunner.PyRunner()._stdlib_modules(python_path) == {'tomllib', 'zoneinfo'}
+    assert calls.read_text().count('probe') == 1
+
+
+def test_stdlib_modules_default_to_this_interpreter(runner, tmp_path):
+    assert runner._stdlib_modules() == runner._stdlib_modules(sys.executable)
+    assert runner._stdlib_modules(tmp_path / 'missing' / 'python') == runner._stdlib_modules()
+    assert {'json', 'sys', 'os'} <= runner._stdlib_modules()
+
+
+def test_infer_dependencies_uses_the_env_stdlib(runner, tmp_path, monkeypatch):
+    python_path, _ = fake_interpreter(tmp_path, '["json", "os", "sys"]')
+    script = tmp_path / 'job.py'
+    script.write_text("import json\nimport tomllib\n")
+    monkeypatch.setattr(runner, 'learn_module_index', lambda *args, **kwargs: {})
+
+    assert runner.infer_dependencies(str(script)) == ([], [])
+    assert runner.infer_dependencies(str(script), python_path) == ([], ['tomllib'])
@@ -0,0 +1,42 @@
+import json
+import os
+
+
+def test_deep_verify_reports_modified_truncated_and_missing_files(runner, bare_env, make_dist):
+    site_packages = make_dist(runner, bare_env, 'pkg', {'pkg/__init__.py': b"A = 1\n", 'pkg/core.py': b"B = 22\n",
+                                                        'pkg/data.txt': b"payload\n"}, version='2.0')
+    (site_packages / 'pkg' / '__init__.py').write_bytes(b"A = 9\n")
+    (site_packages / 'pkg' / 'core.py').write_bytes(b"B\n")
+    (site_packages / 'pkg' / 'data.txt').unlink()
+
+    report = runner.verify_environment_files(bare_env)
+
+    issues = {os.path.basename(problem['path']): problem['issue'] for problem in report.problems}
+    assert issues == {'__init__.py': 'modified', 'core.py': 'truncated', 'data.txt': 'missing'}
+    assert report.repairable == {'pkg': 'pkg==2.0'}
+    assert not report.ok
+
+
+def test_changed_only_rehashes_just_the_touched_files(runner, bare_env, make_dist):
+    site_packages = make_dist(runner, bare_env, 'pkg', {'pkg/__init__.py': b"A = 1\n", 'pkg/core.py': b"B = 2\n"})
+    first = runner.verify_environment_files(bare_env, changed_only=True)
+    assert first.ok and first.files_checked == 2
+
+    core = site_packages / 'pkg' / 'core.py'
+    core.write_bytes(b"B = 3\n")
+    second = runner.verify_environment_files(bare_env, changed_only=True)
+
+    assert second.files_checked == 1
+    assert [problem['path'] for problem in second.problems] == [str(core)]
+
+
+def test_editable_installs_are_not_repairable(runner, bare_env, make_dist):
+    site_packages = make_dist(runner, bare_env, 'pkg', {'pkg/__init__.py': b"A = 1\n"})
+    (site_packages / 'pkg-1.0.dist-info' / 'direct_url.json').write_text(
+        json.dumps({'url': 'file:///src/pkg', 'dir_info': {'editable': True}}))
+    (site_packages / 'pkg' / '__init__.py').write_bytes(b"A = 2\n")
+
+    report = runner.verify_environment_files(bare_env)
+
+    assert report.repairable == {}
+    assert 'editable' in report.unrepairable['pkg']